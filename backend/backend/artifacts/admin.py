@@ -5,4 +5,12 @@ Admin configuration for the artifacts app.
 
 from django.contrib import admin
 
-# No admin configuration needed yet - graph data comes from JSON files
+from backend.artifacts.models import NodeMastery
+
+
+@admin.register(NodeMastery)
+class NodeMasteryAdmin(admin.ModelAdmin):
+    list_display = ("user", "curriculum", "node_id", "score", "updated_at")
+    list_filter = ("curriculum",)
+    search_fields = ("user__email", "node_id")
+    raw_id_fields = ("user",)
@@ -10,3 +10,22 @@ class ArtifactsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'backend.artifacts'
     verbose_name = 'EduGraph Artifacts'
+
+    def ready(self):
+        from django.conf import settings
+        from src import graph_cache, graph_registry
+        from backend.artifacts import metrics
+        from src.compiled import CompiledArtifacts
+
+        graph_cache.max_bytes = settings.GRAPH_CACHE_MAX_BYTES
+        graph_cache.compact = settings.GRAPH_COMPACT_STORE
+        graph_cache.artifacts = CompiledArtifacts(settings.CURRICULUM_ARTIFACT_DIR, settings.CURRICULUM_DIR)
+        metrics.install()
+        graph_registry.discover(settings.CURRICULUM_DIR, default=settings.DEFAULT_CURRICULUM)
+        if settings.GRAPH_PRELOAD:
+            graph_registry.preload()
+            if settings.GRAPH_WARM_LAYOUT:
+                for entry in graph_registry.entries():
+                    graph = graph_registry.peek(entry.slug)
+                    if graph is not None:
+                        graph.positions(wait=False)  # in the background
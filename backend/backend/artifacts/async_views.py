@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+Async versions of the read-only graph API views, served under ASGI.
+
+Same URLs, parameters and response bodies as backend/artifacts/views.py
+(the response builders are shared). Requests for graphs and payloads that
+are already cached are answered on the event loop; graph builds, first-time
+serialization/compression and database reads run in the bounded "graph"
+pool (backend/common/executor.py), so slow ORM/SMTP/Cloudinary work in the
+user endpoints cannot stall graph reads.
+"""
+
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+
+from backend.artifacts import views
+from backend.artifacts.models import NodeMastery
+from backend.common.async_views import AsyncAPIView, json_response
+from backend.common.executor import pooled_view, run_blocking
+from backend.common.http import payload_response
+from src import CurriculumNotFound, graph_registry
+from src.utils.binary_format import MEDIA_TYPE
+from src.utils.lod import LOD_LEVELS
+
+
+async def aresolve_graph(request):
+    """Async resolve_graph(): cached graphs on the loop, (re)builds in the graph pool."""
+    entry = graph_registry.entry(request.query_params.get('curriculum'))
+    graph = graph_registry.peek(entry.slug)
+    if graph is None:
+        graph = await run_blocking(graph_registry.get, entry.slug, pool="graph")
+    views.annotate_graph(entry, graph)
+    return graph
+
+
+async def cached_payload_response(request, graph, key, build):
+    """
+    Serve graph.payload(key) like payload_response(); build() (a sync
+    builder from views.py) and the negotiated compression run in the pool
+    unless both are already cached.
+    """
+    payload = graph.peek_payload(key)
+    encoding = payload.negotiate(request.META.get("HTTP_ACCEPT_ENCODING", "")) if payload else None
+    if payload is None or (encoding and not payload.is_encoded(encoding)):
+        def prepare():
+            prepared = build()
+            accepted = prepared.negotiate(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+            if accepted:
+                prepared.encoded(accepted)
+            return prepared
+        payload = await run_blocking(prepare, pool="graph")
+    return payload_response(request, payload)
+
+
+def curriculum_not_found_response():
+    return json_response({"status": "error", "message": "Curriculum data file not found"},
+                         status.HTTP_404_NOT_FOUND)
+
+
+def node_not_found_response():
+    return json_response({"status": "error", "message": "Node not found"}, status.HTTP_404_NOT_FOUND)
+
+
+def error_response(e):
+    return json_response({"status": "error", "message": str(e)}, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def wants_binary(request):
+    return (request.query_params.get('format') == 'binary'
+            or MEDIA_TYPE in request.META.get('HTTP_ACCEPT', ''))
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncGraphDataView(AsyncAPIView):
+    """Async GET /api/graph/data/ (see GraphDataAPIView)."""
+
+    async def get(self, request):
+        try:
+            graph = await aresolve_graph(request)
+            with_layout = views.layout_ready(request, graph)
+            if wants_binary(request):
+                return await cached_payload_response(
+                    request, graph, views.binary_payload_key(with_layout),
+                    lambda: views.graph_binary_payload(graph, with_layout))
+            return await cached_payload_response(
+                request, graph, views.data_payload_key(with_layout),
+                lambda: views.graph_data_payload(graph, with_layout))
+
+        except (CurriculumNotFound, FileNotFoundError):
+            return curriculum_not_found_response()
+        except Exception as e:
+            return error_response(e)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncGraphNodesView(AsyncAPIView):
+    """Async GET /api/graph/nodes/ (see GraphNodesAPIView)."""
+
+    async def get(self, request):
+        try:
+            graph = await aresolve_graph(request)
+            node_type = request.query_params.get('type')
+            if node_type and node_type not in graph.metadata["node_types"]:
+                return json_response({"status": "success", "data": {"nodes": [], "count": 0}})
+            return await cached_payload_response(
+                request, graph, views.nodes_payload_key(node_type),
+                lambda: views.graph_nodes_payload(graph, node_type))
+
+        except (CurriculumNotFound, FileNotFoundError):
+            return curriculum_not_found_response()
+        except Exception as e:
+            return error_response(e)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncGraphLinksView(AsyncAPIView):
+    """Async GET /api/graph/links/ (see GraphLinksAPIView)."""
+
+    async def get(self, request):
+        try:
+            graph = await aresolve_graph(request)
+            return await cached_payload_response(
+                request, graph, views.LINKS_PAYLOAD_KEY, lambda: views.graph_links_payload(graph))
+
+        except (CurriculumNotFound, FileNotFoundError):
+            return curriculum_not_found_response()
+        except Exception as e:
+            return error_response(e)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncGraphStatsView(AsyncAPIView):
+    """Async GET /api/graph/stats/ (see GraphStatsAPIView)."""
+
+    async def get(self, request):
+        try:
+            graph = await aresolve_graph(request)
+            return json_response({"status": "success", "data": views.graph_stats_data(graph)})
+
+        except (CurriculumNotFound, FileNotFoundError):
+            return curriculum_not_found_response()
+        except Exception as e:
+            return error_response(e)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncCurriculumListView(AsyncAPIView):
+    """Async GET /api/graph/curricula/ (see CurriculumListAPIView)."""
+
+    async def get(self, request):
+        return json_response({"status": "success", "data": views.curricula_data()})
+
+
+async def hierarchy_data(graph, build, *args):
+    # the hierarchy index is built once per graph version; do that off the loop
+    if graph.is_built("hierarchy"):
+        return build(graph, *args)
+    return await run_blocking(build, graph, *args, pool="graph")
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncGraphSubtreeView(AsyncAPIView):
+    """Async GET /api/graph/subtree/<node_id>/ (see GraphSubtreeAPIView)."""
+
+    async def get(self, request, node_id):
+        try:
+            depth = views.parse_depth(request.query_params.get('depth'))
+        except ValueError:
+            return json_response({"status": "error", "message": "depth must be a non-negative integer"},
+                                 status.HTTP_400_BAD_REQUEST)
+
+        try:
+            graph = await aresolve_graph(request)
+            data = await hierarchy_data(graph, views.graph_subtree_data, node_id, depth)
+            if data is None:
+                return node_not_found_response()
+            return json_response({"status": "success", "data": data})
+
+        except (CurriculumNotFound, FileNotFoundError):
+            return curriculum_not_found_response()
+        except Exception as e:
+            return error_response(e)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncGraphAncestorsView(AsyncAPIView):
+    """Async GET /api/graph/ancestors/<node_id>/ (see GraphAncestorsAPIView)."""
+
+    async def get(self, request, node_id):
+        try:
+            graph = await aresolve_graph(request)
+            data = await hierarchy_data(graph, views.graph_ancestors_data, node_id)
+            if data is None:
+                return node_not_found_response()
+            return json_response({"status": "success", "data": data})
+
+        except (CurriculumNotFound, FileNotFoundError):
+            return curriculum_not_found_response()
+        except Exception as e:
+            return error_response(e)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncGraphLevelOfDetailView(AsyncAPIView):
+    """Async GET /api/graph/lod/ (see GraphLevelOfDetailAPIView)."""
+
+    async def get(self, request):
+        level = request.query_params.get('level') or LOD_LEVELS[0]
+        if level not in LOD_LEVELS:
+            return json_response({"status": "error", "message": f"level must be one of: {', '.join(LOD_LEVELS)}"},
+                                 status.HTTP_400_BAD_REQUEST)
+        expand = [i for i in (request.query_params.get('expand') or '').split(',') if i]
+
+        try:
+            graph = await aresolve_graph(request)
+            if not expand:
+                return await cached_payload_response(
+                    request, graph, views.lod_payload_key(level), lambda: views.graph_lod_payload(graph, level))
+            if graph.is_built("lod"):
+                data = graph.lod().view(level, expand)
+            else:
+                data = await run_blocking(lambda: graph.lod().view(level, expand), pool="graph")
+            return json_response({"status": "success", "data": data})
+
+        except (CurriculumNotFound, FileNotFoundError):
+            return curriculum_not_found_response()
+        except Exception as e:
+            return error_response(e)
+
+
+_sync_mastery_view = pooled_view(views.GraphMasteryAPIView.as_view())
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncGraphMasteryView(AsyncAPIView):
+    """Async GET /api/graph/mastery/ (see GraphMasteryAPIView); PUT runs the sync view in the pool."""
+
+    async def get(self, request):
+        try:
+            entry = graph_registry.entry(request.query_params.get('curriculum'))
+            graph = await aresolve_graph(request)
+            scores = await run_blocking(NodeMastery.objects.scores_for, request.user, entry.slug, pool="graph")
+            return payload_response(request, views.mastery_overlay_payload(entry, graph, scores))
+
+        except (CurriculumNotFound, FileNotFoundError):
+            return curriculum_not_found_response()
+        except Exception as e:
+            return error_response(e)
+
+    async def put(self, request):
+        return await _sync_mastery_view(request._request)
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of the graph engine and the /api/graph/* views.
+
+For every size a synthetic curriculum (src/utils/synthetic.py) is written
+to a temporary directory and these cases are timed:
+
+    load_curriculum_data      parse the JSON export
+    process_records           GraphProcessor.process_records()
+    render_graph_html         TemplateManager.render_graph_html()
+    graph_build               GraphCache miss: load + process + metadata
+    view:<url name>           each GET /api/graph/* view with a warm graph;
+                              "first" is the call that builds the payload
+
+POST /api/graph/results/ writes to the database and is not benchmarked.
+
+Results are plain JSON (see run_suite); compare_results() checks them
+against a saved baseline. Baselines depend on the machine, so record and
+compare them on the same hardware (e.g. one CI runner class).
+"""
+
+import gc
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List
+
+from django.db import transaction
+from django.urls import resolve, reverse
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from backend.users.models import User
+from src import graph_cache, graph_registry
+from src.utils.data_loader import load_curriculum_data
+from src.utils.graph_processor import GraphProcessor
+from src.utils.synthetic import parse_size, write_synthetic_curriculum
+from src.utils.template_manager import TemplateManager
+
+RESULTS_FORMAT = 1
+
+# (case name, url name, url kwargs from the graph, query string)
+VIEW_CASES = [
+    ("view:graph-data", "artifacts:graph-data", None, ""),
+    ("view:graph-data-binary", "artifacts:graph-data", None, "format=binary"),
+    ("view:graph-data-layout", "artifacts:graph-data", None, "layout=1"),
+    ("view:graph-nodes", "artifacts:graph-nodes", None, ""),
+    ("view:graph-links", "artifacts:graph-links", None, ""),
+    ("view:graph-stats", "artifacts:graph-stats", None, ""),
+    ("view:graph-curricula", "artifacts:graph-curricula", None, ""),
+    ("view:graph-subtree", "artifacts:graph-subtree", lambda g: {"node_id": g.nodes[0]["id"]}, "depth=2"),
+    ("view:graph-ancestors", "artifacts:graph-ancestors", lambda g: {"node_id": g.nodes[-1]["id"]}, ""),
+    ("view:graph-lod", "artifacts:graph-lod", None, "level=grup"),
+    ("view:graph-mastery", "artifacts:graph-mastery", None, ""),
+    ("view:graph-memory", "artifacts:graph-memory", None, ""),
+]
+
+# cases whose first request only starts a background build (the force layout):
+# their "first" time also waits for it and includes the request that serves it
+FIRST_READY = {
+    "view:graph-data-layout": lambda graph: graph.positions(),
+}
+
+TEMPLATE = "<!DOCTYPE html><html><body><script>const nodes = {{NODES}};\nconst links = {{LINKS}};</script></body></html>"
+
+
+def measure(func: Callable[[], Any], repeat: int, budget: float) -> Dict[str, Any]:
+    """
+    Time func up to repeat times, stopping early once budget seconds have
+    been spent (after at least one run). Returns median/min in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+        if sum(times) >= budget:
+            break
+    return {"median": statistics.median(times), "min": min(times), "runs": len(times)}
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "implementation": sys.implementation.name,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def _render(response):
+    if hasattr(response, "render"):
+        response.render()
+    assert response.status_code == 200, f"{response.status_code}: {response.content[:200]!r}"
+    return response
+
+
+def bench_engine(path: Path, template_dir: Path, repeat: int, budget: float) -> Dict[str, Dict[str, Any]]:
+    cases = {"load_curriculum_data": measure(lambda: load_curriculum_data(str(path)), repeat, budget)}
+    records = load_curriculum_data(str(path))
+    cases["process_records"] = measure(lambda: GraphProcessor().process_records(records), repeat, budget)
+    nodes, links = GraphProcessor().process_records(records)
+    del records
+    manager = TemplateManager(str(template_dir))
+    cases["render_graph_html"] = measure(lambda: manager.render_graph_html(nodes, links), repeat, budget)
+    return cases
+
+
+def bench_views(slug: str, user, repeat: int, budget: float, accept_encoding: str = "gzip, br",
+                log: Callable[[str], None] = lambda message: None) -> Dict[str, Dict[str, Any]]:
+    def build():
+        graph_cache.clear()
+        return graph_registry.get(slug)
+
+    cases = {"graph_build": measure(build, repeat, budget)}
+    graph = graph_registry.get(slug)
+    factory = APIRequestFactory()
+
+    for name, url_name, url_kwargs, query in VIEW_CASES:
+        log(name)
+        url = reverse(url_name, kwargs=url_kwargs(graph) if url_kwargs else None)
+        match = resolve(url)
+        query = f"curriculum={slug}" + (f"&{query}" if query else "")
+
+        def call():
+            request = factory.get(f"{url}?{query}", HTTP_ACCEPT_ENCODING=accept_encoding)
+            force_authenticate(request, user=user)
+            return _render(match.func(request, *match.args, **match.kwargs))
+
+        start = time.perf_counter()
+        call()
+        if name in FIRST_READY:
+            FIRST_READY[name](graph)
+            call()
+        first = time.perf_counter() - start
+        cases[name] = {**measure(call, repeat, budget), "first": first}
+    return cases
+
+
+def run_suite(sizes: Iterable[str], seed: int = 0, repeat: int = 5, budget: float = 10.0,
+              views: bool = True, accept_encoding: str = "gzip, br",
+              log: Callable[[str], None] = lambda message: None) -> Dict[str, Any]:
+    """
+    Run every case for each size label ("1k", "10k", "100k", "1m" or a
+    number) and return the results document. accept_encoding is sent with
+    the view requests; the first request of each cached payload pays for
+    compressing it.
+    """
+    results: Dict[str, Any] = {}
+    original_root, original_default = graph_registry.root, graph_registry.default_slug
+    with tempfile.TemporaryDirectory(prefix="edugraph-bench-") as tmp:
+        tmp = Path(tmp)
+        (tmp / "graph.html").write_text(TEMPLATE, encoding="utf-8")
+        try:
+            for label in sizes:
+                count = parse_size(label)
+                slug = f"bench/synthetic_{label}"
+                log(f"{label}: generating {count} records")
+                path = write_synthetic_curriculum(tmp / "curricula" / f"{slug}.json", count, seed)
+                entry = {"records": count, "bytes": path.stat().st_size}
+
+                log(f"{label}: graph engine")
+                entry["cases"] = bench_engine(path, tmp, repeat, budget)
+                if views:
+                    log(f"{label}: views")
+                    graph_registry.discover(tmp / "curricula", default=slug)
+                    with transaction.atomic():
+                        user = User.objects.create_user(email="benchmark@edugraph.invalid", password=None,
+                                                        name="Benchmark", is_staff=True, is_active=True)
+                        entry["cases"].update(bench_views(slug, user, repeat, budget, accept_encoding,
+                                                            lambda name: log(f"{label}: {name}")))
+                        transaction.set_rollback(True)
+                    graph = graph_registry.get(slug)
+                    entry.update(nodes=graph.metadata["total_nodes"], links=graph.metadata["total_links"])
+                    graph_cache.clear()
+                results[label] = entry
+                path.unlink()
+        finally:
+            graph_cache.clear()
+            if original_root is not None:
+                graph_registry.discover(original_root, default=original_default)
+
+    return {
+        "format": RESULTS_FORMAT,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "environment": environment(),
+        "config": {"seed": seed, "repeat": repeat, "budget": budget,
+                   "accept_encoding": accept_encoding, "graph_compact_store": graph_cache.compact},
+        "results": results,
+    }
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.25,
+                    min_delta: float = 0.002) -> List[Dict[str, Any]]:
+    """
+    Return the cases whose median got slower than the baseline's by more
+    than threshold (a fraction) and by at least min_delta seconds, which
+    keeps sub-millisecond cases from failing on noise. Cases missing from
+    either side are ignored.
+    """
+    regressions = []
+    for label, entry in current.get("results", {}).items():
+        base_cases = baseline.get("results", {}).get(label, {}).get("cases", {})
+        for name, result in entry.get("cases", {}).items():
+            base = base_cases.get(name)
+            if base is None:
+                continue
+            before, after = base["median"], result["median"]
+            if after - before >= min_delta and after > before * (1 + threshold):
+                regressions.append({"size": label, "case": name, "baseline": before, "current": after,
+                                    "change": after / before - 1 if before else None})
+    return regressions
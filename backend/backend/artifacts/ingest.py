@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Bulk ingestion of exam results into NodeMastery.
+Shared by the ingest_results management command and the results upload API.
+"""
+
+import logging
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from django.contrib.auth import get_user_model
+
+from backend.artifacts.models import NodeMastery
+from src import graph_registry
+from src.utils.data_loader import iter_curriculum_records
+from src.utils.results import ResultAggregator, kazanim_index, parse_correct
+
+logger = logging.getLogger(__name__)
+
+# row errors reported back in the stats; the rest are only counted
+MAX_ROW_ERRORS = 20
+
+
+def ingest_results(rows: Iterable[Tuple[int, Any]], curriculum: Optional[str] = None,
+                   answer_key: Optional[Dict[Tuple[str, str], str]] = None,
+                   chunk_size: int = 5000, batch_size: int = 1000) -> Dict[str, Any]:
+    """
+    Aggregate result rows per (student, kazanım) and upsert NodeMastery rows.
+
+    rows are (line number, row) pairs as yielded by iter_numbered_rows().
+    Rows that are not objects or lack an e-mail or a readable "correct" value
+    are counted as invalid_rows; the first MAX_ROW_ERRORS are listed in
+    stats["errors"] with their line numbers.
+
+    Rows are consumed lazily; student e-mails are resolved with one query per
+    chunk_size rows and scores are written batch_size rows per transaction.
+    Raises CurriculumNotFound for unknown curricula.
+    """
+    entry = graph_registry.entry(curriculum)
+    codes = kazanim_index(iter_curriculum_records(str(entry.path)))
+    answer_key = answer_key or {}
+    aggregator = ResultAggregator()
+    User = get_user_model()
+    users: Dict[str, Any] = {}
+    stats = {"rows": 0, "unknown_students": 0, "unknown_kazanims": 0, "invalid_rows": 0,
+             "errors": []}
+
+    def reject(line, error):
+        stats["invalid_rows"] += 1
+        if len(stats["errors"]) < MAX_ROW_ERRORS:
+            stats["errors"].append({"line": line, "error": error})
+
+    def resolve_users(chunk):
+        emails = {row[0] for row in chunk} - users.keys()
+        if emails:
+            users.update(User.objects.filter(email__in=emails).values_list("email", "pk"))
+            # remember misses so they are not queried again
+            users.update((email, None) for email in emails - users.keys())
+        for email, node_id, correct, total in chunk:
+            user_id = users[email]
+            if user_id is None:
+                stats["unknown_students"] += 1
+            else:
+                aggregator.add(user_id, node_id, correct, total)
+
+    chunk = []
+    for line, row in rows:
+        stats["rows"] += 1
+        if not isinstance(row, dict):
+            reject(line, "row is not an object")
+            continue
+        if row.get("correct") is None:
+            reject(line, "missing correct")
+            continue
+        try:
+            email = str(row.get("email") or "").strip()
+            test = str(row.get("test") or "").strip().upper()
+            code = str(row.get("kazanim_kodu") or "").strip()
+            if not code and row.get("question") not in (None, ""):
+                code = answer_key.get((test, str(row["question"]).strip())) or ""
+            correct = parse_correct(row["correct"])
+            total = float(row.get("total") or 1)
+        except (TypeError, ValueError) as e:
+            reject(line, str(e))
+            continue
+        node_id = codes.get((test, code)) or codes.get(("", code))
+        if not email:
+            reject(line, "missing email")
+            continue
+        if node_id is None:
+            stats["unknown_kazanims"] += 1
+            continue
+        chunk.append((email, node_id, correct, total))
+        if len(chunk) >= chunk_size:
+            resolve_users(chunk)
+            chunk = []
+    if chunk:
+        resolve_users(chunk)
+
+    written = NodeMastery.objects.upsert(
+        ({"user_id": user_id, "curriculum": entry.slug, "node_id": node_id, "score": rate}
+         for user_id, node_id, rate, _ in aggregator.rates()),
+        batch_size=batch_size,
+    )
+    stats.update(curriculum=entry.slug, students=len(aggregator.students), scores_written=written)
+    logger.info("Ingested exam results: %s", stats)
+    return stats
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark the graph engine and the graph API on synthetic curricula.
+
+    python manage.py benchmark_graph                                   # 1k, 10k and 100k records
+    python manage.py benchmark_graph --sizes 1k,10k,100k,1m --output benchmarks/baseline.json
+    python manage.py benchmark_graph --baseline benchmarks/baseline.json   # exit non-zero on regressions
+
+See backend/artifacts/benchmarks.py for the cases.
+"""
+
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.artifacts.benchmarks import compare_results, run_suite
+
+
+class Command(BaseCommand):
+    help = "Benchmark curriculum loading, graph processing, HTML rendering and the graph views"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1k,10k,100k",
+                            help="Comma-separated record counts: 1k, 10k, 100k, 1m or plain numbers")
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic curriculum generator")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per case (the median is reported)")
+        parser.add_argument("--budget", type=float, default=10.0,
+                            help="Stop repeating a case after this many seconds")
+        parser.add_argument("--no-views", action="store_true", help="Only benchmark the graph engine")
+        parser.add_argument("--accept-encoding", default="gzip, br",
+                            help="Accept-Encoding of the view requests (e.g. \"identity\" to skip compression)")
+        parser.add_argument("--output", help="Write the results as JSON (e.g. to save a new baseline)")
+        parser.add_argument("--baseline", help="Compare against a JSON results file from an earlier run")
+        parser.add_argument("--threshold", type=float, default=0.25,
+                            help="Allowed slowdown against the baseline as a fraction (0.25 = 25%%)")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            try:
+                baseline = json.loads(Path(options["baseline"]).read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read baseline {options['baseline']}: {e}")
+
+        sizes = [size for size in options["sizes"].split(",") if size.strip()]
+        results = run_suite(sizes, seed=options["seed"], repeat=options["repeat"], budget=options["budget"],
+                            views=not options["no_views"], accept_encoding=options["accept_encoding"],
+                            log=lambda message: self.stderr.write(message))
+
+        for label, entry in results["results"].items():
+            base_cases = (baseline or {}).get("results", {}).get(label, {}).get("cases", {})
+            self.stdout.write(f"{label} ({entry['records']} records, {entry['bytes'] / 2 ** 20:.1f} MiB)")
+            for name, result in entry["cases"].items():
+                line = f"  {name:<28} {result['median'] * 1000:>10.2f} ms"
+                if "first" in result:
+                    line += f" (first {result['first'] * 1000:.2f} ms)"
+                if name in base_cases and base_cases[name]["median"]:
+                    change = result["median"] / base_cases[name]["median"] - 1
+                    line += f"  {change:+.1%}"
+                self.stdout.write(line)
+
+        if options["output"]:
+            output = Path(options["output"])
+            output.parent.mkdir(parents=True, exist_ok=True)
+            output.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+            self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
+
+        if baseline is not None:
+            regressions = compare_results(results, baseline, options["threshold"])
+            for r in regressions:
+                self.stdout.write(self.style.ERROR(
+                    f"{r['size']} {r['case']}: {r['baseline'] * 1000:.2f} ms -> {r['current'] * 1000:.2f} ms"
+                ))
+            if regressions:
+                raise CommandError(f"{len(regressions)} benchmark(s) regressed by more than "
+                                   f"{options['threshold']:.0%}")
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+Compile curriculum JSON files into binary artifacts for fast worker start.
+
+    python manage.py compile_curricula            # compile stale artifacts
+    python manage.py compile_curricula --force    # recompile everything
+    python manage.py compile_curricula --check    # exit non-zero if any are stale
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from src import CurriculumNotFound, graph_registry
+from src.compiled import CompiledArtifacts
+from src.layout import layout_available
+
+
+class Command(BaseCommand):
+    help = "Compile curriculum JSON files into precomputed graph artifacts"
+
+    def add_arguments(self, parser):
+        parser.add_argument("curricula", nargs="*", help="Curriculum slugs, file names or subjects (default: all)")
+        parser.add_argument("--force", action="store_true", help="Recompile even if the artifact is current")
+        parser.add_argument("--check", action="store_true", help="Only report stale artifacts")
+        parser.add_argument("--no-layout", action="store_true", help="Skip precomputing layout positions")
+
+    def handle(self, *args, **options):
+        artifacts = CompiledArtifacts(settings.CURRICULUM_ARTIFACT_DIR, settings.CURRICULUM_DIR)
+        try:
+            entries = [graph_registry.entry(key) for key in options["curricula"]] or graph_registry.entries()
+        except CurriculumNotFound as e:
+            raise CommandError(f"Curriculum not found: {e}")
+
+        layout = not options["no_layout"] and layout_available()
+        stale = []
+        for entry in entries:
+            source = str(entry.path)
+            if not options["force"] and artifacts.is_current(source):
+                self.stdout.write(f"{entry.slug}: up to date")
+                continue
+            stale.append(entry.slug)
+            if options["check"]:
+                self.stdout.write(self.style.WARNING(f"{entry.slug}: stale"))
+                continue
+            target = artifacts.compile(source, layout=layout)
+            self.stdout.write(self.style.SUCCESS(f"{entry.slug}: compiled to {target}"))
+
+        if options["check"] and stale:
+            raise CommandError(f"{len(stale)} curriculum artifact(s) need compiling")
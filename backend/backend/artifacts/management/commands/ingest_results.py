@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Import exam results (CSV or JSON Lines) into per-student kazanım mastery.
+
+    python manage.py ingest_results results.csv --curriculum matematik --answer-key key.csv
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.artifacts.ingest import ingest_results
+from src import CurriculumNotFound
+from src.utils.results import iter_numbered_rows, load_answer_key
+
+
+class Command(BaseCommand):
+    help = "Import exam results and store per-student kazanım success rates"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSONL result file")
+        parser.add_argument("--curriculum", help="Curriculum slug, file name or subject (default curriculum if omitted)")
+        parser.add_argument("--answer-key", help="CSV/JSONL mapping test + question to kazanim_kodu")
+        parser.add_argument("--format", choices=("csv", "jsonl"), help="Input format (default: from the file extension)")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per upsert transaction")
+
+    def handle(self, *args, **options):
+        answer_key = load_answer_key(options["answer_key"]) if options["answer_key"] else None
+        try:
+            stats = ingest_results(
+                iter_numbered_rows(options["path"], options["format"]),
+                curriculum=options["curriculum"],
+                answer_key=answer_key,
+                batch_size=options["batch_size"],
+            )
+        except CurriculumNotFound as e:
+            raise CommandError(f"Curriculum not found: {e}")
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Could not read results: {e}")
+
+        for error in stats["errors"]:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['scores_written']} scores for {stats['students']} students from {stats['rows']} rows "
+            f"({stats['unknown_students']} unknown students, {stats['unknown_kazanims']} unmapped, "
+            f"{stats['invalid_rows']} invalid)"
+        ))
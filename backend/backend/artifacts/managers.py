@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Model managers for the artifacts app.
+"""
+
+from typing import Any, Dict, Iterable, Mapping
+
+from django.db import models, transaction
+
+
+class NodeMasteryManager(models.Manager):
+    """Custom manager for NodeMastery."""
+
+    def scores_for(self, user, curriculum: str) -> Dict[str, float]:
+        """Return {node_id: score} for one user and curriculum (one indexed query)."""
+        return dict(
+            self.filter(user=user, curriculum=curriculum).values_list("node_id", "score")
+        )
+
+    def upsert(self, rows: Iterable[Mapping[str, Any]], batch_size: int = 1000) -> int:
+        """
+        Insert or update mastery rows in bulk.
+
+        Each row needs user_id, curriculum, node_id and score. Rows are written
+        with INSERT ... ON CONFLICT DO UPDATE in batches of batch_size, each in
+        its own transaction. Returns the number of rows written.
+        """
+        written = 0
+        batch = []
+        for row in rows:
+            batch.append(self.model(**row))
+            if len(batch) >= batch_size:
+                written += self._write_batch(batch)
+                batch = []
+        if batch:
+            written += self._write_batch(batch)
+        return written
+
+    def _write_batch(self, batch) -> int:
+        with transaction.atomic(using=self.db):
+            self.bulk_create(
+                batch,
+                update_conflicts=True,
+                unique_fields=["user", "curriculum", "node_id"],
+                update_fields=["score", "updated_at"],
+            )
+        return len(batch)
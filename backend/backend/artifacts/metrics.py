@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Graph metrics: build durations, per-curriculum sizes and graph cache lookups.
+
+Registered in ArtifactsConfig.ready(); see backend/common/metrics.py.
+"""
+
+import os
+
+from backend.common.metrics import CACHE_REQUESTS, registry
+from src import graph_cache, graph_registry
+
+GRAPH_BUILD_SECONDS = registry.histogram(
+    "edugraph_graph_build_seconds", "Time to build a curriculum graph (JSON parse or artifact load)", ["source"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0))
+GRAPH_NODES = registry.gauge("edugraph_graph_nodes", "Nodes of the loaded curriculum graph", ["curriculum"],
+                             mode="max")
+GRAPH_LINKS = registry.gauge("edugraph_graph_links", "Links of the loaded curriculum graph", ["curriculum"],
+                             mode="max")
+GRAPH_BYTES = registry.gauge("edugraph_graph_bytes", "Approximate memory held by the loaded curriculum graph",
+                             ["curriculum"], mode="max")
+
+
+def record_build(entry, source: str, seconds: float) -> None:
+    GRAPH_BUILD_SECONDS.observe(seconds, source=source)
+
+
+def collect_graphs() -> None:
+    slugs = {os.path.abspath(str(e.path)): e.slug for e in graph_registry.entries()}
+    gauges = (GRAPH_NODES, GRAPH_LINKS, GRAPH_BYTES)
+    for gauge in gauges:  # forget evicted graphs
+        gauge.clear()
+    for graph in graph_cache.entries():
+        curriculum = slugs.get(graph.path, os.path.basename(graph.path))
+        GRAPH_NODES.set(graph.metadata["total_nodes"], curriculum=curriculum)
+        GRAPH_LINKS.set(graph.metadata["total_links"], curriculum=curriculum)
+        GRAPH_BYTES.set(graph.nbytes, curriculum=curriculum)
+
+    stats = graph_cache.stats()
+    CACHE_REQUESTS.track(stats["hits"], cache="graph", result="hit")
+    CACHE_REQUESTS.track(stats["misses"] + stats["rebuilds"], cache="graph", result="miss")
+
+
+def install() -> None:
+    if record_build not in graph_cache.build_listeners:
+        graph_cache.build_listeners.append(record_build)
+    registry.add_collector(collect_graphs)
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NodeMastery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('curriculum', models.CharField(help_text='Curriculum slug, e.g. matematik/matematik_kazanimlari_124_154', max_length=255, verbose_name='Curriculum')),
+                ('node_id', models.CharField(max_length=255, verbose_name='Node ID')),
+                ('score', models.FloatField(help_text='Success rate between 0 and 1', verbose_name='Score')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Last Update')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='node_mastery', to=settings.AUTH_USER_MODEL, verbose_name='Student')),
+            ],
+            options={
+                'verbose_name': 'Node Mastery',
+                'verbose_name_plural': 'Node Mastery',
+                'constraints': [models.UniqueConstraint(fields=('user', 'curriculum', 'node_id'), name='unique_user_curriculum_node')],
+            },
+        ),
+    ]
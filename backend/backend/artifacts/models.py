@@ -1,9 +1,35 @@
 # -*- coding: utf-8 -*-
 """
 Models for the artifacts app.
-Currently, the graph is generated from JSON files, so no database models are needed.
+The graph itself is generated from JSON files; only per-user data lives in the database.
 """
 
+from django.conf import settings
 from django.db import models
 
-# No models needed for now - graph data comes from JSON files
+from backend.artifacts.managers import NodeMasteryManager
+
+
+class NodeMastery(models.Model):
+    """A user's success rate (0..1) on one node of a curriculum graph."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="node_mastery", verbose_name="Student"
+    )
+    curriculum = models.CharField("Curriculum", max_length=255, help_text="Curriculum slug, e.g. matematik/matematik_kazanimlari_124_154")
+    node_id = models.CharField("Node ID", max_length=255)
+    score = models.FloatField("Score", help_text="Success rate between 0 and 1")
+    updated_at = models.DateTimeField("Last Update", auto_now=True)
+
+    objects = NodeMasteryManager()
+
+    class Meta:
+        verbose_name = "Node Mastery"
+        verbose_name_plural = "Node Mastery"
+        # also serves the (user, curriculum) overlay lookup as a prefix
+        constraints = [
+            models.UniqueConstraint(fields=["user", "curriculum", "node_id"], name="unique_user_curriculum_node")
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.curriculum}:{self.node_id} = {self.score:.2f}"
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+Renderers for the artifacts (graph) API.
+"""
+
+from rest_framework.renderers import JSONRenderer
+
+from src.utils.binary_format import MEDIA_TYPE
+
+
+class GraphBinaryRenderer(JSONRenderer):
+    """
+    Selected with ?format=binary or Accept: application/vnd.edugraph.graph.
+
+    Successful graph responses are pre-encoded bytes served by the view
+    itself; anything else that reaches the renderer (errors) falls back to
+    JSON so clients can still read the message.
+    """
+    media_type = MEDIA_TYPE
+    format = 'binary'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, (bytes, bytearray)):
+            return bytes(data)
+        renderer_context = renderer_context or {}
+        response = renderer_context.get('response')
+        if response is not None:
+            response['Content-Type'] = 'application/json'
+        return super().render(data, 'application/json', renderer_context)
@@ -14,6 +14,9 @@ class NodeSerializer(serializers.Serializer):
     color = serializers.CharField()
     label = serializers.CharField()
     title = serializers.CharField()
+    # Precomputed layout position, only present with ?layout=1
+    x = serializers.FloatField(required=False)
+    y = serializers.FloatField(required=False)
 
 
 class LinkSerializer(serializers.Serializer):
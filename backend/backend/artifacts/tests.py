@@ -3,9 +3,71 @@
 Tests for the graph API views.
 """
 
-from django.test import TestCase, Client
-from django.urls import reverse
+import asyncio
+import gc
+import gzip
+import io
 import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock, skipUnless
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import (AsyncRequestFactory, Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from backend.artifacts import async_views
+from backend.artifacts.benchmarks import compare_results
+from backend.artifacts.models import NodeMastery
+from backend.artifacts.serializers import LinkSerializer, NodeSerializer
+from backend.artifacts.views import warm_graph_payloads
+from backend.common.executor import run_blocking
+from backend.common.metrics import Registry, aggregate, registry, render, write_json
+from backend.common.middleware import ProfilingMiddleware
+from backend.users.models import User
+from src import graph_cache, graph_utils, layout
+from src.compiled import ARTIFACT_SUFFIX, CompiledArtifacts
+from src.graph_utils import CachedGraph, GraphCache, GraphGenerator
+from src.layout import ForceLayout, layout_available
+from src.registry import CurriculumNotFound, GraphRegistry, graph_registry
+from src.serving import preload_and_freeze
+from src.utils.binary_format import MEDIA_TYPE, decode_graph, encode_graph
+from src.utils.colors import score_to_color, score_to_radius, scores_to_colors, scores_to_radii
+from src.utils.data_loader import iter_curriculum_records, load_curriculum_data
+from src.utils.graph_index import HierarchyIndex
+from src.utils.graph_processor import GraphProcessor, create_graph_data
+from src.utils.graph_store import CompactGraph
+from src.utils.payload import EncodedPayload, encode_json
+from src.utils.results import ResultAggregator
+from src.utils.synthetic import iter_synthetic_records, parse_size, write_synthetic_curriculum
+from src.utils.timing import collecting, phase
+
+
+def write_curriculum(path, records):
+    """Write records to a curriculum JSON file in the export layout."""
+    Path(path).write_text(
+        json.dumps({"Matematik Kazanımları": records}, ensure_ascii=False),
+        encoding="utf-8",
+    )
+
+
+SAMPLE_RECORDS = [
+    {"id": "konu_a", "baslik": "Konu A", "node_type": "konu", "node_size": 3, "parent_id": ""},
+    {"id": "grp_a", "baslik": "Grup A", "node_type": "grup", "node_size": 2, "parent_id": "konu_a"},
+    {"id": "alt_a", "baslik": "Alt A", "node_type": "alt_grup", "node_size": 1, "parent_id": "grp_a"},
+    {"id": "kz_1", "baslik": "Kazanım 1", "kazanim_kodu": "9.1.1.1", "node_type": "kazanım",
+     "basari_puani": 0.25, "parent_id": "alt_a"},
+    {"id": "kz_2", "baslik": "Kazanım 2", "kazanim_kodu": "9.1.1.2", "node_type": "kazanım",
+     "basari_puani": 0.8, "parent_id": "alt_a"},
+]
 
 
 class GraphAPITestCase(TestCase):
@@ -117,3 +179,1185 @@ class GraphAPITestCase(TestCase):
         html_content = response.content.decode('utf-8')
         self.assertIn('<!DOCTYPE html>', html_content)
         self.assertIn('</html>', html_content)
+
+
+class GraphCacheTestCase(SimpleTestCase):
+    """Test cases for the process-wide graph cache."""
+
+    def setUp(self):
+        """Create a temporary curriculum file and an empty cache."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.data_file = os.path.join(self.tmpdir.name, "curriculum.json")
+        write_curriculum(self.data_file, SAMPLE_RECORDS)
+        self.cache = GraphCache()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_repeated_access_is_a_hit(self):
+        """Test that the second lookup reuses the built graph."""
+        first = self.cache.get(self.data_file)
+        second = self.cache.get(self.data_file)
+
+        self.assertIs(first, second)
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["rebuilds"]), (1, 1, 0))
+        self.assertEqual(first.metadata["total_nodes"], 5)
+        self.assertEqual(first.metadata["total_links"], 4)
+        self.assertEqual(first.metadata["node_types"]["kazanım"], 2)
+        self.assertEqual(first.link_types["alt_grup → kazanım"], 2)
+
+    def test_modified_file_is_rebuilt(self):
+        """Test that a changed file signature triggers a rebuild."""
+        first = self.cache.get(self.data_file)
+        write_curriculum(self.data_file, SAMPLE_RECORDS[:3])
+        stat = os.stat(self.data_file)
+        os.utime(self.data_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        second = self.cache.get(self.data_file)
+
+        self.assertIsNot(first, second)
+        self.assertEqual(len(second.nodes), 3)
+        self.assertEqual(self.cache.stats()["rebuilds"], 1)
+
+    def test_missing_file_raises(self):
+        """Test that a missing curriculum file surfaces FileNotFoundError."""
+        with self.assertRaises(FileNotFoundError):
+            self.cache.get(os.path.join(self.tmpdir.name, "missing.json"))
+
+    def test_lru_eviction(self):
+        """Test that the least recently used graph is evicted over max_bytes."""
+        other_file = os.path.join(self.tmpdir.name, "other.json")
+        write_curriculum(other_file, SAMPLE_RECORDS)
+        size = self.cache.get(self.data_file).nbytes
+        self.cache.max_bytes = size + size // 2
+
+        self.cache.get(other_file)
+
+        stats = self.cache.stats()
+        self.assertEqual(stats["entries"], 1)
+        self.assertEqual(stats["evictions"], 1)
+
+
+class StreamingLoaderTestCase(SimpleTestCase):
+    """Test cases for the incremental curriculum loader."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _write(self, name, document):
+        path = os.path.join(self.tmpdir.name, name)
+        Path(path).write_text(json.dumps(document, ensure_ascii=False), encoding="utf-8")
+        return path
+
+    def test_streamed_records_match_eager_loader(self):
+        """Test that streaming yields the same validated records for each layout."""
+        records = SAMPLE_RECORDS + [{"baslik": "no id"}]
+        layouts = {
+            "default_key.json": {"Matematik Kazanımları": records},
+            "list.json": records,
+            "preferred_key.json": {"meta": [1, 2], "Matematik Kazanımları": records},
+            "other_key.json": {"kaynak": "meb", "Fizik Kazanımları": records},
+        }
+        for name, document in layouts.items():
+            with self.subTest(layout=name):
+                path = self._write(name, document)
+                expected = [r for r in load_curriculum_data(path) if r.get("id")]
+                self.assertEqual(list(iter_curriculum_records(path)), expected)
+
+    def test_streamed_graph_matches_eager_graph(self):
+        """Test that a generator input builds the same graph as a list."""
+        path = self._write("curriculum.json", {"Matematik Kazanımları": SAMPLE_RECORDS})
+        generator = GraphGenerator()
+
+        streamed = create_graph_data(generator.load_data(path, stream=True))
+        eager = create_graph_data(generator.load_data(path))
+
+        self.assertEqual(streamed, eager)
+        self.assertEqual(len(streamed[1]), 4)
+
+
+class ScoreColorBatchTestCase(SimpleTestCase):
+    """Test cases for the batch score -> color/radius helpers."""
+
+    SCORES = [i / 1000 for i in range(1001)] + [-1, 2, None, "0.3", 0.49999999999999994, 0.5 + 1e-16]
+
+    def test_batch_matches_scalar(self):
+        """Test exact parity with score_to_color and score_to_radius."""
+        self.assertEqual(scores_to_colors(self.SCORES), [score_to_color(s) for s in self.SCORES])
+        self.assertEqual([int(r) for r in scores_to_radii(self.SCORES)],
+                         [score_to_radius(s) for s in self.SCORES])
+
+    def test_nan_matches_scalar(self):
+        """Test that NaN scores map to 0 in both the scalar and the batch path."""
+        scores = [float("nan"), 0.7]
+        self.assertEqual(score_to_color(float("nan")), score_to_color(0))
+        self.assertEqual(scores_to_colors(scores), [score_to_color(s) for s in scores])
+        self.assertEqual([int(r) for r in scores_to_radii(scores)], [score_to_radius(s) for s in scores])
+        self.assertEqual(scores_to_colors(scores + [None]), [score_to_color(s) for s in scores + [None]])
+
+    def test_processor_batch_matches_per_node(self):
+        """Test that bulk processing builds the same nodes as _create_node."""
+        records = SAMPLE_RECORDS + [
+            {"id": f"kx_{i}", "node_type": "kazanım", "parent_id": "alt_a", "basari_puani": i / 37}
+            for i in range(40)
+        ]
+        processor = GraphProcessor()
+        nodes, _ = processor.process_records(iter(records))
+        self.assertEqual(nodes, [processor._create_node(rec) for rec in records])
+        self.assertEqual(CompactGraph.from_records(records).to_nodes(), nodes)
+
+
+class CompactGraphTestCase(SimpleTestCase):
+    """Test cases for the array-backed graph store."""
+
+    def setUp(self):
+        self.nodes, self.links = create_graph_data(SAMPLE_RECORDS)
+
+    def test_round_trip_matches_processor_output(self):
+        """Test that columns reproduce the exact node and link dicts."""
+        for store in (CompactGraph.from_records(iter(SAMPLE_RECORDS)),
+                      CompactGraph.from_graph(self.nodes, self.links)):
+            self.assertEqual(store.to_nodes(), self.nodes)
+            self.assertEqual(store.to_links(), self.links)
+            self.assertEqual(store.link_source.typecode, "i")
+
+    def test_serializer_output_is_identical(self):
+        """Test that NodeSerializer/LinkSerializer see the same data."""
+        store = CompactGraph.from_records(SAMPLE_RECORDS)
+        self.assertEqual(NodeSerializer(store.to_nodes(), many=True).data,
+                         NodeSerializer(self.nodes, many=True).data)
+        self.assertEqual(LinkSerializer(store.to_links(), many=True).data,
+                         LinkSerializer(self.links, many=True).data)
+
+    def test_compact_cache_metadata(self):
+        """Test that a compact cache entry reports the same metadata."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            data_file = os.path.join(tmpdir, "curriculum.json")
+            write_curriculum(data_file, SAMPLE_RECORDS)
+            compact = GraphCache(compact=True).get(data_file)
+            regular = GraphCache().get(data_file)
+
+        self.assertIsNotNone(compact.store)
+        self.assertEqual(compact.metadata, regular.metadata)
+        self.assertEqual(compact.link_types, regular.link_types)
+        self.assertEqual(compact.nodes, regular.nodes)
+
+
+class BinaryFormatTestCase(SimpleTestCase):
+    """Test cases for the binary graph wire format."""
+
+    def test_round_trip(self):
+        """Test that decoding an encoded graph returns the original dicts."""
+        nodes, links = create_graph_data(SAMPLE_RECORDS)
+        data = encode_graph(CompactGraph.from_graph(nodes, links))
+
+        self.assertEqual(data[:4], b"EGRF")
+        self.assertEqual(len(data) % 4, 0)
+        self.assertEqual(decode_graph(data), (nodes, links))
+
+    def test_round_trip_sample_curriculum(self):
+        """Test the round trip on the bundled curriculum file."""
+        from django.conf import settings
+        data_file = settings.CURRICULUM_DIR / "matematik" / "matematik_kazanimlari_124_154.json"
+        nodes, links = create_graph_data(GraphGenerator().load_data(str(data_file)))
+
+        self.assertEqual(decode_graph(encode_graph(CompactGraph.from_graph(nodes, links))), (nodes, links))
+
+    def test_empty_graph(self):
+        """Test that an empty graph encodes and decodes."""
+        self.assertEqual(decode_graph(encode_graph(CompactGraph())), ([], []))
+
+    def test_rejects_foreign_data(self):
+        """Test that data without the magic header is rejected."""
+        with self.assertRaises(ValueError):
+            decode_graph(b"\0" * 32)
+
+
+@skipUnless(layout_available(), "NumPy is not installed")
+class ForceLayoutTestCase(SimpleTestCase):
+    """Test cases for the server-side force layout."""
+
+    def setUp(self):
+        self.graph = CompactGraph.from_records(SAMPLE_RECORDS)
+
+    def test_layout_is_deterministic_and_separates_nodes(self):
+        """Test that positions are reproducible, finite and non-overlapping."""
+        x, y = ForceLayout().run(self.graph)
+        x2, y2 = ForceLayout().run(self.graph)
+
+        self.assertEqual(x.tolist(), x2.tolist())
+        self.assertEqual(y.tolist(), y2.tolist())
+        for i in range(len(self.graph)):
+            for j in range(i + 1, len(self.graph)):
+                distance = ((x[i] - x[j]) ** 2 + (y[i] - y[j]) ** 2) ** 0.5
+                self.assertGreater(distance, self.graph.r[i] + self.graph.r[j])
+
+    def test_barnes_hut_matches_exact_charge(self):
+        """Test that a tiny theta reproduces the exact many-body force."""
+        import numpy as np
+
+        rng = np.random.default_rng(7)
+        x, y = rng.random(300) * 800, rng.random(300) * 800
+        vx, vy = np.zeros(300), np.zeros(300)
+        ForceLayout(theta=0.01)._apply_charge(x, y, vx, vy, 1.0)
+
+        dx = x[None, :] - x[:, None]
+        dist2 = dx ** 2 + (y[None, :] - y[:, None]) ** 2
+        np.fill_diagonal(dist2, np.inf)
+        dist2 = np.where(dist2 < 1, np.sqrt(dist2), dist2)
+        np.testing.assert_allclose(vx, (-1600 * dx / dist2).sum(axis=1), rtol=1e-9, atol=1e-9)
+
+    def test_positions_are_cached_on_graph(self):
+        """Test that the cached graph computes its layout once."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            data_file = os.path.join(tmpdir, "curriculum.json")
+            write_curriculum(data_file, SAMPLE_RECORDS)
+            graph = GraphCache().get(data_file)
+
+        self.assertIs(graph.positions(), graph.positions())
+        nodes = graph.nodes_with_positions()
+        self.assertEqual({"x", "y"} - set(nodes[0]), set())
+        self.assertNotIn("x", graph.nodes[0])
+
+        data = encode_graph(graph.as_compact(), graph.positions())
+        decoded_nodes, _ = decode_graph(data)
+        self.assertAlmostEqual(decoded_nodes[0]["x"], nodes[0]["x"], places=0)
+
+    def test_positions_without_waiting(self):
+        """Test that positions(wait=False) starts the layout in the background once."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            data_file = os.path.join(tmpdir, "curriculum.json")
+            write_curriculum(data_file, SAMPLE_RECORDS)
+            graph = GraphCache().get(data_file)
+
+        self.assertIsNone(graph.positions(wait=False))
+        thread = graph._layout_thread
+        graph.positions(wait=False)
+        self.assertIs(graph._layout_thread, thread)
+        thread.join()
+        self.assertIsNotNone(graph.positions(wait=False))
+        self.assertTrue(graph.is_built("positions"))
+
+    def test_failed_layout_is_retried(self):
+        """Test that a layout that failed in the background is started again after the cooldown."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            data_file = os.path.join(tmpdir, "curriculum.json")
+            write_curriculum(data_file, SAMPLE_RECORDS)
+            graph = GraphCache().get(data_file)
+
+        real_compute_layout = layout.compute_layout
+        calls = []
+
+        def fail_once(compact):
+            calls.append(compact)
+            if len(calls) == 1:
+                raise MemoryError("layout failed")
+            return real_compute_layout(compact)
+
+        with mock.patch.object(layout, "compute_layout", fail_once):
+            with self.assertLogs("src.graph_utils", "ERROR"):
+                self.assertIsNone(graph.positions(wait=False))
+                graph._layout_thread.join()
+            self.assertIsNone(graph._layout_thread)
+            # within the cooldown nothing is started
+            self.assertIsNone(graph.positions(wait=False))
+            self.assertIsNone(graph._layout_thread)
+
+            with mock.patch.object(graph_utils, "LAYOUT_RETRY_DELAY", 0):
+                self.assertIsNone(graph.positions(wait=False))
+            graph._layout_thread.join()
+        self.assertEqual(len(calls), 2)
+        self.assertTrue(graph.is_built("positions"))
+
+
+class HierarchyIndexTestCase(SimpleTestCase):
+    """Test cases for the parent/child adjacency index."""
+
+    def setUp(self):
+        records = SAMPLE_RECORDS + [
+            {"id": "alt_b", "node_type": "alt_grup", "parent_id": "grp_a"},
+            {"id": "kz_3", "node_type": "kazanım", "parent_id": "alt_b"},
+        ]
+        store = CompactGraph.from_records(records)
+        self.index = HierarchyIndex(store.ids, store.link_source, store.link_target)
+        self.ids = store.ids
+
+    def _ids(self, positions):
+        return [self.ids[i] for i in positions]
+
+    def test_subtree_ranges(self):
+        """Test full and depth-limited subtree queries."""
+        grp = self.index.index_of("grp_a")
+        self.assertEqual(self._ids(self.index.subtree(grp)), ["grp_a", "alt_a", "kz_1", "kz_2", "alt_b", "kz_3"])
+        self.assertEqual(self._ids(self.index.subtree(grp, 1)), ["grp_a", "alt_a", "alt_b"])
+        self.assertEqual(self._ids(self.index.subtree(grp, 0)), ["grp_a"])
+        self.assertTrue(self.index.is_ancestor(grp, self.index.index_of("kz_3")))
+        self.assertFalse(self.index.is_ancestor(self.index.index_of("alt_a"), self.index.index_of("kz_3")))
+
+    def test_ancestors(self):
+        """Test that ancestors are returned root first."""
+        self.assertEqual(self._ids(self.index.ancestors(self.index.index_of("kz_3"))),
+                         ["konu_a", "grp_a", "alt_b"])
+        self.assertEqual(self.index.ancestors(self.index.index_of("konu_a")), [])
+
+    def test_cycles_do_not_loop(self):
+        """Test that a parent cycle in bad data still yields finite answers."""
+        index = HierarchyIndex(["a", "b"], [0, 1], [1, 0])
+        self.assertEqual(sorted(index.subtree(0)), [0, 1])
+        self.assertEqual(index.ancestors(0), [1])
+
+
+class LevelOfDetailTestCase(SimpleTestCase):
+    """Test cases for the precomputed cluster aggregates."""
+
+    def setUp(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            data_file = os.path.join(tmpdir, "curriculum.json")
+            write_curriculum(data_file, SAMPLE_RECORDS)
+            self.graph = GraphCache().get(data_file)
+
+    def test_aggregates(self):
+        """Test child counts and mean scores bottom-up."""
+        view = self.graph.lod().view("alt_grup")
+        clusters = {node["id"]: node for node in view["nodes"]}
+
+        self.assertEqual(list(clusters), ["konu_a", "grp_a", "alt_a"])
+        self.assertEqual(clusters["alt_a"]["child_count"], 2)
+        self.assertEqual(clusters["konu_a"]["kazanim_count"], 2)
+        self.assertAlmostEqual(clusters["konu_a"]["mean_score"], 0.525, places=4)
+        self.assertEqual(clusters["konu_a"]["color"], score_to_color(0.525))
+        self.assertEqual(len(view["links"]), 2)
+
+    def test_expand(self):
+        """Test that expanding a visible cluster adds its direct children."""
+        view = self.graph.lod().view("konu", ["konu_a", "grp_a", "kz_1"])
+
+        self.assertEqual([n["id"] for n in view["nodes"]], ["konu_a", "grp_a", "alt_a"])
+        self.assertEqual(view["expanded"], ["konu_a", "grp_a"])
+        self.assertIn("kazanim_count", view["nodes"][2])
+
+    def test_compact_store_matches(self):
+        """Test that compact graphs produce the same aggregates."""
+        compact = CachedGraph(self.graph.path, self.graph.signature, store=self.graph.as_compact())
+        self.assertEqual(compact.lod().view("grup"), self.graph.lod().view("grup"))
+
+
+class CompiledArtifactsTestCase(SimpleTestCase):
+    """Test cases for precompiled curriculum artifacts."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.source_root = os.path.join(self.tmpdir.name, "curriculum")
+        os.makedirs(os.path.join(self.source_root, "matematik"))
+        self.source = os.path.join(self.source_root, "matematik", "sample.json")
+        write_curriculum(self.source, SAMPLE_RECORDS)
+        self.artifacts = CompiledArtifacts(os.path.join(self.tmpdir.name, "compiled"), self.source_root)
+
+    def test_loaded_graph_matches_json_build(self):
+        """Test that both cache modes serve the same graph from an artifact."""
+        target = self.artifacts.compile(self.source, layout=layout_available())
+        self.assertEqual(target.suffix, ARTIFACT_SUFFIX)
+        self.assertTrue(self.artifacts.is_current(self.source))
+        expected = GraphCache().get(self.source)
+
+        for compact in (False, True):
+            graph = GraphCache(compact=compact, artifacts=self.artifacts).get(self.source)
+            self.assertEqual(graph.nodes, expected.nodes)
+            self.assertEqual(graph.links, expected.links)
+            self.assertEqual(graph.metadata, expected.metadata)
+            self.assertEqual(graph.link_types, expected.link_types)
+            self.assertEqual(graph.lod().view("alt_grup"), expected.lod().view("alt_grup"))
+        self.assertEqual(self.artifacts.loads, 2)
+
+    def test_changed_source_falls_back_to_build(self):
+        """Test that an artifact compiled from other content is ignored."""
+        self.artifacts.compile(self.source, layout=False)
+        write_curriculum(self.source, SAMPLE_RECORDS[:-1])
+
+        self.assertFalse(self.artifacts.is_current(self.source))
+        graph = GraphCache(artifacts=self.artifacts).get(self.source)
+        self.assertEqual(graph.metadata["total_nodes"], len(SAMPLE_RECORDS) - 1)
+        self.assertEqual(self.artifacts.loads, 0)
+        self.assertEqual(self.artifacts.rejected, 1)
+
+    def test_command_compiles_stale_curricula(self):
+        """Test compile_curricula --check and compilation of the default curriculum."""
+        compiled = os.path.join(self.tmpdir.name, "out")
+        with override_settings(CURRICULUM_ARTIFACT_DIR=compiled):
+            with self.assertRaises(CommandError):
+                call_command("compile_curricula", "--check", stdout=io.StringIO())
+            out = io.StringIO()
+            call_command("compile_curricula", "--no-layout", stdout=out)
+            self.assertIn("compiled to", out.getvalue())
+            call_command("compile_curricula", "--check", stdout=io.StringIO())
+
+
+class GraphRegistryTestCase(SimpleTestCase):
+    """Test cases for curriculum discovery and lookup."""
+
+    def setUp(self):
+        """Create a curriculum tree with two subjects."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        root = Path(self.tmpdir.name)
+        (root / "matematik").mkdir()
+        (root / "fizik").mkdir()
+        write_curriculum(root / "matematik" / "matematik_9_12.json", SAMPLE_RECORDS)
+        (root / "fizik" / "fizik_9.json").write_text(
+            json.dumps({"Fizik Kazanımları": SAMPLE_RECORDS[:2]}), encoding="utf-8")
+        self.registry = GraphRegistry(cache=GraphCache())
+        self.registry.discover(root, default="matematik")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_discovery(self):
+        """Test that every JSON file is indexed by slug and subject."""
+        slugs = {entry.slug: entry.subject for entry in self.registry.entries()}
+        self.assertEqual(slugs, {"fizik/fizik_9": "fizik", "matematik/matematik_9_12": "matematik"})
+        self.assertEqual(self.registry.default_slug, "matematik/matematik_9_12")
+
+    def test_lookup_by_slug_name_and_subject(self):
+        """Test the accepted curriculum keys and lazy graph building."""
+        self.assertEqual(self.registry.cache.stats()["entries"], 0)
+        self.assertEqual(len(self.registry.get("fizik/fizik_9").nodes), 2)
+        self.assertEqual(self.registry.entry("fizik_9").slug, "fizik/fizik_9")
+        self.assertEqual(self.registry.entry("fizik").slug, "fizik/fizik_9")
+        self.assertEqual(len(self.registry.get().nodes), 5)
+
+    def test_unknown_curriculum(self):
+        """Test that unknown keys raise CurriculumNotFound."""
+        with self.assertRaises(CurriculumNotFound):
+            self.registry.get("kimya")
+
+    def test_preload_and_freeze(self):
+        """Test that every curriculum is loaded and warmed before freezing."""
+        warmed = []
+
+        def warm(graph):
+            warm_graph_payloads(graph)
+            warmed.append(graph)
+
+        self.addCleanup(gc.unfreeze)
+        report = preload_and_freeze(self.registry, warm=warm)
+
+        self.assertEqual(report["curricula"], 2)
+        self.assertEqual(self.registry.cache.stats()["entries"], 2)
+        self.assertEqual(len(warmed), 2)
+        self.assertGreater(report["gc_frozen_objects"], 0)
+        self.assertIn("gzip", warmed[0]._payloads["data:0"]._variants)
+
+
+class EncodedPayloadTestCase(SimpleTestCase):
+    """Test cases for pre-serialized payloads."""
+
+    def setUp(self):
+        self.payload = EncodedPayload.from_data({"status": "success", "data": {"label": "Geometri"}})
+
+    def test_variants_decode_to_body(self):
+        """Test that compressed variants round-trip to the identity body."""
+        self.assertEqual(gzip.decompress(self.payload.encoded("gzip")), self.payload.body)
+        self.assertIs(self.payload.encoded("gzip"), self.payload.encoded("gzip"))
+
+    def test_etag_matching(self):
+        """Test If-None-Match parsing against identity and encoded ETags."""
+        self.assertTrue(self.payload.matches(self.payload.etag()))
+        self.assertTrue(self.payload.matches(f'"other", W/{self.payload.etag("gzip")}'))
+        self.assertTrue(self.payload.matches("*"))
+        self.assertFalse(self.payload.matches('"other"'))
+        self.assertFalse(self.payload.matches(""))
+
+    def test_negotiate(self):
+        """Test Accept-Encoding negotiation."""
+        self.assertEqual(self.payload.negotiate("gzip, deflate"), "gzip")
+        self.assertIsNone(self.payload.negotiate("gzip;q=0"))
+        self.assertIsNone(self.payload.negotiate(""))
+
+    def test_body_matches_json_renderer(self):
+        """Test that bodies are byte-compatible with DRF's JSONRenderer, line separators included."""
+        from rest_framework.renderers import JSONRenderer
+
+        data = {"label": "Sayılar\u2028ve\u2029İşlemler", "values": [1, 2.5, None]}
+        self.assertEqual(encode_json(data), JSONRenderer().render(data))
+
+
+class GraphConditionalGetTestCase(TestCase):
+    """Test cases for ETag / 304 handling on the graph endpoints."""
+
+    def setUp(self):
+        self.client = Client()
+        user = User.objects.create_user(email="student@example.com", password="Kazanim-2024!", name="Öğrenci",
+                                        is_active=True)
+        self.client.force_login(user)
+
+    def test_graph_data_not_modified(self):
+        """Test that a matching If-None-Match returns 304 without a body."""
+        url = reverse('artifacts:graph-data')
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ETag', response)
+        self.assertEqual(response.json()['status'], 'success')
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_graph_links_gzip(self):
+        """Test that gzip-capable clients receive the pre-compressed body."""
+        url = reverse('artifacts:graph-links')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        data = json.loads(gzip.decompress(response.content))
+        self.assertEqual(data['data']['count'], len(data['data']['links']))
+
+    def test_unknown_curriculum_returns_404(self):
+        """Test that selecting an unknown curriculum returns 404."""
+        response = self.client.get(reverse('artifacts:graph-data'), {'curriculum': 'yok'})
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()['status'], 'error')
+
+    def test_curricula_endpoint(self):
+        """Test that discovered curricula are listed with the default slug."""
+        response = self.client.get(reverse('artifacts:graph-curricula'))
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertIn(data['default'], [c['slug'] for c in data['curricula']])
+
+    def test_graph_data_binary_format(self):
+        """Test that ?format=binary and the Accept header select the binary layout."""
+        url = reverse('artifacts:graph-data')
+        json_data = self.client.get(url).json()['data']
+
+        for response in (self.client.get(url, {'format': 'binary'}),
+                         self.client.get(url, HTTP_ACCEPT=MEDIA_TYPE)):
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], MEDIA_TYPE)
+            nodes, links = decode_graph(response.content)
+            self.assertEqual(nodes, json_data['nodes'])
+            self.assertEqual(links, json_data['links'])
+
+    @skipUnless(layout_available(), "NumPy is not installed")
+    def test_graph_data_with_layout(self):
+        """Test that ?layout=1 adds positions once the background layout is done."""
+        graph_cache.clear()
+        response = self.client.get(reverse('artifacts:graph-data'), {'layout': '1'})
+        self.assertEqual(response.status_code, 200)
+        # computed in the background; meanwhile the plain body, which the client lays out itself
+        self.assertEqual(response.content, self.client.get(reverse('artifacts:graph-data')).content)
+
+        graph = graph_registry.get()
+        graph._layout_thread.join()
+        response = self.client.get(reverse('artifacts:graph-data'), {'layout': '1'})
+        self.assertEqual(response.status_code, 200)
+        for node in response.json()['data']['nodes']:
+            self.assertIsInstance(node['x'], float)
+            self.assertIsInstance(node['y'], float)
+
+    def test_graph_subtree_endpoint(self):
+        """Test the subtree endpoint against the full link list."""
+        links = self.client.get(reverse('artifacts:graph-links')).json()['data']['links']
+        root = links[0]['source']
+        children = {l['target'] for l in links if l['source'] == root}
+
+        response = self.client.get(reverse('artifacts:graph-subtree', args=[root]), {'depth': 1})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual(data['nodes'][0]['id'], root)
+        self.assertEqual({n['id'] for n in data['nodes'][1:]}, children)
+        self.assertEqual(len(data['links']), len(children))
+
+        response = self.client.get(reverse('artifacts:graph-subtree', args=[root]), {'depth': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_graph_ancestors_endpoint(self):
+        """Test the ancestors endpoint and unknown node ids."""
+        links = self.client.get(reverse('artifacts:graph-links')).json()['data']['links']
+        leaf = links[-1]['target']
+
+        response = self.client.get(reverse('artifacts:graph-ancestors', args=[leaf]))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual(data['node']['id'], leaf)
+        self.assertEqual(data['ancestors'][0]['type'], 'konu')
+        self.assertEqual(data['count'], len(data['links']))
+
+        response = self.client.get(reverse('artifacts:graph-ancestors', args=['yok']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_graph_lod_endpoint(self):
+        """Test the level-of-detail endpoint levels and validation."""
+        url = reverse('artifacts:graph-lod')
+        konu = self.client.get(url).json()['data']
+        grup = self.client.get(url, {'level': 'grup'}).json()['data']
+
+        self.assertTrue(all(n['type'] == 'konu' for n in konu['nodes']))
+        self.assertGreater(grup['count'], konu['count'])
+        # orphan kazanım nodes (no konu above them) are not counted in any cluster
+        self.assertLessEqual(sum(n['kazanim_count'] for n in konu['nodes']), 109)
+        self.assertGreater(sum(n['kazanim_count'] for n in konu['nodes']), 0)
+
+        expanded = self.client.get(url, {'expand': konu['nodes'][0]['id']}).json()['data']
+        self.assertEqual(expanded['count'], konu['count'] + konu['nodes'][0]['child_count'])
+
+        self.assertEqual(self.client.get(url, {'level': 'kazanım'}).status_code, 400)
+
+    def test_worker_memory_report(self):
+        """Test that the memory report is staff-only and lists the process."""
+        url = reverse('artifacts:graph-memory')
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        staff = User.objects.create_user(email="staff@example.com", password="Kazanim-2024!", name="Personel",
+                                         is_active=True, is_staff=True)
+        self.client.force_login(staff)
+        data = self.client.get(url).json()['data']
+        self.assertEqual(data['pid'], os.getpid())
+        self.assertIn('cache', data)
+
+    def test_graph_nodes_unknown_type(self):
+        """Test that filtering by an unknown type returns an empty list."""
+        response = self.client.get(reverse('artifacts:graph-nodes'), {'type': 'yok'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data'], {'nodes': [], 'count': 0})
+
+
+class GraphMasteryTestCase(TestCase):
+    """Test cases for the per-user mastery overlay."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(email="mastery@example.com", password="Kazanim-2024!", name="Öğrenci",
+                                             is_active=True)
+        self.client.force_login(self.user)
+        self.url = reverse('artifacts:graph-mastery')
+        nodes = self.client.get(reverse('artifacts:graph-nodes')).json()['data']['nodes']
+        self.node_count = len(nodes)
+        self.positions = {node['id']: i for i, node in enumerate(nodes)}
+        self.kazanim = [node['id'] for node in nodes if node['type'] == 'kazanım'][:3]
+
+    def put(self, scores):
+        return self.client.put(self.url, json.dumps({'scores': scores}), content_type='application/json')
+
+    def test_overlay_aligned_with_node_order(self):
+        """Test that saved scores come back as positions with derived colors."""
+        first, second, third = self.kazanim
+        self.assertEqual(self.put({second: 0.9, first: 0.2}).status_code, 200)
+        self.put({first: 0.4, third: 1})
+
+        data = self.client.get(self.url).json()['data']
+        expected = sorted([(self.positions[first], 0.4), (self.positions[second], 0.9), (self.positions[third], 1.0)])
+        self.assertEqual(data['index'], [i for i, _ in expected])
+        self.assertEqual(data['scores'], [s for _, s in expected])
+        self.assertEqual(data['colors'], [score_to_color(s) for _, s in expected])
+        self.assertEqual(data['r'], [score_to_radius(s) for _, s in expected])
+        self.assertEqual(data['node_count'], self.node_count)
+        self.assertEqual(NodeMastery.objects.filter(user=self.user).count(), 3)
+
+    def test_overlay_is_per_user(self):
+        """Test that another user's scores are not included."""
+        other = User.objects.create_user(email="other@example.com", password="Kazanim-2024!", name="Diğer",
+                                         is_active=True)
+        NodeMastery.objects.upsert([{"user_id": other.pk, "curriculum": settings.DEFAULT_CURRICULUM,
+                                     "node_id": self.kazanim[0], "score": 0.7}])
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()['data']['index'], [])
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_invalid_scores(self):
+        """Test that malformed score maps are rejected."""
+        self.assertEqual(self.put({self.kazanim[0]: 1.5}).status_code, 400)
+        self.assertEqual(self.put([0.5]).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'curriculum': 'missing'}).status_code, 404)
+
+    def test_unknown_node_ids(self):
+        """Test that ids outside the curriculum (oversized ones included) are rejected with nothing saved."""
+        for node_id in ('missing-node', 'x' * 300):
+            response = self.put({self.kazanim[0]: 0.5, node_id: 0.5})
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()['unknown'], [node_id])
+        self.assertFalse(NodeMastery.objects.filter(user=self.user).exists())
+
+    def test_overlay_uses_fast_compression(self):
+        """Test that the per-user overlay is not compressed at the maximum level."""
+        self.put({self.kazanim[0]: 0.5})
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        body = self.client.get(self.url).content
+        self.assertEqual(response.content, gzip.compress(body, compresslevel=1, mtime=0))
+
+
+class ExamResultIngestTestCase(TestCase):
+    """Test cases for bulk exam result ingestion."""
+
+    def setUp(self):
+        self.student = User.objects.create_user(email="ogrenci@example.com", password="Kazanim-2024!", name="Öğrenci",
+                                                is_active=True)
+        self.staff = User.objects.create_user(email="ogretmen@example.com", password="Kazanim-2024!", name="Öğretmen",
+                                              is_active=True, is_staff=True)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        Path(path).write_text(content, encoding="utf-8")
+        return path
+
+    def scores(self):
+        return NodeMastery.objects.scores_for(self.student, settings.DEFAULT_CURRICULUM)
+
+    def test_aggregator_batches_match_totals(self):
+        """Test that reductions across several batches sum correctly."""
+        aggregator = ResultAggregator(batch_size=3)
+        for i in range(10):
+            aggregator.add("s1", "k1", i % 2)
+            aggregator.add("s2", "k1", 1, total=2)
+        rates = {(s, k): (r, t) for s, k, r, t in aggregator.rates()}
+        self.assertEqual(rates, {("s1", "k1"): (0.5, 10.0), ("s2", "k1"): (0.5, 20.0)})
+
+    def test_command_with_answer_key(self):
+        """Test CSV ingestion mapping questions to kazanım codes."""
+        key = self.write("key.csv", "test,question,kazanim_kodu\nTYT,1,9.1.1.1\nTYT,2,9.1.1.2\n")
+        results = self.write("results.csv", "\n".join([
+            "email,test,question,correct",
+            "ogrenci@example.com,TYT,1,D",
+            "ogrenci@example.com,TYT,1,Y",
+            "ogrenci@example.com,TYT,2,1",
+            "missing@example.com,TYT,2,1",
+            "ogrenci@example.com,TYT,99,1",
+            "ogrenci@example.com,TYT,2,?",
+        ]) + "\n")
+        out = io.StringIO()
+        call_command("ingest_results", results, answer_key=key, stdout=out)
+
+        self.assertEqual(self.scores(), {"kznm_9_1_1_1": 0.5, "kznm_9_1_1_2": 1.0})
+        self.assertIn("2 scores for 1 students from 6 rows", out.getvalue())
+        self.assertIn("1 unknown students, 1 unmapped, 1 invalid", out.getvalue())
+
+    def test_upload_api_jsonl(self):
+        """Test the staff-only upload endpoint with pre-aggregated JSONL rows."""
+        rows = [{"email": "ogrenci@example.com", "kazanim_kodu": "9.1.1.1", "correct": 3, "total": 4}]
+        upload = SimpleUploadedFile("results.jsonl", "\n".join(json.dumps(r) for r in rows).encode("utf-8"))
+        url = reverse('artifacts:graph-results')
+
+        self.client.force_login(self.student)
+        self.assertEqual(self.client.post(url, {'file': upload}).status_code, 403)
+
+        self.client.force_login(self.staff)
+        upload.seek(0)
+        response = self.client.post(url, {'file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['scores_written'], 1)
+        self.assertEqual(self.scores(), {"kznm_9_1_1_1": 0.75})
+        self.assertEqual(self.client.post(url, {}).status_code, 400)
+
+    def test_malformed_rows_reported_with_line_numbers(self):
+        """Test that non-object rows and rows without "correct" are row errors, not 500s or wrong answers."""
+        lines = [
+            json.dumps({"email": "ogrenci@example.com", "kazanim_kodu": "9.1.1.1", "correct": 1}),
+            "[1, 2]",
+            "",
+            '"x"',
+            json.dumps({"email": "ogrenci@example.com", "kazanim_kodu": "9.1.1.1"}),
+        ]
+        upload = SimpleUploadedFile("results.jsonl", "\n".join(lines).encode("utf-8"))
+        self.client.force_login(self.staff)
+        response = self.client.post(reverse('artifacts:graph-results'), {'file': upload})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        self.assertEqual(data['invalid_rows'], 3)
+        self.assertEqual([e['line'] for e in data['errors']], [2, 4, 5])
+        self.assertEqual(self.scores(), {"kznm_9_1_1_1": 1.0})
+
+
+class AsyncGraphViewsTestCase(TransactionTestCase):
+    """Test cases for the ASGI graph views and the bounded blocking pools."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="async@example.com", password="Kazanim-2024!", name="Öğrenci",
+                                             is_active=True)
+        self.token = Token.objects.create(user=self.user)
+        self.factory = AsyncRequestFactory()
+
+    def get(self, view_class, path, token=True, **kwargs):
+        headers = {"Authorization": f"Token {self.token.key}"} if token else {}
+        request = self.factory.get(path, headers=headers)
+        return async_to_sync(view_class.as_view())(request, **kwargs)
+
+    def test_data_matches_sync_view(self):
+        """Test that the async data view serves the same representation."""
+        response = self.get(async_views.AsyncGraphDataView, "/api/graph/data/")
+        sync_response = self.client.get(reverse('artifacts:graph-data'), HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], sync_response["ETag"])
+        self.assertEqual(response.content, sync_response.content)
+
+    def test_authentication_and_errors(self):
+        """Test 401 without a token and the repo's error responses."""
+        self.assertEqual(self.get(async_views.AsyncGraphStatsView, "/api/graph/stats/", token=False).status_code, 401)
+        self.assertEqual(self.get(async_views.AsyncGraphSubtreeView, "/api/graph/subtree/x/?depth=-1",
+                                  node_id="x").status_code, 400)
+        self.assertEqual(self.get(async_views.AsyncGraphAncestorsView, "/api/graph/ancestors/missing/",
+                                  node_id="missing").status_code, 404)
+        response = self.get(async_views.AsyncGraphLinksView, "/api/graph/links/?curriculum=missing")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(json.loads(response.content)["status"], "error")
+
+    def test_mastery_overlay_reads_orm_in_pool(self):
+        """Test the async mastery view against scores saved through the ORM."""
+        self.get(async_views.AsyncGraphDataView, "/api/graph/data/")
+        node_id = next(n["id"] for n in graph_registry.get().nodes if n["type"] == "kazanım")
+        NodeMastery.objects.upsert([{"user_id": self.user.pk, "curriculum": settings.DEFAULT_CURRICULUM,
+                                     "node_id": node_id, "score": 0.6}])
+
+        data = json.loads(self.get(async_views.AsyncGraphMasteryView, "/api/graph/mastery/").content)["data"]
+        self.assertEqual(data["scores"], [0.6])
+
+    def test_profiling_gated_on_token_user(self):
+        """Test that the async profiling check resolves the token user off the loop."""
+        staff = User.objects.create_user(email="profil@example.com", password="Kazanim-2024!", name="Deniz",
+                                         is_active=True, is_staff=True)
+
+        async def anonymous():
+            return AnonymousUser()
+
+        for token, expected in ((self.token, False), (Token.objects.create(user=staff), True)):
+            request = self.factory.get("/api/graph/stats/?profile=1", headers={"Authorization": f"Token {token.key}"})
+            request.auser = anonymous
+            self.assertEqual(async_to_sync(ProfilingMiddleware.awanted)(request), expected)
+
+    def test_slow_blocking_calls_do_not_stall_graph_reads(self):
+        """Test that a saturated default pool leaves the graph views responsive."""
+        view = async_views.AsyncGraphNodesView.as_view()
+        headers = {"Authorization": f"Token {self.token.key}"}
+        async_to_sync(view)(self.factory.get("/api/graph/nodes/", headers=headers))
+
+        async def scenario():
+            slow = [asyncio.ensure_future(run_blocking(time.sleep, 0.5)) for _ in range(32)]
+            start = time.monotonic()
+            response = await view(self.factory.get("/api/graph/nodes/", headers=headers))
+            elapsed = time.monotonic() - start
+            await asyncio.gather(*slow)
+            return response, elapsed
+
+        response, elapsed = async_to_sync(scenario)()
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(elapsed, 0.4)
+
+
+class GraphBenchmarkTestCase(TestCase):
+    """Test cases for the synthetic curriculum generator and the benchmark suite."""
+
+    def test_synthetic_curriculum(self):
+        """Test that generated curricula are deterministic, exact in size and a valid hierarchy."""
+        records = list(iter_synthetic_records(2000, seed=7))
+        self.assertEqual(records, list(iter_synthetic_records(2000, seed=7)))
+        self.assertNotEqual(records, list(iter_synthetic_records(2000, seed=8)))
+        self.assertEqual(len(records), 2000)
+        self.assertEqual(parse_size("10k"), 10000)
+        self.assertEqual(parse_size("1m"), 1000000)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_synthetic_curriculum(Path(tmp) / "synthetic.json", 2000, seed=7)
+            self.assertEqual(load_curriculum_data(str(path)), records)
+            nodes, links = GraphProcessor().process_records(records)
+
+        types = {node["type"] for node in nodes}
+        self.assertEqual(types, {"konu", "grup", "alt_grup", "kazanım"})
+        # every record except the konu roots hangs under a parent
+        roots = sum(1 for node in nodes if node["type"] == "konu")
+        self.assertEqual(len(links), len(nodes) - roots)
+
+    def test_compare_results(self):
+        """Test that only slowdowns beyond the threshold and the noise floor count as regressions."""
+        def results(**medians):
+            return {"results": {"1k": {"cases": {k: {"median": v} for k, v in medians.items()}}}}
+
+        baseline = results(load=0.100, view=0.0010, build=0.200)
+        current = results(load=0.140, view=0.0020, build=0.210, new=1.0)
+        regressions = compare_results(current, baseline, threshold=0.25)
+        self.assertEqual([r["case"] for r in regressions], ["load"])
+        self.assertAlmostEqual(regressions[0]["change"], 0.4)
+        self.assertEqual(compare_results(current, baseline, threshold=0.5), [])
+
+    def test_benchmark_command(self):
+        """Test a small benchmark run end to end, including the baseline check."""
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / "baseline.json"
+            call_command("benchmark_graph", "--sizes", "2000", "--repeat", "1", "--output", str(output),
+                         stdout=io.StringIO(), stderr=io.StringIO())
+            baseline = json.loads(output.read_text(encoding="utf-8"))
+
+            cases = baseline["results"]["2000"]["cases"]
+            for name in ("load_curriculum_data", "process_records", "render_graph_html", "graph_build",
+                         "view:graph-data", "view:graph-data-layout", "view:graph-subtree", "view:graph-mastery"):
+                self.assertIn(name, cases)
+            self.assertEqual(baseline["results"]["2000"]["records"], 2000)
+            # the registry is restored afterwards
+            self.assertEqual(graph_registry.default_slug, settings.DEFAULT_CURRICULUM)
+
+            for case in cases.values():
+                case["median"] /= 100
+            output.write_text(json.dumps(baseline), encoding="utf-8")
+            with self.assertRaises(CommandError):
+                call_command("benchmark_graph", "--sizes", "2000", "--repeat", "1", "--no-views",
+                             "--baseline", str(output), stdout=io.StringIO(), stderr=io.StringIO())
+
+
+@override_settings(SERVER_TIMING=True)
+class ServerTimingTestCase(TestCase):
+    """Test cases for per-request phase timings."""
+
+    def setUp(self):
+        graph_cache.clear()
+        self.client = Client()
+        user = User.objects.create_user(email="zaman@example.com", password="Kazanim-2024!", name="Deniz",
+                                        is_active=True)
+        self.client.force_login(user)
+
+    @staticmethod
+    def phases(response):
+        return {metric.split(";")[0] for metric in response["Server-Timing"].split(", ")}
+
+    def test_graph_build_phases(self):
+        """Test that a cold /api/graph/data/ reports every build phase, in the header and the log."""
+        with self.assertLogs("backend.timing", "INFO") as logs:
+            response = self.client.get(reverse("artifacts:graph-data"), HTTP_ACCEPT_ENCODING="gzip",
+                                       HTTP_X_REQUEST_ID="req-42")
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual({"read", "parse", "nodes", "links", "metadata", "serialize", "encode", "compress",
+                              "total"}, self.phases(response))
+        self.assertEqual(response["X-Request-ID"], "req-42")
+
+        line = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(line["request_id"], "req-42")
+        self.assertEqual(line["curriculum"], settings.DEFAULT_CURRICULUM)
+        metadata = graph_registry.get().metadata
+        self.assertEqual((line["nodes"], line["links"]), (metadata["total_nodes"], metadata["total_links"]))
+        self.assertEqual(line["graph_cache"], "miss")
+        self.assertEqual(line["bytes"], len(response.content))
+        self.assertEqual(line["content_encoding"], "gzip")
+
+        # warm: no build phases, DRF rendering of non-payload views is timed
+        response = self.client.get(reverse("artifacts:graph-stats"))
+        self.assertNotIn("parse", self.phases(response))
+        self.assertIn("render", self.phases(response))
+        self.assertRegex(response["X-Request-ID"], r"^[0-9a-f]{32}$")
+
+    @override_settings(SERVER_TIMING=False)
+    def test_disabled(self):
+        """Test that without SERVER_TIMING nothing is collected."""
+        response = Client().get(reverse("artifacts:graph-curricula"))
+        self.assertNotIn("Server-Timing", response)
+        self.assertIs(phase("parse"), phase("nodes"))
+
+        with collecting() as timer:
+            with phase("parse"):
+                pass
+            with phase("parse"):
+                pass
+        self.assertEqual(list(timer.phases), ["parse"])
+        self.assertIs(phase("parse"), phase("nodes"))
+
+
+class MetricsTestCase(TestCase):
+    """Test cases for the Prometheus metrics registry and /metrics."""
+
+    def setUp(self):
+        graph_cache.clear()
+        registry.clear()
+        self.client = Client()
+        self.staff = User.objects.create_user(email="olcum@example.com", password="Kazanim-2024!", name="Deniz",
+                                              is_active=True, is_staff=True)
+
+    @staticmethod
+    def sample(text, line_prefix):
+        for line in text.splitlines():
+            if line.startswith(line_prefix + " "):
+                return float(line.rsplit(" ", 1)[1])
+        return None
+
+    def test_exposition_format(self):
+        """Test counters, gauges and cumulative histogram buckets in the text format."""
+        local = Registry()
+        local.counter("t_requests_total", "Requests", ["view"]).inc(view='a"b')
+        local.gauge("t_nodes", "Nodes").set(188)
+        histogram = local.histogram("t_seconds", "Latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value)
+        text = render(local.collect())
+
+        self.assertIn("# TYPE t_requests_total counter", text)
+        self.assertIn('t_requests_total{view="a\\"b"} 1', text)
+        self.assertIn("t_nodes 188", text)
+        self.assertIn('t_seconds_bucket{le="0.1"} 2', text)
+        self.assertIn('t_seconds_bucket{le="1"} 3', text)
+        self.assertIn('t_seconds_bucket{le="+Inf"} 4', text)
+        self.assertIn("t_seconds_count 4", text)
+        self.assertAlmostEqual(self.sample(text, "t_seconds_sum"), 3.65)
+
+    def test_track_counts_growth_only(self):
+        """Test that tracked totals add their growth and survive a reset of the source."""
+        counter = Registry().counter("t_hits_total", "Hits")
+        counter.track(5)
+        counter.track(8)
+        counter.track(2)  # the source was cleared
+        self.assertEqual(counter.dump()["samples"][()], 10)
+
+    def test_aggregate_across_processes(self):
+        """Test that process files are merged and exited processes are archived without their gauges."""
+        def snapshot(requests, nodes, latency):
+            local = Registry()
+            local.counter("t_requests_total", "Requests").inc(requests)
+            local.gauge("t_nodes", "Nodes", ["curriculum"], mode="max").set(nodes, curriculum="mat")
+            local.histogram("t_seconds", "Latency", buckets=(1.0,)).observe(latency)
+            return local.collect()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = Path(tmp)
+            write_json(directory / "web-1.json", snapshot(3, 100, 0.5))
+            write_json(directory / "web-2.json", snapshot(4, 120, 2.0))
+            write_json(directory / "web-3.json", snapshot(5, 999, 0.5))
+            old = time.time() - 600
+            os.utime(directory / "web-3.json", (old, old))
+
+            text = render(aggregate(directory, stale_after=60))
+            self.assertEqual(self.sample(text, "t_requests_total"), 12)
+            self.assertEqual(self.sample(text, 't_nodes{curriculum="mat"}'), 120)
+            self.assertEqual(self.sample(text, 't_seconds_bucket{le="1"}'), 2)
+            self.assertEqual(self.sample(text, "t_seconds_count"), 3)
+            self.assertFalse((directory / "web-3.json").exists())
+            self.assertTrue((directory / "archive.json").exists())
+
+            # the archived process is counted exactly once on the next scrape
+            self.assertEqual(render(aggregate(directory, stale_after=60)), text)
+
+    def test_metrics_view(self):
+        """Test per-view request histograms and per-curriculum graph gauges at /metrics."""
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(reverse("artifacts:graph-data")).status_code, 200)
+
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        text = response.content.decode()
+        labels = 'view="artifacts:graph-data",method="GET"'
+        self.assertEqual(self.sample(text, f"edugraph_http_request_duration_seconds_count{{{labels}}}"), 1)
+        self.assertEqual(self.sample(text, f'edugraph_http_requests_total{{{labels},status="200"}}'), 1)
+        self.assertGreater(self.sample(text, 'edugraph_db_queries_total{view="artifacts:graph-data"}'), 0)
+        self.assertEqual(self.sample(text, 'edugraph_graph_build_seconds_count{source="json"}'), 1)
+
+        metadata = graph_registry.get().metadata
+        curriculum = f'{{curriculum="{settings.DEFAULT_CURRICULUM}"}}'
+        self.assertEqual(self.sample(text, "edugraph_graph_nodes" + curriculum), metadata["total_nodes"])
+        self.assertEqual(self.sample(text, "edugraph_graph_links" + curriculum), metadata["total_links"])
+        self.assertGreater(self.sample(text, "edugraph_graph_bytes" + curriculum), 0)
+        self.assertEqual(self.sample(text, 'edugraph_cache_requests_total{cache="graph",result="miss"}'), 1)
+
+    def test_metrics_view_with_shared_directory(self):
+        """Test that /metrics includes the snapshots other processes wrote to METRICS_DIR."""
+        other = Registry()
+        other.counter("edugraph_http_requests_total", "Requests handled", ["view", "method", "status"]).inc(
+            7, view="artifacts:graph-data", method="GET", status="200")
+        self.client.force_login(self.staff)
+        with tempfile.TemporaryDirectory() as tmp, override_settings(METRICS_DIR=tmp):
+            write_json(Path(tmp) / "other-1.json", other.collect())
+            self.client.get(reverse("artifacts:graph-data"))
+            text = self.client.get(reverse("metrics")).content.decode()
+        labels = 'view="artifacts:graph-data",method="GET",status="200"'
+        self.assertEqual(self.sample(text, f"edugraph_http_requests_total{{{labels}}}"), 8)
+
+    @override_settings(METRICS_TOKEN="scrape-secret")
+    def test_metrics_permission(self):
+        """Test that /metrics needs a staff user or the scrape token."""
+        self.assertIn(self.client.get(reverse("metrics")).status_code, (401, 403))
+        response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer wrong")
+        self.assertIn(response.status_code, (401, 403))
+        response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer scrape-secret")
+        self.assertEqual(response.status_code, 200)
+
+        student = User.objects.create_user(email="ogrenci@example.com", password="Kazanim-2024!", name="Ece",
+                                           is_active=True)
+        self.client.force_login(student)
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+
+
+class RequestProfilingTestCase(TestCase):
+    """Test cases for staff-only request profiles."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        settings_override = override_settings(PROFILE_DIR=self.tmp.name, PROFILE_KEEP=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = Client()
+        staff = User.objects.create_user(email="profil@example.com", password="Kazanim-2024!", name="Deniz",
+                                         is_active=True, is_staff=True)
+        self.staff_auth = f"Token {Token.objects.create(user=staff).key}"
+
+    def test_staff_profile_is_stored(self):
+        """Test that a flagged staff request stores folded stacks and its SQL statements."""
+        response = self.client.get(reverse("artifacts:graph-mastery") + "?profile=1",
+                                   HTTP_AUTHORIZATION=self.staff_auth)
+        self.assertEqual(response.status_code, 200)
+        profile_id = response["X-Profile-ID"]
+
+        profile = self.client.get(reverse("profile-detail", args=[profile_id]),
+                                  HTTP_AUTHORIZATION=self.staff_auth).json()
+        self.assertEqual((profile["method"], profile["status"], profile["user"]), ("GET", 200, "profil@example.com"))
+        self.assertGreaterEqual(profile["queries"]["count"], 1)
+        self.assertTrue(any(NodeMastery._meta.db_table in q["sql"] for q in profile["queries"]["statements"]))
+        self.assertEqual(sum(profile["stacks"].values()), profile["samples"])
+
+        text = self.client.get(reverse("profile-detail", args=[profile_id]) + "?output=folded",
+                               HTTP_AUTHORIZATION=self.staff_auth).content.decode()
+        for line in text.splitlines():
+            self.assertRegex(line, r"^\S.* \d+$")
+
+    def test_ring_buffer_keeps_newest(self):
+        """Test that only the newest PROFILE_KEEP profiles are kept, listed newest first."""
+        ids = [self.client.get(reverse("artifacts:graph-stats"), HTTP_AUTHORIZATION=self.staff_auth,
+                               HTTP_X_PROFILE="1")["X-Profile-ID"] for _ in range(3)]
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), [f"{i}.json" for i in ids[1:]])
+        listed = self.client.get(reverse("profile-list"), HTTP_AUTHORIZATION=self.staff_auth).json()
+        self.assertEqual([p["id"] for p in listed], ids[:0:-1])
+        self.assertNotIn("stacks", listed[0])
+        response = self.client.get(reverse("profile-detail", args=[ids[0]]), HTTP_AUTHORIZATION=self.staff_auth)
+        self.assertEqual(response.status_code, 404)
+
+    def test_non_staff_requests_are_not_profiled(self):
+        """Test that the flag is ignored for students, who cannot read profiles either."""
+        student = User.objects.create_user(email="ogrenci@example.com", password="Kazanim-2024!", name="Ece",
+                                           is_active=True)
+        auth = f"Token {Token.objects.create(user=student).key}"
+        response = self.client.get(reverse("artifacts:graph-stats"), HTTP_AUTHORIZATION=auth, HTTP_X_PROFILE="1")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("X-Profile-ID"))
+        self.assertEqual(os.listdir(self.tmp.name), [])
+        self.assertEqual(self.client.get(reverse("profile-list"), HTTP_AUTHORIZATION=auth).status_code, 403)
+
+        # no flag: nothing stored for staff either
+        self.assertFalse(self.client.get(reverse("artifacts:graph-stats"),
+                                         HTTP_AUTHORIZATION=self.staff_auth).has_header("X-Profile-ID"))
+
+    def test_sampler_gated_on_token_user(self):
+        """Test that the staff check happens before profiling starts, so no sampler runs for others."""
+        student = User.objects.create_user(email="ogrenci@example.com", password="Kazanim-2024!", name="Ece",
+                                           is_active=True)
+        student_auth = f"Token {Token.objects.create(user=student).key}"
+        for auth, expected in ((self.staff_auth, True), (student_auth, False), ("Token nope", False)):
+            request = RequestFactory().get("/api/graph/stats/?profile=1", HTTP_AUTHORIZATION=auth)
+            request.user = AnonymousUser()
+            self.assertEqual(ProfilingMiddleware.wanted(request), expected, auth)
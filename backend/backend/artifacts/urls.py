@@ -1,17 +1,62 @@
 # -*- coding: utf-8 -*-
 """
 URL configuration for the artifacts (graph) API.
+
+With settings.ASYNC_VIEWS (set by backend/asgi.py) the read endpoints are
+served by the async views in async_views.py and the remaining views run in
+a bounded thread pool; the URLs are the same in both modes.
 """
 
+from django.conf import settings
 from django.urls import path
+
+from backend.common.executor import pooled_view
 from . import views
 
 app_name = 'artifacts'
 
+if settings.ASYNC_VIEWS:
+    from . import async_views
+
+    graph_views = {
+        'graph-data': async_views.AsyncGraphDataView.as_view(),
+        'graph-nodes': async_views.AsyncGraphNodesView.as_view(),
+        'graph-links': async_views.AsyncGraphLinksView.as_view(),
+        'graph-stats': async_views.AsyncGraphStatsView.as_view(),
+        'graph-curricula': async_views.AsyncCurriculumListView.as_view(),
+        'graph-subtree': async_views.AsyncGraphSubtreeView.as_view(),
+        'graph-ancestors': async_views.AsyncGraphAncestorsView.as_view(),
+        'graph-lod': async_views.AsyncGraphLevelOfDetailView.as_view(),
+        'graph-mastery': async_views.AsyncGraphMasteryView.as_view(),
+        'graph-results': pooled_view(views.ExamResultUploadAPIView.as_view()),
+        'graph-memory': pooled_view(views.WorkerMemoryAPIView.as_view()),
+    }
+else:
+    graph_views = {
+        'graph-data': views.GraphDataAPIView.as_view(),
+        'graph-nodes': views.GraphNodesAPIView.as_view(),
+        'graph-links': views.GraphLinksAPIView.as_view(),
+        'graph-stats': views.GraphStatsAPIView.as_view(),
+        'graph-curricula': views.CurriculumListAPIView.as_view(),
+        'graph-subtree': views.GraphSubtreeAPIView.as_view(),
+        'graph-ancestors': views.GraphAncestorsAPIView.as_view(),
+        'graph-lod': views.GraphLevelOfDetailAPIView.as_view(),
+        'graph-mastery': views.GraphMasteryAPIView.as_view(),
+        'graph-results': views.ExamResultUploadAPIView.as_view(),
+        'graph-memory': views.WorkerMemoryAPIView.as_view(),
+    }
+
 urlpatterns = [
     # API endpoints
-    path('graph/data/', views.GraphDataAPIView.as_view(), name='graph-data'),
-    path('graph/nodes/', views.GraphNodesAPIView.as_view(), name='graph-nodes'),
-    path('graph/links/', views.GraphLinksAPIView.as_view(), name='graph-links'),
-    path('graph/stats/', views.GraphStatsAPIView.as_view(), name='graph-stats'),
+    path('graph/data/', graph_views['graph-data'], name='graph-data'),
+    path('graph/nodes/', graph_views['graph-nodes'], name='graph-nodes'),
+    path('graph/links/', graph_views['graph-links'], name='graph-links'),
+    path('graph/stats/', graph_views['graph-stats'], name='graph-stats'),
+    path('graph/curricula/', graph_views['graph-curricula'], name='graph-curricula'),
+    path('graph/subtree/<str:node_id>/', graph_views['graph-subtree'], name='graph-subtree'),
+    path('graph/ancestors/<str:node_id>/', graph_views['graph-ancestors'], name='graph-ancestors'),
+    path('graph/lod/', graph_views['graph-lod'], name='graph-lod'),
+    path('graph/mastery/', graph_views['graph-mastery'], name='graph-mastery'),
+    path('graph/results/', graph_views['graph-results'], name='graph-results'),
+    path('graph/memory/', graph_views['graph-memory'], name='graph-memory'),
 ]
@@ -7,12 +7,224 @@ Note: Legacy Django templates under artifacts/templates are deprecated and unuse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.settings import api_settings
+from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-from django.conf import settings
+
+from backend.artifacts.ingest import ingest_results
+from backend.artifacts.models import NodeMastery
+from backend.artifacts.renderers import GraphBinaryRenderer
+from backend.common.http import payload_response
 
 # Import from the top-level src package mounted into the container
-from src import get_graph_data
+from src import CurriculumNotFound, graph_cache, graph_registry
+from src.utils.binary_format import MEDIA_TYPE, encode_graph
+from src.utils.lod import LOD_LEVELS
+from src.utils.payload import EncodedPayload
+from src.serving import memory_report
+from src.utils.results import iter_numbered_rows, load_answer_key
+from src.utils.timing import annotate
+
+
+def resolve_graph(request):
+    """
+    Return the cached graph for the curriculum selected by the request.
+
+    The curriculum is chosen with ?curriculum=<slug|name|subject>; without it
+    the default curriculum (settings.DEFAULT_CURRICULUM) is served.
+    """
+    entry = graph_registry.entry(request.query_params.get('curriculum'))
+    graph = graph_registry.get(entry.slug)
+    annotate_graph(entry, graph)
+    return graph
+
+
+def annotate_graph(entry, graph):
+    """Record the curriculum and graph size with the request's phase timings."""
+    annotate(curriculum=entry.slug, nodes=graph.metadata["total_nodes"], links=graph.metadata["total_links"])
+
+
+def curriculum_not_found_response():
+    return Response(
+        {
+            "status": "error",
+            "message": "Curriculum data file not found"
+        },
+        status=status.HTTP_404_NOT_FOUND
+    )
+
+
+# Keys of the per-graph-version payloads (see CachedGraph.payload)
+def data_payload_key(with_layout=False):
+    return f"data:{int(with_layout)}"
+
+
+def binary_payload_key(with_layout=False):
+    return f"data:binary:{int(with_layout)}"
+
+
+def nodes_payload_key(node_type=None):
+    return f"nodes:{node_type or ''}"
+
+
+def lod_payload_key(level):
+    return f"lod:{level}"
+
+
+LINKS_PAYLOAD_KEY = "links"
+
+
+def layout_ready(request, graph):
+    """
+    True for ?layout=1 once the graph's positions exist. Until then they are
+    computed in the background and the nodes are served without x/y, so the
+    client runs its own simulation instead of waiting for the layout.
+    """
+    if request.query_params.get('layout') not in ('1', 'true'):
+        return False
+    return graph.positions(wait=False) is not None
+
+
+def graph_data_payload(graph, with_layout=False):
+    """Cached JSON body of /api/graph/data/ for a graph version."""
+    return graph.payload(data_payload_key(with_layout), lambda g: {
+        "status": "success",
+        "data": {
+            "nodes": g.nodes_with_positions() if with_layout else g.nodes,
+            "links": g.links,
+            "metadata": g.metadata
+        }
+    })
+
+
+def graph_binary_payload(graph, with_layout=False):
+    """Cached binary body of /api/graph/data/?format=binary for a graph version."""
+    return graph.payload(binary_payload_key(with_layout), lambda g: EncodedPayload(
+        encode_graph(g.as_compact(), g.positions() if with_layout else None),
+        content_type=MEDIA_TYPE))
+
+
+def graph_nodes_payload(graph, node_type=None):
+    """Cached body of /api/graph/nodes/, optionally filtered by a known node type."""
+    def build(g):
+        nodes = g.nodes
+        if node_type:
+            nodes = [n for n in nodes if n.get('type') == node_type]
+        return {
+            "status": "success",
+            "data": {
+                "nodes": nodes,
+                "count": len(nodes)
+            }
+        }
+    
+    return graph.payload(nodes_payload_key(node_type), build)
+
+
+def graph_links_payload(graph):
+    return graph.payload(LINKS_PAYLOAD_KEY, lambda g: {
+        "status": "success",
+        "data": {
+            "links": g.links,
+            "count": len(g.links)
+        }
+    })
+
+
+def graph_stats_data(graph):
+    total_nodes = graph.metadata["total_nodes"]
+    total_links = graph.metadata["total_links"]
+    
+    # Calculate average connections per node
+    avg_connections = (total_links * 2) / total_nodes if total_nodes else 0
+    
+    return {
+        "total_nodes": total_nodes,
+        "total_links": total_links,
+        "node_types": graph.metadata["node_types"],
+        "link_types": graph.link_types,
+        "average_connections": round(avg_connections, 2),
+        "cache": graph_cache.stats()
+    }
+
+
+def curricula_data():
+    return {
+        "curricula": [entry.as_dict() for entry in graph_registry.entries()],
+        "default": graph_registry.default_slug
+    }
+
+
+def parse_depth(value):
+    """Parse ?depth=; None when absent, ValueError unless a non-negative integer."""
+    depth = int(value) if value not in (None, '') else None
+    if depth is not None and depth < 0:
+        raise ValueError(value)
+    return depth
+
+
+def graph_subtree_data(graph, node_id, depth=None):
+    """Subtree response data, or None if the node does not exist."""
+    index = graph.hierarchy()
+    position = index.index_of(node_id)
+    if position is None:
+        return None
+    
+    positions = index.subtree(position, depth)
+    nodes = [graph.node_at(i) for i in positions]
+    return {
+        "root": node_id,
+        "nodes": nodes,
+        "links": index.tree_links(positions),
+        "count": len(nodes)
+    }
+
+
+def graph_ancestors_data(graph, node_id):
+    """Ancestor path response data, or None if the node does not exist."""
+    index = graph.hierarchy()
+    position = index.index_of(node_id)
+    if position is None:
+        return None
+    
+    path = index.ancestors(position)
+    return {
+        "node": graph.node_at(position),
+        "ancestors": [graph.node_at(i) for i in path],
+        "links": index.tree_links(path + [position]),
+        "count": len(path)
+    }
+
+
+def graph_lod_payload(graph, level):
+    return graph.payload(lod_payload_key(level), lambda g: {
+        "status": "success",
+        "data": g.lod().view(level)
+    })
+
+
+def mastery_overlay_payload(entry, graph, scores):
+    # built for every request, so compressed cheaply
+    return EncodedPayload.from_data({
+        "status": "success",
+        "data": {"curriculum": entry.slug, **graph.score_overlay(scores)}
+    }, fast=True)
+
+
+def warm_graph_payloads(graph):
+    """
+    Build the full-graph payloads and their compressed variants up front,
+    e.g. in a preloading master so forked workers share them.
+    """
+    payloads = [graph_data_payload(graph), graph_binary_payload(graph)]
+    # the layout as well, so ?layout=1 (what the frontend requests) never waits for it
+    if settings.GRAPH_WARM_LAYOUT and graph.positions() is not None:
+        payloads += [graph_data_payload(graph, True), graph_binary_payload(graph, True)]
+    for payload in payloads:
+        for encoding in payload.ENCODINGS:
+            payload.encoded(encoding)
 
 
 @method_decorator(csrf_exempt, name='dispatch')
@@ -20,7 +232,17 @@ class GraphDataAPIView(APIView):
     """
     API endpoint that returns complete graph data (nodes and links).
     
-    GET /api/graph/data/
+    GET /api/graph/data/?curriculum=<slug>
+    
+    The body is pre-serialized once per graph version and served with a
+    strong ETag (304 on If-None-Match) and gzip/br Content-Encoding.
+    
+    ?format=binary (or Accept: application/vnd.edugraph.graph) returns the
+    compact binary layout described in src/utils/binary_format.py instead.
+    
+    ?layout=1 adds precomputed x/y positions (centred on 0, 0) to every node,
+    computed once per graph version with the frontend's force parameters.
+    While the layout is still being computed the nodes come without x/y.
     
     Returns:
         {
@@ -36,43 +258,19 @@ class GraphDataAPIView(APIView):
             }
         }
     """
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, GraphBinaryRenderer]
     
     def get(self, request):
         try:
-            # Load data from the curriculum file
-            data_file = settings.CURRICULUM_DIR / "matematik" / "matematik_kazanimlari_124_154.json"
-            nodes, links = get_graph_data(str(data_file))
-            
-            # Calculate metadata
-            node_types = {}
-            for node in nodes:
-                node_type = node.get('type', 'unknown')
-                node_types[node_type] = node_types.get(node_type, 0) + 1
-            
-            # Prepare response
-            response_data = {
-                "status": "success",
-                "data": {
-                    "nodes": nodes,
-                    "links": links,
-                    "metadata": {
-                        "total_nodes": len(nodes),
-                        "total_links": len(links),
-                        "node_types": node_types
-                    }
-                }
-            }
+            graph = resolve_graph(request)
+            with_layout = layout_ready(request, graph)
+            if request.accepted_renderer.format == GraphBinaryRenderer.format:
+                return payload_response(request, graph_binary_payload(graph, with_layout))
             
-            return Response(response_data, status=status.HTTP_200_OK)
+            return payload_response(request, graph_data_payload(graph, with_layout))
             
-        except FileNotFoundError:
-            return Response(
-                {
-                    "status": "error",
-                    "message": "Curriculum data file not found"
-                },
-                status=status.HTTP_404_NOT_FOUND
-            )
+        except (CurriculumNotFound, FileNotFoundError):
+            return curriculum_not_found_response()
         except Exception as e:
             return Response(
                 {
@@ -88,9 +286,13 @@ class GraphNodesAPIView(APIView):
     """
     API endpoint that returns only graph nodes.
     
-    GET /api/graph/nodes/
+    GET /api/graph/nodes/?curriculum=<slug>
+    
+    The body is pre-serialized once per graph version and served with a
+    strong ETag (304 on If-None-Match) and gzip/br Content-Encoding.
     
     Query parameters:
+        - curriculum: Curriculum slug, file name or subject (default curriculum if omitted)
         - type: Filter nodes by type (e.g., ?type=kazanım)
     
     Returns:
@@ -105,25 +307,108 @@ class GraphNodesAPIView(APIView):
     
     def get(self, request):
         try:
-            data_file = settings.CURRICULUM_DIR / "matematik" / "matematik_kazanimlari_124_154.json"
-            nodes, _ = get_graph_data(str(data_file))
+            graph = resolve_graph(request)
             
-            # Filter by type if specified
+            # Filter by type if specified; only known types get a cached payload
             node_type = request.query_params.get('type')
-            if node_type:
-                nodes = [n for n in nodes if n.get('type') == node_type]
+            if node_type and node_type not in graph.metadata["node_types"]:
+                return Response(
+                    {
+                        "status": "success",
+                        "data": {
+                            "nodes": [],
+                            "count": 0
+                        }
+                    },
+                    status=status.HTTP_200_OK
+                )
+            
+            return payload_response(request, graph_nodes_payload(graph, node_type))
+            
+        except (CurriculumNotFound, FileNotFoundError):
+            return curriculum_not_found_response()
+        except Exception as e:
+            return Response(
+                {
+                    "status": "error",
+                    "message": str(e)
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class GraphLinksAPIView(APIView):
+    """
+    API endpoint that returns only graph links.
+    
+    GET /api/graph/links/?curriculum=<slug>
+    
+    The body is pre-serialized once per graph version and served with a
+    strong ETag (304 on If-None-Match) and gzip/br Content-Encoding.
+    
+    Returns:
+        {
+            "status": "success",
+            "data": {
+                "links": [...],
+                "count": int
+            }
+        }
+    """
+    
+    def get(self, request):
+        try:
+            graph = resolve_graph(request)
+            return payload_response(request, graph_links_payload(graph))
             
+        except (CurriculumNotFound, FileNotFoundError):
+            return curriculum_not_found_response()
+        except Exception as e:
+            return Response(
+                {
+                    "status": "error",
+                    "message": str(e)
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class GraphStatsAPIView(APIView):
+    """
+    API endpoint that returns graph statistics.
+    
+    GET /api/graph/stats/?curriculum=<slug>
+    
+    Returns:
+        {
+            "status": "success",
+            "data": {
+                "total_nodes": int,
+                "total_links": int,
+                "node_types": {...},
+                "link_types": {...},
+                "average_connections": float,
+                "cache": {"hits": int, "misses": int, "rebuilds": int, "evictions": int,
+                          "entries": int, "bytes": int}
+            }
+        }
+    """
+    
+    def get(self, request):
+        try:
+            graph = resolve_graph(request)
             return Response(
                 {
                     "status": "success",
-                    "data": {
-                        "nodes": nodes,
-                        "count": len(nodes)
-                    }
+                    "data": graph_stats_data(graph)
                 },
                 status=status.HTTP_200_OK
             )
             
+        except (CurriculumNotFound, FileNotFoundError):
+            return curriculum_not_found_response()
         except Exception as e:
             return Response(
                 {
@@ -135,38 +420,95 @@ class GraphNodesAPIView(APIView):
 
 
 @method_decorator(csrf_exempt, name='dispatch')
-class GraphLinksAPIView(APIView):
+class CurriculumListAPIView(APIView):
     """
-    API endpoint that returns only graph links.
+    API endpoint that lists the discovered curricula.
     
-    GET /api/graph/links/
+    GET /api/graph/curricula/
     
     Returns:
         {
             "status": "success",
             "data": {
+                "curricula": [{"slug": str, "subject": str, "name": str}, ...],
+                "default": str
+            }
+        }
+    """
+    
+    def get(self, request):
+        return Response(
+            {
+                "status": "success",
+                "data": curricula_data()
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+def node_not_found_response():
+    return Response(
+        {
+            "status": "error",
+            "message": "Node not found"
+        },
+        status=status.HTTP_404_NOT_FOUND
+    )
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class GraphSubtreeAPIView(APIView):
+    """
+    API endpoint that returns a node and its descendants.
+    
+    GET /api/graph/subtree/<node_id>/?depth=N&curriculum=<slug>
+    
+    Answered from the prebuilt hierarchy index, so the cost follows the
+    size of the returned subtree rather than the whole graph.
+    
+    Query parameters:
+        - depth: Maximum number of levels below the node (all levels if omitted)
+    
+    Returns:
+        {
+            "status": "success",
+            "data": {
+                "root": str,
+                "nodes": [...],
                 "links": [...],
                 "count": int
             }
         }
     """
     
-    def get(self, request):
+    def get(self, request, node_id):
         try:
-            data_file = settings.CURRICULUM_DIR / "matematik" / "matematik_kazanimlari_124_154.json"
-            _, links = get_graph_data(str(data_file))
+            depth = parse_depth(request.query_params.get('depth'))
+        except ValueError:
+            return Response(
+                {
+                    "status": "error",
+                    "message": "depth must be a non-negative integer"
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            graph = resolve_graph(request)
+            data = graph_subtree_data(graph, node_id, depth)
+            if data is None:
+                return node_not_found_response()
             
             return Response(
                 {
                     "status": "success",
-                    "data": {
-                        "links": links,
-                        "count": len(links)
-                    }
+                    "data": data
                 },
                 status=status.HTTP_200_OK
             )
             
+        except (CurriculumNotFound, FileNotFoundError):
+            return curriculum_not_found_response()
         except Exception as e:
             return Response(
                 {
@@ -178,65 +520,285 @@ class GraphLinksAPIView(APIView):
 
 
 @method_decorator(csrf_exempt, name='dispatch')
-class GraphStatsAPIView(APIView):
+class GraphAncestorsAPIView(APIView):
     """
-    API endpoint that returns graph statistics.
+    API endpoint that returns the path from the root to a node.
     
-    GET /api/graph/stats/
+    GET /api/graph/ancestors/<node_id>/?curriculum=<slug>
     
     Returns:
         {
             "status": "success",
             "data": {
-                "total_nodes": int,
-                "total_links": int,
-                "node_types": {...},
-                "link_types": {...},
-                "average_connections": float
+                "node": {...},
+                "ancestors": [...],   # root first, node itself excluded
+                "links": [...],
+                "count": int
             }
         }
     """
     
-    def get(self, request):
+    def get(self, request, node_id):
         try:
-            data_file = settings.CURRICULUM_DIR / "matematik" / "matematik_kazanimlari_124_154.json"
-            nodes, links = get_graph_data(str(data_file))
+            graph = resolve_graph(request)
+            data = graph_ancestors_data(graph, node_id)
+            if data is None:
+                return node_not_found_response()
             
-            # Calculate node type distribution
-            node_types = {}
-            for node in nodes:
-                node_type = node.get('type', 'unknown')
-                node_types[node_type] = node_types.get(node_type, 0) + 1
+            return Response(
+                {
+                    "status": "success",
+                    "data": data
+                },
+                status=status.HTTP_200_OK
+            )
             
-            # Calculate link type distribution
-            link_types = {}
-            node_map = {n['id']: n for n in nodes}
+        except (CurriculumNotFound, FileNotFoundError):
+            return curriculum_not_found_response()
+        except Exception as e:
+            return Response(
+                {
+                    "status": "error",
+                    "message": str(e)
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class GraphLevelOfDetailAPIView(APIView):
+    """
+    API endpoint that returns an aggregated view of the graph for zoomed-out rendering.
+    
+    GET /api/graph/lod/?level=grup&expand=<id>,<id>&curriculum=<slug>
+    
+    Only cluster nodes (konu, grup, alt_grup) down to the requested level are
+    returned, each with child_count, kazanim_count and mean_score (coloured by
+    mean score). Listed clusters are expanded with their direct children.
+    Aggregates are precomputed once per graph version; without expand the
+    body is a cached payload with ETag support.
+    
+    Query parameters:
+        - level: konu, grup or alt_grup (default: konu)
+        - expand: Comma-separated ids of visible clusters to expand
+    
+    Returns:
+        {
+            "status": "success",
+            "data": {
+                "level": str,
+                "nodes": [...],
+                "links": [...],
+                "expanded": [...],
+                "count": int
+            }
+        }
+    """
+    
+    def get(self, request):
+        level = request.query_params.get('level') or LOD_LEVELS[0]
+        if level not in LOD_LEVELS:
+            return Response(
+                {
+                    "status": "error",
+                    "message": f"level must be one of: {', '.join(LOD_LEVELS)}"
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        expand = [i for i in (request.query_params.get('expand') or '').split(',') if i]
+        
+        try:
+            graph = resolve_graph(request)
+            if not expand:
+                return payload_response(request, graph_lod_payload(graph, level))
             
-            for link in links:
-                source_node = node_map.get(link['source'])
-                target_node = node_map.get(link['target'])
-                
-                if source_node and target_node:
-                    link_key = f"{source_node['type']} → {target_node['type']}"
-                    link_types[link_key] = link_types.get(link_key, 0) + 1
+            return Response(
+                {
+                    "status": "success",
+                    "data": graph.lod().view(level, expand)
+                },
+                status=status.HTTP_200_OK
+            )
             
-            # Calculate average connections per node
-            avg_connections = (len(links) * 2) / len(nodes) if nodes else 0
+        except (CurriculumNotFound, FileNotFoundError):
+            return curriculum_not_found_response()
+        except Exception as e:
+            return Response(
+                {
+                    "status": "error",
+                    "message": str(e)
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class GraphMasteryAPIView(APIView):
+    """
+    API endpoint for the current user's per-node mastery overlay.
+    
+    GET /api/graph/mastery/?curriculum=<slug>
+    
+    The shared graph stays cached once for everyone; this returns only the
+    user's scores, as positions into the node order of /api/graph/data/ plus
+    the colors/radii derived from them (one indexed query per request).
+    
+    PUT /api/graph/mastery/?curriculum=<slug>
+        {"scores": {"<node_id>": float (0..1), ...}}
+        (400 if any node id is not in the curriculum)
+    
+    Returns:
+        {
+            "status": "success",
+            "data": {
+                "curriculum": str,
+                "version": str,       # graph version the positions refer to
+                "node_count": int,
+                "index": [int, ...],  # node positions, ascending
+                "scores": [float, ...],
+                "colors": [str, ...],
+                "r": [int, ...]
+            }
+        }
+    """
+    
+    def get(self, request):
+        try:
+            entry = graph_registry.entry(request.query_params.get('curriculum'))
+            graph = graph_registry.get(entry.slug)
+            annotate_graph(entry, graph)
+            scores = NodeMastery.objects.scores_for(request.user, entry.slug)
+            return payload_response(request, mastery_overlay_payload(entry, graph, scores))
             
+        except (CurriculumNotFound, FileNotFoundError):
+            return curriculum_not_found_response()
+        except Exception as e:
+            return Response(
+                {
+                    "status": "error",
+                    "message": str(e)
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
+    def put(self, request):
+        scores = request.data.get('scores') if isinstance(request.data, dict) else None
+        if not isinstance(scores, dict) or not all(
+                isinstance(v, (int, float)) and not isinstance(v, bool) and 0 <= v <= 1 for v in scores.values()):
+            return Response(
+                {
+                    "status": "error",
+                    "message": "scores must map node ids to numbers between 0 and 1"
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            entry = graph_registry.entry(request.query_params.get('curriculum'))
+            graph = graph_registry.get(entry.slug)
+            annotate_graph(entry, graph)
+            index = graph.hierarchy()
+            unknown = [node_id for node_id in scores if index.index_of(node_id) is None]
+            if unknown:
+                return Response(
+                    {
+                        "status": "error",
+                        "message": f"{len(unknown)} node id(s) are not in the curriculum",
+                        "unknown": unknown[:20]
+                    },
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            written = NodeMastery.objects.upsert(
+                {"user_id": request.user.pk, "curriculum": entry.slug, "node_id": str(node_id), "score": float(score)}
+                for node_id, score in scores.items()
+            )
+            return Response(
+                {
+                    "status": "success",
+                    "message": "Mastery scores saved",
+                    "data": {"curriculum": entry.slug, "count": written}
+                },
+                status=status.HTTP_200_OK
+            )
+            
+        except (CurriculumNotFound, FileNotFoundError):
+            return curriculum_not_found_response()
+        except Exception as e:
+            return Response(
+                {
+                    "status": "error",
+                    "message": str(e)
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ExamResultUploadAPIView(APIView):
+    """
+    API endpoint for bulk exam result uploads (staff only).
+    
+    POST /api/graph/results/?curriculum=<slug>
+        multipart: file=<results .csv/.jsonl>, answer_key=<optional .csv/.jsonl>
+    
+    Rows are streamed from the upload, aggregated per student and kazanım
+    and written as NodeMastery upserts; see src/utils/results.py for the
+    accepted columns.
+    
+    Returns:
+        {
+            "status": "success",
+            "data": {
+                "curriculum": str,
+                "rows": int,
+                "students": int,
+                "scores_written": int,
+                "unknown_students": int,
+                "unknown_kazanims": int,
+                "invalid_rows": int,
+                "errors": [{"line": int, "error": str}, ...]
+            }
+        }
+    """
+    permission_classes = [IsAdminUser]
+    
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response(
+                {
+                    "status": "error",
+                    "message": "A results file is required"
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            key_file = request.FILES.get('answer_key')
+            answer_key = load_answer_key(key_file.file, _upload_format(key_file)) if key_file else None
+            stats = ingest_results(
+                iter_numbered_rows(upload.file, _upload_format(upload)),
+                curriculum=request.query_params.get('curriculum'),
+                answer_key=answer_key,
+            )
             return Response(
                 {
                     "status": "success",
-                    "data": {
-                        "total_nodes": len(nodes),
-                        "total_links": len(links),
-                        "node_types": node_types,
-                        "link_types": link_types,
-                        "average_connections": round(avg_connections, 2)
-                    }
+                    "data": stats
                 },
                 status=status.HTTP_200_OK
             )
             
+        except CurriculumNotFound:
+            return curriculum_not_found_response()
+        except (ValueError, KeyError, UnicodeDecodeError) as e:
+            return Response(
+                {
+                    "status": "error",
+                    "message": f"Could not read results: {e}"
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
         except Exception as e:
             return Response(
                 {
@@ -245,3 +807,46 @@ class GraphStatsAPIView(APIView):
                 },
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+def _upload_format(upload):
+    return "jsonl" if upload.name.lower().endswith(('.jsonl', '.ndjson', '.json')) else "csv"
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class WorkerMemoryAPIView(APIView):
+    """
+    API endpoint that reports the memory of the worker serving the request (staff only).
+    
+    GET /api/graph/memory/
+    
+    pss counts pages shared with other workers proportionally, so comparing
+    rss with pss (and shared_* with private_*) shows how much of the graph
+    data is shared from a preloading master. Values are in bytes.
+    
+    Returns:
+        {
+            "status": "success",
+            "data": {
+                "pid": int,
+                "rss": int, "pss": int,
+                "shared_clean": int, "shared_dirty": int,
+                "private_clean": int, "private_dirty": int,
+                "gc_frozen_objects": int,
+                "cache": {...}
+            }
+        }
+    """
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        return Response(
+            {
+                "status": "success",
+                "data": {
+                    **memory_report(),
+                    "cache": graph_cache.stats()
+                }
+            },
+            status=status.HTTP_200_OK
+        )
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+"""
+ASGI config for EduGraph backend project.
+
+Serves the async graph views; blocking ORM/SMTP/Cloudinary work runs in
+bounded thread pools (see backend/common/executor.py).
+
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker \
+        gunicorn -c gunicorn.conf.py backend.asgi:application
+"""
+
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+os.environ.setdefault('ASYNC_VIEWS', 'True')
+
+application = get_asgi_application()
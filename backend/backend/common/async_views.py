@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Minimal async counterpart of DRF's APIView for read-only JSON endpoints.
+
+DRF views are synchronous; under ASGI they would run on Django's single
+thread-sensitive executor. AsyncAPIView keeps DRF's authentication and
+permission classes (run in a bounded pool, since token/session lookups hit
+the database) and lets the handler itself run on the event loop.
+"""
+
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from backend.common.executor import run_blocking
+from src.utils.payload import encode_json
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    """JSON response encoded like DRF's JSONRenderer."""
+    return HttpResponse(encode_json(data), status=status_code, content_type="application/json")
+
+
+class AsyncAPIView(View):
+    """
+    Base class for async views. Subclasses implement ``async def get(...)``
+    and receive a DRF Request (query_params, user, auth).
+    """
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    permission_classes = api_settings.DEFAULT_PERMISSION_CLASSES
+    pool = "graph"
+
+    def _authenticate(self, request):
+        # touching .user runs the authenticators; permissions may hit the DB too
+        request.user
+        for permission in (cls() for cls in self.permission_classes):
+            if not permission.has_permission(request, self):
+                if request.authenticators and not request.successful_authenticator:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, "message", None))
+
+    async def dispatch(self, request, *args, **kwargs):
+        handler = getattr(self, request.method.lower(), None)
+        if request.method.lower() not in self.http_method_names or handler is None:
+            return json_response({"detail": f'Method "{request.method}" not allowed.'},
+                                 status.HTTP_405_METHOD_NOT_ALLOWED)
+
+        drf_request = Request(request, authenticators=[cls() for cls in self.authentication_classes])
+        try:
+            await run_blocking(self._authenticate, drf_request, pool=self.pool)
+        except exceptions.APIException as exc:
+            response = json_response({"detail": str(exc.detail)}, exc.status_code)
+            if isinstance(exc, exceptions.NotAuthenticated) and self.authentication_classes:
+                header = self.authentication_classes[0]().authenticate_header(drf_request)
+                if header:
+                    response["WWW-Authenticate"] = header
+                else:
+                    response.status_code = status.HTTP_403_FORBIDDEN
+            return response
+
+        return await handler(drf_request, *args, **kwargs)
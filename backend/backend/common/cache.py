@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Small in-process caches for per-request lookups (tokens, user representations).
+
+TTLCache is a thread-safe LRU mapping whose entries also expire a fixed
+time after they were stored. It bounds both memory (max_entries) and
+staleness (ttl) for data that is invalidated explicitly in this process
+but may change in another one.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+
+
+class TTLCache:
+    """LRU cache of at most max_entries items, each valid for ttl seconds."""
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            expires, value = item
+            if expires <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def record(self, hit: bool) -> None:
+        """Count a lookup answered elsewhere (e.g. by a shared cache) in this cache's stats."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entries": len(self._entries),
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+def shared_cache(alias: Optional[str]) -> Optional[BaseCache]:
+    """The Django cache configured under alias (e.g. "shared" for Redis), or None."""
+    return caches[alias] if alias else None
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Bounded thread pools for blocking work under ASGI.
+
+Async views must not block the event loop, and Django's default
+sync_to_async(thread_sensitive=True) runs every sync call of a process on
+one shared thread, so a single slow Cloudinary upload or SMTP send would
+stall all other sync work. Blocking calls are instead run in named pools
+of fixed size (settings.ASYNC_POOL_SIZES):
+
+    "graph"    authentication and graph (re)builds for the graph views
+    "default"  ORM, SMTP and Cloudinary calls of the user views
+    "auth"     password hashing for logins (backend/users/passwords.py)
+
+Keeping them apart means a burst of slow external calls can only exhaust
+the default pool, never the one graph reads depend on.
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from src.utils.timing import phase
+
+DEFAULT_POOL_SIZES = {"default": 16, "graph": 4, "auth": 2}
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_lock = threading.Lock()
+
+
+def get_executor(pool: str = "default") -> ThreadPoolExecutor:
+    executor = _executors.get(pool)
+    if executor is None:
+        with _lock:
+            executor = _executors.get(pool)
+            if executor is None:
+                sizes = {**DEFAULT_POOL_SIZES, **getattr(settings, "ASYNC_POOL_SIZES", {})}
+                executor = ThreadPoolExecutor(max_workers=sizes.get(pool, sizes["default"]),
+                                              thread_name_prefix=f"edugraph-{pool}")
+                _executors[pool] = executor
+    return executor
+
+
+def _call_with_connections(func: Callable, *args, **kwargs) -> Any:
+    # pool threads are long-lived; honour CONN_MAX_AGE like a request would
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def submit(func: Callable, *args, pool: str = "default", **kwargs) -> Future:
+    """Run a blocking callable in the named pool in the background (fire and forget from sync code)."""
+    return get_executor(pool).submit(_call_with_connections, func, *args, **kwargs)
+
+
+async def run_blocking(func: Callable, *args, pool: str = "default", **kwargs) -> Any:
+    """Run a blocking callable in the named pool and await its result."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, _call_with_connections, func, *args, **kwargs)
+    return await loop.run_in_executor(get_executor(pool), call)
+
+
+def pooled_view(view: Callable, pool: str = "default") -> Callable:
+    """
+    Wrap a sync view (e.g. a DRF APIView.as_view()) as an async view that
+    runs, response rendering included, in a bounded pool.
+    """
+    def render(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if hasattr(response, "render") and callable(response.render):
+            with phase("render"):
+                response = response.render()
+        return response
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await run_blocking(render, request, *args, pool=pool, **kwargs)
+
+    wrapper.csrf_exempt = getattr(view, "csrf_exempt", False)
+    return wrapper
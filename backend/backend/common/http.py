@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP helpers for serving pre-serialized payloads with conditional GET support.
+"""
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+
+
+def not_modified(request, payload, last_modified=None):
+    """
+    True if the client's validators match: If-None-Match against the ETag,
+    or, only when no If-None-Match is sent, If-Modified-Since against last_modified.
+    """
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH", "")
+    if if_none_match:
+        return payload.matches(if_none_match)
+    if last_modified is not None:
+        since = parse_http_date_safe(request.META.get("HTTP_IF_MODIFIED_SINCE", ""))
+        return since is not None and int(last_modified) <= since
+    return False
+
+
+def payload_response(request, payload, cache_control="private, no-cache", last_modified=None):
+    """
+    Serve an EncodedPayload, honouring If-None-Match and Accept-Encoding.
+
+    Returns 304 when the client already holds the current representation,
+    otherwise the best pre-compressed variant the client accepts. With
+    last_modified (a timestamp) Last-Modified is sent and If-Modified-Since
+    honoured as well.
+    """
+    encoding = payload.negotiate(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+    if not_modified(request, payload, last_modified):
+        response = HttpResponseNotModified()
+    else:
+        body = payload.encoded(encoding) if encoding else payload.body
+        response = HttpResponse(body, content_type=payload.content_type)
+        response["Content-Length"] = str(len(body))
+        if encoding:
+            response["Content-Encoding"] = encoding
+
+    response["ETag"] = payload.etag(encoding)
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = cache_control
+    patch_vary_headers(response, ("Accept", "Accept-Encoding"))
+    return response
@@ -0,0 +1,379 @@
+# -*- coding: utf-8 -*-
+"""
+In-process metrics with Prometheus text exposition (GET /metrics).
+
+    BUILDS = registry.histogram("edugraph_graph_build_seconds", "Graph build time", ["source"])
+    BUILDS.observe(0.42, source="json")
+
+Counters and histograms are updated where things happen. Values that
+already live elsewhere (cache statistics, loaded graphs) are read by
+collectors registered with registry.add_collector(), which run right
+before every snapshot.
+
+Several worker processes: with METRICS_DIR set, each process writes a
+snapshot of its metrics to <dir>/<host>-<pid>.json every
+METRICS_FLUSH_INTERVAL seconds from a daemon thread (which doubles as a
+heartbeat), and /metrics merges the files of all processes:
+
+    counters, histograms   summed over all processes. Files not refreshed
+                           for METRICS_STALE_AFTER seconds belong to exited
+                           processes and are folded into archive.json, so
+                           totals survive worker restarts.
+    gauges                 combined over live processes only, by the
+                           gauge's mode: "sum" or "max" (e.g. graph sizes,
+                           which are the same in every worker).
+
+Point every process that should be aggregated (web workers, the mailer) at
+the same directory. Without METRICS_DIR, /metrics reports the process that
+serves the request. No external service is needed either way.
+"""
+
+import atexit
+import json
+import logging
+import math
+import os
+import socket
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+try:  # POSIX; without it concurrent scrapes may fold an exited process twice
+    import fcntl
+except ImportError:  # pragma: no cover - depends on the platform
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ARCHIVE = "archive.json"
+
+# snapshot: {name: {"type", "help", "labels", "mode", "buckets", "samples": {label values: value}}}
+Snapshot = Dict[str, Dict[str, Any]]
+
+
+class Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), mode: str = "sum"):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.mode = mode
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def dump(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = {key: list(value) if isinstance(value, list) else value for key, value in self._values.items()}
+        return {"type": self.type, "help": self.documentation, "labels": list(self.labelnames),
+                "mode": self.mode, "samples": samples}
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._seen: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+            self._seen.clear()
+
+    def track(self, total: float, **labels) -> None:
+        """
+        Follow a running total kept elsewhere (cache statistics) by adding its
+        growth since the last call. A smaller total means the source was reset.
+        Totals seen before a fork are not counted again by the child.
+        """
+        key = self._key(labels)
+        with self._lock:
+            last = self._seen.get(key, 0)
+            self._values[key] = self._values.get(key, 0.0) + (total - last if total >= last else total)
+            self._seen[key] = total
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            # per-bucket counts (the last one is +Inf), then the sum
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+    def dump(self) -> Dict[str, Any]:
+        return {**super().dump(), "buckets": list(self.buckets)}
+
+
+class Registry:
+    """Named metrics of this process plus the collectors that refresh them."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self._flusher_started = False
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _register(self, cls, name: str, *args, **kwargs) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.type}")
+        self.start_flushing()
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), mode: str = "sum") -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames, mode)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets)
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def collect(self) -> Snapshot:
+        """Run the collectors and return a snapshot of every metric."""
+        for collector in list(self._collectors):
+            try:
+                collector()
+            except Exception:
+                logger.exception("Metrics collector %r failed", collector)
+        return {name: metric.dump() for name, metric in list(self._metrics.items())}
+
+    def clear(self) -> None:
+        for metric in list(self._metrics.values()):
+            metric.clear()
+
+    def _after_fork(self) -> None:
+        # A forked worker starts from zero (its parent keeps reporting what happened before
+        # the fork) with fresh locks, in case the parent's flusher held one while forking.
+        self._lock = threading.Lock()
+        for metric in self._metrics.values():
+            metric._lock = threading.Lock()
+            metric._values = {}
+        self._flusher_started = False
+
+    def start_flushing(self) -> None:
+        """Write this process's snapshot to METRICS_DIR periodically (once per process)."""
+        if self._flusher_started:
+            return
+        with self._lock:
+            if self._flusher_started or not settings.configured or not getattr(settings, "METRICS_DIR", ""):
+                return
+            self._flusher_started = True
+        thread = threading.Thread(target=self._flush_loop, name="edugraph-metrics", daemon=True)
+        thread.start()
+        atexit.register(self.flush)
+
+    def _flush_loop(self) -> None:
+        while True:
+            self.flush()
+            time.sleep(settings.METRICS_FLUSH_INTERVAL)
+
+    def flush(self) -> None:
+        directory = getattr(settings, "METRICS_DIR", "")
+        if not directory:
+            return
+        try:
+            write_json(process_file(directory), self.collect())
+        except OSError as e:
+            logger.warning("Could not write metrics to %s: %s", directory, e)
+
+
+registry = Registry()
+
+
+def process_file(directory) -> Path:
+    return Path(directory) / f"{socket.gethostname()}-{os.getpid()}.json"
+
+
+def write_json(path: Path, snapshot: Snapshot) -> None:
+    """Atomically replace path with the snapshot (label tuples become lists)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {name: {**m, "samples": [[list(key), value] for key, value in m["samples"].items()]}
+            for name, m in snapshot.items()}
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    with os.fdopen(fd, "w", encoding="utf-8") as fp:
+        json.dump(data, fp)
+    os.replace(tmp, path)
+
+
+def read_json(path: Path) -> Optional[Snapshot]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return {name: {**m, "samples": {tuple(key): value for key, value in m["samples"]}} for name, m in data.items()}
+
+
+def merge(snapshots: Iterable[Tuple[Snapshot, bool]]) -> Snapshot:
+    """
+    Combine (snapshot, live) pairs: counters and histograms are summed,
+    gauges are summed or maxed (by mode) over live snapshots only.
+    """
+    merged: Snapshot = {}
+    for snapshot, live in snapshots:
+        for name, metric in snapshot.items():
+            if metric["type"] == "gauge" and not live:
+                continue
+            target = merged.setdefault(name, {**metric, "samples": {}})
+            samples = target["samples"]
+            for key, value in metric["samples"].items():
+                current = samples.get(key)
+                if current is None:
+                    samples[key] = list(value) if isinstance(value, list) else value
+                elif metric["type"] == "histogram":
+                    if len(current) == len(value):
+                        samples[key] = [a + b for a, b in zip(current, value)]
+                elif metric["type"] == "gauge" and metric.get("mode") == "max":
+                    samples[key] = max(current, value)
+                else:
+                    samples[key] = current + value
+    return merged
+
+
+def _without_gauges(snapshot: Snapshot) -> Snapshot:
+    return {name: metric for name, metric in snapshot.items() if metric["type"] != "gauge"}
+
+
+def aggregate(directory, stale_after: float) -> Snapshot:
+    """Merge the snapshots of every process in directory, archiving those of exited processes."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / "archive.lock", "w") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        archive = read_json(directory / ARCHIVE) or {}
+        snapshots = [(archive, False)]
+        stale = []
+        now = time.time()
+        for path in directory.glob("*.json"):
+            if path.name == ARCHIVE:
+                continue
+            try:
+                age = now - path.stat().st_mtime
+            except OSError:
+                continue
+            snapshot = read_json(path)
+            if snapshot is None:
+                continue
+            if age > stale_after:
+                stale.append((path, snapshot))
+            else:
+                snapshots.append((snapshot, True))
+
+        if stale:
+            archive = merge([(archive, False)] + [(_without_gauges(s), False) for _, s in stale])
+            write_json(directory / ARCHIVE, archive)
+            for path, _ in stale:
+                path.unlink(missing_ok=True)
+            snapshots[0] = (archive, False)
+    return merge(snapshots)
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        if value.is_integer():
+            return str(int(value))
+    return repr(value)
+
+
+BACKSLASH, NEWLINE = "\\", "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace(BACKSLASH, BACKSLASH * 2).replace(NEWLINE, "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def render(snapshot: Snapshot) -> str:
+    """Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for name in sorted(snapshot):
+        metric = snapshot[name]
+        names = metric["labels"]
+        lines.append(f"# HELP {name} {metric['help'].replace(BACKSLASH, BACKSLASH * 2).replace(NEWLINE, ' ')}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for key in sorted(metric["samples"]):
+            value = metric["samples"][key]
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_labels(names, key)} {_format_value(value)}")
+                continue
+            cumulative = 0
+            for le, count in zip([*metric["buckets"], math.inf], value[:-1]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels([*names, 'le'], [*key, _format_value(float(le))])} "
+                             f"{cumulative}")
+            lines.append(f"{name}_sum{_labels(names, key)} {_format_value(value[-1])}")
+            lines.append(f"{name}_count{_labels(names, key)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def exposition() -> str:
+    """The text served by /metrics: this process, or every process sharing METRICS_DIR."""
+    if not settings.METRICS_DIR:
+        return render(registry.collect())
+    registry.flush()
+    return render(aggregate(settings.METRICS_DIR, settings.METRICS_STALE_AFTER))
+
+
+# Shared by the apps' collectors (backend/artifacts/metrics.py, backend/users/metrics.py)
+CACHE_REQUESTS = registry.counter("edugraph_cache_requests_total", "Cache lookups by result", ["cache", "result"])
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+Request instrumentation: Server-Timing headers and Prometheus metrics.
+
+With SERVER_TIMING on, ServerTimingMiddleware collects the phases recorded
+with src.utils.timing.phase() during a request (read, parse, nodes, links,
+metadata, serialize, encode, compress, render, auth, ...) and
+
+  - sends them as a Server-Timing header, next to X-Request-ID, and
+  - logs one JSON line per request to the "backend.timing" logger with the
+    request id, status, total and per-phase milliseconds, response size and
+    the annotated attributes (curriculum, nodes, links, cache hits).
+
+The request id is taken from an X-Request-ID request header (set by nginx)
+or generated. With SERVER_TIMING off the middleware removes itself at
+startup and phase() stays a no-op.
+
+With METRICS_ENABLED on (the default), MetricsMiddleware records every
+request's duration per view and method, its status and the number of SQL
+queries it ran (see backend/common/metrics.py for /metrics).
+
+ProfilingMiddleware profiles requests of staff users flagged with
+"X-Profile: 1" or "?profile=1" (see backend/common/profiling.py).
+"""
+
+import contextvars
+import json
+import logging
+import re
+import threading
+import time
+import uuid
+from typing import List, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from backend.common import profiling
+from backend.common.executor import run_blocking
+from backend.common.metrics import registry
+from src.utils.timing import collecting, current_timer
+
+logger = logging.getLogger("backend.timing")
+
+REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+def request_id_for(request) -> str:
+    supplied = request.META.get("HTTP_X_REQUEST_ID", "")
+    return supplied if REQUEST_ID_RE.match(supplied) else uuid.uuid4().hex
+
+
+class ServerTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with collecting() as timer:
+            response = self.get_response(request)
+            return self.finish(request, response, timer)
+
+    async def __acall__(self, request):
+        with collecting() as timer:
+            response = await self.get_response(request)
+            return self.finish(request, response, timer)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns; time that too
+        timer = current_timer()
+        if timer is not None:
+            start = time.perf_counter()
+            response.add_post_render_callback(lambda rendered: timer.add("render", time.perf_counter() - start))
+        return response
+
+    def finish(self, request, response, timer):
+        total = timer.elapsed()
+        request_id = request_id_for(request)
+        response["Server-Timing"] = timer.server_timing(total)
+        response["X-Request-ID"] = request_id
+
+        size = None if response.streaming else len(response.content)
+        logger.info(json.dumps({
+            "request_id": request_id,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(total * 1000, 3),
+            "phases": timer.milliseconds(),
+            "bytes": size,
+            "content_encoding": response.get("Content-Encoding"),
+            **timer.attrs,
+        }, ensure_ascii=False, default=str))
+        return response
+
+
+REQUEST_DURATION = registry.histogram(
+    "edugraph_http_request_duration_seconds", "Time spent handling requests", ["view", "method"])
+REQUESTS = registry.counter("edugraph_http_requests_total", "Requests handled", ["view", "method", "status"])
+DB_QUERIES = registry.counter("edugraph_db_queries_total", "SQL queries run while handling requests", ["view"])
+
+METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+# queries of the current request; a list so pool threads (copied contexts) add to the same count
+_queries: contextvars.ContextVar[Optional[List[int]]] = contextvars.ContextVar("request_queries", default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    counter = _queries.get()
+    if counter is not None:
+        counter[0] += 1
+    log = profiling.captured_queries()
+    if log is None:
+        return execute(sql, params, many, context)
+    # statements only: parameters may hold credentials
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        log.append({"sql": sql, "ms": round((time.perf_counter() - start) * 1000, 3), "many": many})
+
+
+def install_query_counter(connection) -> None:
+    # first, so that execute_wrapper() blocks (which pop the last wrapper) leave it in place
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, count_query)
+
+
+def install_query_counters() -> None:
+    # connections opened before this module was imported missed connection_created
+    for connection in connections.all(initialized_only=True):
+        install_query_counter(connection)
+
+
+@receiver(connection_created)
+def _count_queries_on_new_connection(sender, connection, **kwargs):
+    install_query_counter(connection)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        install_query_counters()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        token = _queries.set([0])
+        try:
+            response = self.get_response(request)
+            self.record(request, response, time.perf_counter() - start)
+        finally:
+            _queries.reset(token)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        token = _queries.set([0])
+        try:
+            response = await self.get_response(request)
+            self.record(request, response, time.perf_counter() - start)
+        finally:
+            _queries.reset(token)
+        return response
+
+    def record(self, request, response, seconds: float) -> None:
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match is not None else "unmatched"
+        method = request.method if request.method in METHODS else "other"
+        REQUEST_DURATION.observe(seconds, view=view, method=method)
+        REQUESTS.inc(view=view, method=method, status=str(response.status_code))
+        DB_QUERIES.inc(_queries.get()[0], view=view)
+
+
+def token_user(request):
+    """The user of the request's API token (None without a valid one), through the token cache."""
+    # imported here: backend.common must not depend on app modules at import time
+    from rest_framework.exceptions import AuthenticationFailed
+
+    from backend.users.authentication import CachedTokenAuthentication
+
+    try:
+        result = CachedTokenAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+
+class ProfilingMiddleware:
+    """
+    Profile flagged requests of staff users. Token users are resolved before
+    the view (through the token cache the view's authentication uses too),
+    so other users' requests never start a sampler.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        install_query_counters()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def wanted(request) -> bool:
+        if not profiling.requested(request):
+            return False
+        user = request.user
+        if not user.is_authenticated:
+            user = token_user(request)
+        return user is not None and user.is_staff
+
+    @staticmethod
+    async def awanted(request) -> bool:
+        if not profiling.requested(request):
+            return False
+        user = await request.auser()
+        if not user.is_authenticated:
+            user = await run_blocking(token_user, request)
+        return user is not None and user.is_staff
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.wanted(request):
+            return self.get_response(request)
+        with profiling.Profiling(threading.get_ident()) as profile:
+            response = self.get_response(request)
+        return self.finish(request, response, profile)
+
+    async def __acall__(self, request):
+        if not await self.awanted(request):
+            return await self.get_response(request)
+        with profiling.Profiling(None) as profile:
+            response = await self.get_response(request)
+        return self.finish(request, response, profile)
+
+    def finish(self, request, response, profile):
+        result = profile.result(request, response)
+        profiling.profile_store().save(result)
+        response["X-Profile-ID"] = result["id"]
+        return response
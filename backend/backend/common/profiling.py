@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+On-demand request profiles for staff users.
+
+A staff request sent with an "X-Profile: 1" header or a "?profile=1" query
+flag is run under a StackSampler, which records the stack of the request
+thread every PROFILE_INTERVAL seconds, and with its SQL statements
+captured (see backend/common/middleware.py). The profile is stored in
+PROFILE_DIR and its id returned in an X-Profile-ID header; the flag is
+ignored for everyone else.
+
+Stacks are stored in the folded format ("outer;inner;leaf" -> samples)
+read by flamegraph.pl, speedscope and inferno. Only the newest
+PROFILE_KEEP profiles are kept, so the directory is a bounded ring buffer
+that can be read back after an incident (GET /api/profiles/).
+
+Under ASGI a request moves between the event loop and pool threads, so
+every thread of the process is sampled (idle ones are skipped) and
+concurrent requests can show up in the profile.
+"""
+
+import contextvars
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from django.conf import settings
+
+PROFILE_ID_RE = re.compile(r"^\d{8}T\d{9}-[0-9a-f]{8}$")
+
+# statements kept per profile; the summary still counts all of them
+MAX_QUERIES = 1000
+
+# innermost frames of threads that are waiting for work rather than doing it
+IDLE_FILES = ("threading.py", "queue.py", "selectors.py")
+
+_captured: contextvars.ContextVar[Optional[List[Dict[str, Any]]]] = contextvars.ContextVar(
+    "profiled_queries", default=None)
+
+
+def captured_queries() -> Optional[List[Dict[str, Any]]]:
+    """The statement log of the request being profiled in this context (None when not profiling)."""
+    return _captured.get()
+
+
+def requested(request) -> bool:
+    flag = request.META.get("HTTP_X_PROFILE") or request.GET.get("profile")
+    return flag in ("1", "true", "yes")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    for prefix in (str(settings.BASE_DIR), sys.prefix):
+        if filename.startswith(prefix):
+            filename = filename[len(prefix):].lstrip(os.sep)
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples the stacks of one thread (or of every thread) from a background thread."""
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._labels: Dict[Any, str] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="edugraph-profiler", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or (self.thread_id is not None and thread_id != self.thread_id):
+                    continue
+                if self.thread_id is None and frame.f_code.co_filename.endswith(IDLE_FILES):
+                    continue
+                self.stacks[self._fold(frame)] += 1
+                self.samples += 1
+
+    def _fold(self, frame) -> str:
+        labels = []
+        while frame is not None:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = _frame_label(frame)
+            labels.append(label)
+            frame = frame.f_back
+        return ";".join(reversed(labels))
+
+
+class ProfileStore:
+    """Profiles as JSON files in a directory, keeping only the newest `keep`."""
+
+    def __init__(self, directory, keep: int):
+        self.directory = Path(directory)
+        self.keep = keep
+
+    def path(self, profile_id: str) -> Path:
+        if not PROFILE_ID_RE.match(profile_id):
+            raise KeyError(profile_id)
+        return self.directory / f"{profile_id}.json"
+
+    def save(self, profile: Dict[str, Any]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        with os.fdopen(fd, "w", encoding="utf-8") as fp:
+            json.dump(profile, fp, ensure_ascii=False)
+        os.replace(tmp, self.path(profile["id"]))
+        for old in self.ids()[self.keep:]:
+            self.path(old).unlink(missing_ok=True)
+
+    def ids(self) -> List[str]:
+        """Stored profile ids, newest first."""
+        if not self.directory.is_dir():
+            return []
+        return sorted((p.stem for p in self.directory.glob("*.json") if PROFILE_ID_RE.match(p.stem)), reverse=True)
+
+    def load(self, profile_id: str) -> Dict[str, Any]:
+        try:
+            return json.loads(self.path(profile_id).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            raise KeyError(profile_id)
+
+    def summaries(self) -> Iterator[Dict[str, Any]]:
+        for profile_id in self.ids():
+            try:
+                profile = self.load(profile_id)
+            except KeyError:  # pruned meanwhile
+                continue
+            yield {key: value for key, value in profile.items() if key not in ("stacks", "queries")} | {
+                "query_count": profile["queries"]["count"]}
+
+
+def profile_store() -> ProfileStore:
+    return ProfileStore(settings.PROFILE_DIR, settings.PROFILE_KEEP)
+
+
+def new_profile_id() -> str:
+    """Sortable by time: "20250301T141502123-1a2b3c4d" (UTC, milliseconds)."""
+    now = time.time()
+    return f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(now))}{int(now % 1 * 1000):03d}-{uuid.uuid4().hex[:8]}"
+
+
+def folded(profile: Dict[str, Any]) -> str:
+    """The profile's stacks as flamegraph.pl input: one "frame;frame;frame count" line per stack."""
+    return "".join(f"{stack} {count}\n" for stack, count in profile["stacks"].items())
+
+
+class Profiling:
+    """Profile of one request: a stack sampler plus the statements it runs."""
+
+    def __init__(self, thread_id: Optional[int]):
+        self.sampler = StackSampler(thread_id, settings.PROFILE_INTERVAL)
+        self.queries: List[Dict[str, Any]] = []
+        self.started = time.time()
+        self.duration = 0.0
+
+    def __enter__(self):
+        self._token = _captured.set(self.queries)
+        self._start = time.perf_counter()
+        self.sampler.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.sampler.__exit__(*exc_info)
+        self.duration = time.perf_counter() - self._start
+        _captured.reset(self._token)
+
+    def result(self, request, response) -> Dict[str, Any]:
+        statements = Counter(q["sql"] for q in self.queries)
+        return {
+            "id": new_profile_id(),
+            "method": request.method,
+            "path": request.get_full_path(),
+            "status": response.status_code,
+            "user": getattr(request.user, "email", None),
+            "started": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.started)),
+            "duration_ms": round(self.duration * 1000, 3),
+            "interval_ms": self.sampler.interval * 1000,
+            "samples": self.sampler.samples,
+            "stacks": dict(self.sampler.stacks.most_common()),
+            "queries": {
+                "count": len(self.queries),
+                "total_ms": round(sum(q["ms"] for q in self.queries), 3),
+                # statements run more than once (N+1 candidates)
+                "repeated": {sql: n for sql, n in statements.most_common() if n > 1},
+                "statements": self.queries[:MAX_QUERIES],
+            },
+        }
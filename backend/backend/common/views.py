@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Operational endpoints shared by the apps.
+"""
+
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.permissions import BasePermission, IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from backend.common.metrics import CONTENT_TYPE, exposition
+from backend.common.profiling import folded, profile_store
+
+
+class MetricsPermission(BasePermission):
+    """Staff users, or scrapers sending "Authorization: Bearer <METRICS_TOKEN>"."""
+
+    def has_permission(self, request, view):
+        token = settings.METRICS_TOKEN
+        if token:
+            keyword, _, supplied = request.META.get("HTTP_AUTHORIZATION", "").partition(" ")
+            if keyword.lower() == "bearer" and hmac.compare_digest(supplied.strip().encode(), token.encode()):
+                return True
+        return bool(request.user and request.user.is_staff)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class MetricsAPIView(APIView):
+    """
+    Prometheus metrics of every process sharing METRICS_DIR (or of this process).
+
+    GET /metrics
+    """
+    permission_classes = [MetricsPermission]
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(exposition(), content_type=CONTENT_TYPE)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ProfileListAPIView(APIView):
+    """
+    Stored request profiles, newest first, without their stacks and statements (staff only).
+
+    GET /api/profiles/
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(list(profile_store().summaries()), status=status.HTTP_200_OK)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ProfileDetailAPIView(APIView):
+    """
+    One stored request profile (staff only).
+
+    GET /api/profiles/<id>/                 JSON with stacks and SQL statements
+    GET /api/profiles/<id>/?output=folded   folded stacks for flamegraph.pl or speedscope
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, profile_id, *args, **kwargs):
+        try:
+            profile = profile_store().load(profile_id)
+        except KeyError:
+            return Response({"status": "error", "message": "Profile not found"}, status=status.HTTP_404_NOT_FOUND)
+        if request.query_params.get("output") == "folded":
+            return HttpResponse(folded(profile), content_type="text/plain; charset=utf-8")
+        return Response(profile, status=status.HTTP_200_OK)
@@ -4,6 +4,7 @@ Django settings for EduGraph backend.
 """
 
 import os
+import tempfile
 from pathlib import Path
 from decouple import config, Csv
 from dotenv import load_dotenv
@@ -63,6 +64,10 @@ STORAGES = {
     'staticfiles': {
         'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
     },
+    # processed profile pictures (backend/users/pictures.py)
+    'profile_pictures': {
+        'BACKEND': config('PROFILE_PICTURE_STORAGE', default='cloudinary_storage.storage.MediaCloudinaryStorage'),
+    },
 }
 
 # Compatibility setting for older django-cloudinary-storage versions
@@ -71,7 +76,21 @@ STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
 
 MEDIA_URL = '/media/'
 
+# Profile picture uploads: raw files wait here (local disk) until resized to
+# PROFILE_PICTURE_SIZE px and re-encoded as JPEG for the profile_pictures storage
+PROFILE_PICTURE_UPLOAD_DIR = config('PROFILE_PICTURE_UPLOAD_DIR', default=str(BASE_DIR / 'media' / 'uploads'))
+PROFILE_PICTURE_MAX_BYTES = config('PROFILE_PICTURE_MAX_BYTES', default=5 * 1024 * 1024, cast=int)
+PROFILE_PICTURE_SIZE = config('PROFILE_PICTURE_SIZE', default=512, cast=int)
+PROFILE_PICTURE_QUALITY = config('PROFILE_PICTURE_QUALITY', default=85, cast=int)
+# uploads that fail for a transient reason (storage or database errors) are
+# retried with a delay of PROFILE_PICTURE_RETRY_DELAY seconds doubling per attempt
+PROFILE_PICTURE_MAX_ATTEMPTS = config('PROFILE_PICTURE_MAX_ATTEMPTS', default=6, cast=int)
+PROFILE_PICTURE_RETRY_DELAY = config('PROFILE_PICTURE_RETRY_DELAY', default=30, cast=int)
+PROFILE_PICTURE_RETRY_MAX_DELAY = config('PROFILE_PICTURE_RETRY_MAX_DELAY', default=3600, cast=int)
+
 MIDDLEWARE = [
+    'backend.common.middleware.ServerTimingMiddleware',
+    'backend.common.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -80,6 +99,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'backend.common.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -139,7 +159,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'backend.users.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -153,6 +173,31 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 100,
 }
 
+# Caches: per-process by default; REDIS_URL adds a "shared" cache used across workers
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES['shared'] = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': REDIS_URL}
+
+# Token -> user lookups cached by CachedTokenAuthentication (seconds, entries per worker)
+TOKEN_AUTH_CACHE_TTL = config('TOKEN_AUTH_CACHE_TTL', default=30, cast=int)
+TOKEN_AUTH_CACHE_SIZE = config('TOKEN_AUTH_CACHE_SIZE', default=10000, cast=int)
+TOKEN_AUTH_SHARED_CACHE = 'shared' if REDIS_URL else None
+
+# Login token buckets ("N/period": bucket of N attempts refilled over the period)
+LOGIN_THROTTLE_RATES = {
+    'ip': config('LOGIN_THROTTLE_IP_RATE', default='30/min'),
+    'email': config('LOGIN_THROTTLE_EMAIL_RATE', default='10/min'),
+}
+LOGIN_THROTTLE_MAX_BUCKETS = config('LOGIN_THROTTLE_MAX_BUCKETS', default=100000, cast=int)
+LOGIN_THROTTLE_SHARED_CACHE = 'shared' if REDIS_URL else None
+
+# Rendered /api/users/me/ bodies (seconds, entries); shared as well when REDIS_URL is set
+USER_CACHE_TTL = config('USER_CACHE_TTL', default=30, cast=int)
+USER_CACHE_SIZE = config('USER_CACHE_SIZE', default=10000, cast=int)
+
 # CORS settings (dev: allow Vite; prod: restrict origins)
 CORS_ALLOW_ALL_ORIGINS = DEBUG
 CORS_ALLOW_CREDENTIALS = True
@@ -173,8 +218,91 @@ CSRF_USE_SESSIONS = False  # Use cookies instead of sessions for CSRF tokens
 CSRF_COOKIE_SAMESITE = 'Lax'
 
 # Email settings (for development - console backend)
-EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = config('EMAIL_HOST', default='localhost')
+EMAIL_PORT = config('EMAIL_PORT', default=25, cast=int)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=False, cast=bool)
 DEFAULT_FROM_EMAIL = 'noreply@edugraph.com'
 
+# Lifetime of verification codes and password reset links (python manage.py purge_expired_tokens removes them)
+VERIFICATION_CODE_TTL_MINUTES = config('VERIFICATION_CODE_TTL_MINUTES', default=30, cast=int)
+PASSWORD_RESET_TTL_MINUTES = config('PASSWORD_RESET_TTL_MINUTES', default=30, cast=int)
+
+# Links in emails (password reset) point here
+FRONTEND_URL = config('FRONTEND_URL', default=config('FRONTEND_ORIGIN', default='http://localhost:5173'))
+
+# Email outbox (python manage.py send_outbox): emails per SMTP connection, and
+# retries with a delay of OUTBOX_RETRY_DELAY seconds doubling per attempt
+OUTBOX_BATCH_SIZE = config('OUTBOX_BATCH_SIZE', default=50, cast=int)
+OUTBOX_MAX_ATTEMPTS = config('OUTBOX_MAX_ATTEMPTS', default=6, cast=int)
+OUTBOX_RETRY_DELAY = config('OUTBOX_RETRY_DELAY', default=30, cast=int)
+OUTBOX_RETRY_MAX_DELAY = config('OUTBOX_RETRY_MAX_DELAY', default=3600, cast=int)
+
 # Add path for curriculum data files
 CURRICULUM_DIR = BASE_DIR / 'data' / 'curriculum'
+
+# Curriculum served when a request does not pass ?curriculum=<slug|subject>
+DEFAULT_CURRICULUM = config('DEFAULT_CURRICULUM', default='matematik/matematik_kazanimlari_124_154')
+
+# Upper bound for built graphs kept in memory per process (LRU eviction)
+GRAPH_CACHE_MAX_BYTES = config('GRAPH_CACHE_MAX_BYTES', default=256 * 1024 * 1024, cast=int)
+
+# Hold cached graphs as array-backed columns instead of per-node dicts
+GRAPH_COMPACT_STORE = config('GRAPH_COMPACT_STORE', default=False, cast=bool)
+
+# Precompiled curriculum artifacts (python manage.py compile_curricula)
+CURRICULUM_ARTIFACT_DIR = config('CURRICULUM_ARTIFACT_DIR', default=str(BASE_DIR / 'data' / 'compiled'))
+
+# Load every curriculum when the app starts instead of on first request
+GRAPH_PRELOAD = config('GRAPH_PRELOAD', default=False, cast=bool)
+
+# Compute force layout positions during preload/warm-up (?layout=1 serves nodes without x/y until they exist)
+GRAPH_WARM_LAYOUT = config('GRAPH_WARM_LAYOUT', default=True, cast=bool)
+
+# Serve the async views (set by backend/asgi.py); blocking work runs in bounded pools
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
+ASYNC_POOL_SIZES = {
+    'default': config('ASYNC_POOL_SIZE', default=16, cast=int),
+    'graph': config('ASYNC_GRAPH_POOL_SIZE', default=4, cast=int),
+    # concurrent password hashes per process (login)
+    'auth': config('PASSWORD_HASH_POOL_SIZE', default=2, cast=int),
+}
+# Logins waiting for or running a password check before further ones get 429; seconds to wait for one
+PASSWORD_HASH_QUEUE = config('PASSWORD_HASH_QUEUE', default=32, cast=int)
+PASSWORD_HASH_TIMEOUT = config('PASSWORD_HASH_TIMEOUT', default=10, cast=int)
+
+# Per-request phase timings: Server-Timing/X-Request-ID headers and one JSON log line per request
+SERVER_TIMING = config('SERVER_TIMING', default=False, cast=bool)
+
+# Prometheus metrics at /metrics: per-view request histograms, graph builds and sizes, caches, email
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+# Directory shared by the processes to aggregate (gunicorn workers, mailer); empty = this process only
+METRICS_DIR = config('METRICS_DIR', default='')
+# Seconds between snapshots written to METRICS_DIR; files older than METRICS_STALE_AFTER are archived
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5, cast=float)
+METRICS_STALE_AFTER = config('METRICS_STALE_AFTER', default=60, cast=float)
+# Bearer token for scrapers; without one /metrics is staff-only
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Staff-only request profiles ("X-Profile: 1" header or "?profile=1"): stack samples plus SQL statements
+PROFILING_ENABLED = config('PROFILING_ENABLED', default=True, cast=bool)
+# Where profiles are kept (newest PROFILE_KEEP only) and the sampling interval in seconds
+PROFILE_DIR = config('PROFILE_DIR', default=os.path.join(tempfile.gettempdir(), 'edugraph-profiles'))
+PROFILE_KEEP = config('PROFILE_KEEP', default=50, cast=int)
+PROFILE_INTERVAL = config('PROFILE_INTERVAL', default=0.001, cast=float)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'timing': {'class': 'logging.StreamHandler', 'formatter': 'message'},
+    },
+    'loggers': {
+        'backend.timing': {'handlers': ['timing'], 'level': 'INFO', 'propagate': False},
+    },
+}
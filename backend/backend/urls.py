@@ -8,10 +8,15 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from backend.common.views import MetricsAPIView, ProfileDetailAPIView, ProfileListAPIView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('backend.artifacts.urls')),
     path('api/users/', include('backend.users.urls')),
+    path('metrics', MetricsAPIView.as_view(), name='metrics'),
+    path('api/profiles/', ProfileListAPIView.as_view(), name='profile-list'),
+    path('api/profiles/<str:profile_id>/', ProfileDetailAPIView.as_view(), name='profile-detail'),
 ]
 
 # Serve static files in development
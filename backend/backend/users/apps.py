@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+Django users app configuration.
+"""
+
+from django.apps import AppConfig
+
+
+class UsersConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'backend.users'
+    verbose_name = 'EduGraph Users'
+
+    def ready(self):
+        from django.conf import settings
+        from backend.users import metrics, signals  # noqa: F401
+        from backend.users.authentication import token_cache
+        from backend.users.cache import user_representation_cache
+        from backend.users.throttling import login_buckets
+
+        token_cache.configure(settings.TOKEN_AUTH_CACHE_SIZE, settings.TOKEN_AUTH_CACHE_TTL,
+                              settings.TOKEN_AUTH_SHARED_CACHE)
+        user_representation_cache.configure(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL,
+                                            settings.TOKEN_AUTH_SHARED_CACHE)
+        login_buckets.configure(settings.LOGIN_THROTTLE_MAX_BUCKETS, settings.LOGIN_THROTTLE_SHARED_CACHE)
+        metrics.install()
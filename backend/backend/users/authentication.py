@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Token authentication with cached token -> user lookups.
+
+DRF's TokenAuthentication runs a Token + User join for every request.
+CachedTokenAuthentication keeps the result in an in-process TTL+LRU cache
+and, when TOKEN_AUTH_SHARED_CACHE names a Django cache (e.g. Redis), in a
+cache shared by all workers.
+
+Entries are dropped explicitly (see backend/users/signals.py) when a token
+is deleted (logout) and whenever its user is saved, which covers password
+changes/resets and is_active changes. Other worker processes only see the
+invalidation through the shared cache; their in-process copies expire after
+TOKEN_AUTH_CACHE_TTL seconds at the latest, so keep that short.
+"""
+
+import copy
+import threading
+from typing import Dict, Optional, Set, Tuple
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from backend.common.cache import TTLCache, shared_cache
+from src.utils.timing import annotate, phase
+
+SHARED_KEY_PREFIX = "authtoken:"
+
+
+class TokenUserCache:
+    """Two-level cache of token key -> (user, token) with per-user invalidation."""
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 60.0, shared_alias: Optional[str] = None):
+        self.configure(max_entries, ttl, shared_alias)
+
+    def configure(self, max_entries: int, ttl: float, shared_alias: Optional[str] = None) -> None:
+        self.local = TTLCache(max_entries, ttl)
+        self.shared = shared_cache(shared_alias)
+        self.ttl = ttl
+        self._keys_by_user: Dict[object, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.shared_hits = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[Tuple[object, Token]]:
+        """Return (user, token) for a cached key; the user is a copy the caller may modify."""
+        item = self.local.get(key)
+        if item is None and self.shared is not None:
+            item = self.shared.get(SHARED_KEY_PREFIX + key)
+            if item is not None:
+                with self._lock:
+                    self.shared_hits += 1
+                self._store_local(key, item)
+        if item is None:
+            return None
+        user, token = item
+        # request handlers mutate request.user; never hand out the cached instance
+        return copy.copy(user), token
+
+    def set(self, key: str, user, token: Token) -> None:
+        self._store_local(key, (user, token))
+        if self.shared is not None:
+            self.shared.set(SHARED_KEY_PREFIX + key, (user, token), self.ttl)
+
+    def _store_local(self, key: str, item: Tuple[object, Token]) -> None:
+        self.local.set(key, item)
+        with self._lock:
+            self._keys_by_user.setdefault(item[0].pk, set()).add(key)
+
+    def invalidate_key(self, key: str) -> None:
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(SHARED_KEY_PREFIX + key)
+        with self._lock:
+            self.invalidations += 1
+            for keys in self._keys_by_user.values():
+                keys.discard(key)
+
+    def invalidate_user(self, user_pk) -> None:
+        """Drop every cached token of a user (local index plus the user's current token)."""
+        with self._lock:
+            keys = self._keys_by_user.pop(user_pk, set())
+        keys.update(Token.objects.filter(user_id=user_pk).values_list("key", flat=True))
+        for key in keys:
+            self.local.delete(key)
+        if self.shared is not None and keys:
+            self.shared.delete_many([SHARED_KEY_PREFIX + key for key in keys])
+        with self._lock:
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self.local.clear()
+        with self._lock:
+            self._keys_by_user.clear()
+            self.shared_hits = self.invalidations = 0
+
+    def stats(self) -> Dict[str, object]:
+        local = self.local.stats()
+        with self._lock:
+            hits = local["hits"] + self.shared_hits
+            lookups = local["hits"] + local["misses"]
+            return {
+                "hits": hits,
+                "local_hits": local["hits"],
+                "shared_hits": self.shared_hits,
+                "misses": lookups - hits,
+                "invalidations": self.invalidations,
+                "evictions": local["evictions"],
+                "entries": local["entries"],
+                "hit_rate": round(hits / lookups, 4) if lookups else None,
+                "shared": self.shared is not None,
+            }
+
+
+# Configured from settings in UsersConfig.ready()
+token_cache = TokenUserCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that serves repeat tokens from token_cache."""
+
+    def authenticate_credentials(self, key):
+        with phase("auth"):
+            cached = token_cache.get(key)
+            annotate(auth_cache="miss" if cached is None else "hit")
+            if cached is not None:
+                return cached
+            # raises AuthenticationFailed for unknown tokens and inactive users; those are not cached
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, user, token)
+            return user, token
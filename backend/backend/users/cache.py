@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Cached GET /api/users/me/ representation.
+
+The rendered UserSerializer body is kept per user as an EncodedPayload
+(ETag, compressed variants) together with the time it was built, which is
+sent as Last-Modified. Entries are dropped whenever the user is saved
+(backend/users/signals.py), e.g. by PUT/PATCH on /me/ or a profile picture
+update.
+
+Without a shared cache entries live in the worker for USER_CACHE_TTL
+seconds at most, which bounds how long another worker can serve a stale
+profile. With REDIS_URL set the bodies are kept only in the shared cache,
+so an invalidation is seen by every worker at once.
+"""
+
+import time
+from typing import Dict, Optional, Tuple
+
+from rest_framework.renderers import JSONRenderer
+
+from backend.common.cache import TTLCache, shared_cache
+from src.utils.payload import EncodedPayload
+
+SHARED_KEY_PREFIX = "userme:"
+
+
+class UserRepresentationCache:
+    """user pk -> (EncodedPayload, last_modified timestamp)."""
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 30.0, shared_alias: Optional[str] = None):
+        self.configure(max_entries, ttl, shared_alias)
+
+    def configure(self, max_entries: int, ttl: float, shared_alias: Optional[str] = None) -> None:
+        self.local = TTLCache(max_entries, ttl)
+        self.shared = shared_cache(shared_alias)
+        self.ttl = ttl
+
+    def get(self, user_pk) -> Optional[Tuple[EncodedPayload, int]]:
+        if self.shared is None:
+            return self.local.get(user_pk)
+        item = self.shared.get(SHARED_KEY_PREFIX + str(user_pk))
+        self.local.record(hit=item is not None)
+        if item is None:
+            return None
+        body, last_modified = item
+        return EncodedPayload(body), last_modified
+
+    def set(self, user_pk, data) -> Tuple[EncodedPayload, int]:
+        """Render serializer data like DRF's JSONRenderer and cache it."""
+        payload = EncodedPayload(JSONRenderer().render(data))
+        last_modified = int(time.time())
+        if self.shared is None:
+            self.local.set(user_pk, (payload, last_modified))
+        else:
+            self.shared.set(SHARED_KEY_PREFIX + str(user_pk), (payload.body, last_modified), self.ttl)
+        return payload, last_modified
+
+    def invalidate(self, user_pk) -> None:
+        self.local.delete(user_pk)
+        if self.shared is not None:
+            self.shared.delete(SHARED_KEY_PREFIX + str(user_pk))
+
+    def clear(self) -> None:
+        self.local.clear()
+
+    def stats(self) -> Dict[str, object]:
+        return {**self.local.stats(), "shared": self.shared is not None}
+
+
+# Configured from settings in UsersConfig.ready()
+user_representation_cache = UserRepresentationCache()
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+Process profile picture uploads that were not handled by the web worker
+(e.g. because it restarted before its background job ran).
+
+    python manage.py process_profile_pictures --once
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend.users.pictures import process_pending
+
+
+class Command(BaseCommand):
+    help = "Resize, deduplicate and store pending profile picture uploads"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Process what is pending, then exit")
+        parser.add_argument("--interval", type=float, default=30.0,
+                            help="Seconds between checks (worker mode)")
+
+    def handle(self, *args, **options):
+        total = 0
+        try:
+            while True:
+                handled = process_pending()
+                total += handled
+                if not handled:
+                    if options["once"]:
+                        break
+                    time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"{total} profile picture uploads processed"))
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+Delete expired verification codes and password reset tokens.
+
+    python manage.py purge_expired_tokens                  # e.g. hourly from cron
+    python manage.py purge_expired_tokens --dry-run        # only count them
+
+Rows are deleted in chunks of --batch-size, each chunk in its own short
+transaction, so the tables are never locked for long.
+"""
+
+from django.core.management.base import BaseCommand
+
+from backend.users.models import PasswordResetToken, VerificationCode
+
+
+class Command(BaseCommand):
+    help = "Delete expired verification codes and password reset tokens in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows deleted per transaction")
+        parser.add_argument("--sleep", type=float, default=0.0, help="Seconds to pause between batches")
+        parser.add_argument("--dry-run", action="store_true", help="Report how many rows are expired")
+
+    def handle(self, *args, **options):
+        for model, label in ((VerificationCode, "verification codes"), (PasswordResetToken, "password reset tokens")):
+            if options["dry_run"]:
+                self.stdout.write(f"{model.objects.expired().count()} expired {label}")
+                continue
+            deleted = model.objects.purge_expired(options["batch_size"], options["sleep"])
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired {label}"))
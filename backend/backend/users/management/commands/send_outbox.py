@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Send queued transactional emails (verification codes, password resets).
+
+    python manage.py send_outbox            # run as a worker
+    python manage.py send_outbox --once     # drain what is due now and exit (cron)
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from backend.users.outbox import send_batch
+
+
+class Command(BaseCommand):
+    help = "Send pending emails from the outbox in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Send everything that is due, then exit")
+        parser.add_argument("--batch-size", type=int, default=settings.OUTBOX_BATCH_SIZE,
+                            help="Emails per connection")
+        parser.add_argument("--interval", type=float, default=2.0,
+                            help="Seconds to wait when the outbox is empty (worker mode)")
+
+    def handle(self, *args, **options):
+        totals = {"sent": 0, "retried": 0, "failed": 0}
+        try:
+            while True:
+                stats = send_batch(options["batch_size"])
+                for key in totals:
+                    totals[key] += stats[key]
+                if stats["claimed"]:
+                    self.stdout.write(f"Sent {stats['sent']}, retrying {stats['retried']}, "
+                                      f"failed {stats['failed']}")
+                if stats["claimed"] < options["batch_size"]:
+                    if options["once"]:
+                        break
+                    time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{totals['sent']} emails sent ({totals['retried']} to retry, {totals['failed']} failed)"
+        ))
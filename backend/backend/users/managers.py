@@ -1,6 +1,11 @@
+import time
+from datetime import timedelta
+
 from django.contrib.auth.base_user import BaseUserManager
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.utils import timezone
 
 
 class UserManager(BaseUserManager):
@@ -54,3 +59,87 @@ class UserManager(BaseUserManager):
             user.set_password(password)
         user.save(using=self._db)
         return user
+
+
+class OutboxEmailManager(models.Manager):
+    """Custom manager for OutboxEmail."""
+
+    def enqueue(self, template: str, to: str, **context):
+        """Queue an email for the send_outbox worker; this is all a request handler does."""
+        return self.create(template=template, to=to, context=context)
+
+    def claim(self, limit: int, lease: timedelta):
+        """
+        Claim up to limit due emails for one worker.
+
+        Claimed rows are pushed lease into the future, so concurrent workers
+        skip them and a crashed worker's batch becomes due again afterwards.
+        Rows locked by another worker are skipped (SKIP LOCKED where supported).
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            ids = list(
+                self.select_for_update(skip_locked=True)
+                .filter(status=self.model.PENDING, next_attempt_at__lte=now)
+                .order_by("next_attempt_at")
+                .values_list("pk", flat=True)[:limit]
+            )
+            self.filter(pk__in=ids).update(next_attempt_at=now + lease)
+        return list(self.filter(pk__in=ids).order_by("created_at"))
+
+
+class ProfilePictureUploadManager(models.Manager):
+    """Custom manager for ProfilePictureUpload."""
+
+    def claim(self, pk):
+        """
+        Mark one due pending upload as processing. Returns the claim's
+        started_at, or None if another worker got it first.
+        """
+        now = timezone.now()
+        claimed = self.filter(pk=pk, status=self.model.PENDING, next_attempt_at__lte=now).update(
+            status=self.model.PROCESSING, started_at=now
+        )
+        return now if claimed else None
+
+    def claimed(self, pk, started_at):
+        """The upload while this claim still holds it (not requeued and claimed again)."""
+        return self.filter(pk=pk, status=self.model.PROCESSING, started_at=started_at)
+
+    def requeue_stale(self, older_than: timedelta) -> int:
+        """Put uploads whose worker died while processing them back to pending."""
+        return self.filter(
+            status=self.model.PROCESSING, started_at__lt=timezone.now() - older_than
+        ).update(status=self.model.PENDING)
+
+
+class ExpiringQuerySet(models.QuerySet):
+    """QuerySet for rows with an expires_at column (verification codes, reset tokens)."""
+
+    def valid(self):
+        return self.filter(expires_at__gt=timezone.now())
+
+    def expired(self):
+        return self.filter(expires_at__lte=timezone.now())
+
+    def purge_expired(self, batch_size: int = 1000, pause: float = 0.0) -> int:
+        """
+        Delete expired rows in chunks of batch_size, each in its own short
+        transaction, optionally sleeping pause seconds in between so other
+        writers are not blocked. Uses the (expires_at, id) index. Returns the
+        number of rows deleted.
+        """
+        deleted = 0
+        while True:
+            with transaction.atomic():
+                ids = list(self.expired().order_by("expires_at").values_list("pk", flat=True)[:batch_size])
+                if not ids:
+                    return deleted
+                deleted += self.model._base_manager.filter(pk__in=ids).delete()[0]
+            if len(ids) < batch_size:
+                return deleted
+            if pause:
+                time.sleep(pause)
+
+
+ExpiringManager = models.Manager.from_queryset(ExpiringQuerySet)
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+User metrics: token and user caches, login outcomes and email sending.
+
+Registered in UsersConfig.ready(); see backend/common/metrics.py.
+"""
+
+from backend.common.metrics import CACHE_REQUESTS, registry
+from backend.users.authentication import token_cache
+from backend.users.cache import user_representation_cache
+from backend.users.throttling import LoginMetrics, login_metrics
+
+EMAIL_SEND_SECONDS = registry.histogram(
+    "edugraph_email_send_seconds", "Time to hand one outbox email to the mail server", ["result"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+LOGINS = registry.counter("edugraph_logins_total", "Login attempts by outcome", ["outcome"])
+
+
+def collect_users() -> None:
+    for name, cache in (("token", token_cache), ("user", user_representation_cache)):
+        stats = cache.stats()
+        CACHE_REQUESTS.track(stats["hits"], cache=name, result="hit")
+        CACHE_REQUESTS.track(stats["misses"], cache=name, result="miss")
+    counts = login_metrics.snapshot()
+    for outcome in LoginMetrics.FIELDS:
+        if outcome != "served":
+            LOGINS.track(counts[outcome], outcome=outcome)
+
+
+def install() -> None:
+    registry.add_collector(collect_users)
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_outboxemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64, unique=True, verbose_name='SHA-256')),
+                ('name', models.CharField(max_length=255, verbose_name='Storage Name')),
+                ('size', models.PositiveIntegerField(verbose_name='Size (bytes)')),
+                ('width', models.PositiveIntegerField(blank=True, null=True, verbose_name='Width')),
+                ('height', models.PositiveIntegerField(blank=True, null=True, verbose_name='Height')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Creation Date')),
+            ],
+            options={
+                'verbose_name': 'Profile Image',
+                'verbose_name_plural': 'Profile Images',
+            },
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='profile_image',
+            field=models.ForeignKey(blank=True, help_text='Processed profile picture; takes precedence over profile_picture', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='users.profileimage'),
+        ),
+        migrations.CreateModel(
+            name='ProfilePictureUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=255, verbose_name='Temporary File')),
+                ('size', models.PositiveIntegerField(verbose_name='Size (bytes)')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10, verbose_name='Status')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Upload Date')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Processing Started')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='profile_picture_uploads', to=settings.AUTH_USER_MODEL, verbose_name='Uploaded By')),
+            ],
+            options={
+                'verbose_name': 'Profile Picture Upload',
+                'verbose_name_plural': 'Profile Picture Uploads',
+                'indexes': [models.Index(fields=['status', 'created_at'], name='picture_upload_status_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:32
+
+import backend.users.models
+import uuid
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_expiry(apps, schema_editor):
+    # existing rows expired 30 minutes after creation (the former is_expired rule)
+    for model_name in ("VerificationCode", "PasswordResetToken"):
+        model = apps.get_model("users", model_name)
+        model.objects.update(expires_at=F("created_at") + timedelta(minutes=30))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_profile_picture_pipeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='passwordresettoken',
+            name='expires_at',
+            field=models.DateTimeField(default=backend.users.models.password_reset_expiry, verbose_name='Token Expiry Date'),
+        ),
+        migrations.AddField(
+            model_name='verificationcode',
+            name='expires_at',
+            field=models.DateTimeField(default=backend.users.models.verification_code_expiry, verbose_name='Code Expiry Date'),
+        ),
+        migrations.RunPython(backfill_expiry, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='passwordresettoken',
+            name='token',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name='Reset Token'),
+        ),
+        migrations.AddIndex(
+            model_name='passwordresettoken',
+            index=models.Index(fields=['expires_at', 'id'], name='reset_token_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='verificationcode',
+            index=models.Index(fields=['expires_at', 'id'], name='verification_code_expiry_idx'),
+        ),
+    ]
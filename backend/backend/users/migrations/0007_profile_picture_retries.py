@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:27
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_token_expiry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profilepictureupload',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Attempts'),
+        ),
+        migrations.AddField(
+            model_name='profilepictureupload',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Next Attempt'),
+        ),
+    ]
@@ -4,19 +4,16 @@ import uuid
 import requests
 from dateutil.relativedelta import relativedelta
 from django.contrib.auth.base_user import AbstractBaseUser
+from django.conf import settings
 from django.contrib.auth.models import PermissionsMixin
-from django.core.mail import send_mail
+from django.core.files.storage import storages
 from django.db import models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from cloudinary.models import CloudinaryField
 
-from backend.users.managers import UserManager
-from backend.users.utils import (
-    generate_verification_code,
-    get_password_reset_email_template,
-    get_verification_email_template,
-)
+from backend.users.managers import ExpiringManager, OutboxEmailManager, ProfilePictureUploadManager, UserManager
+from backend.users.utils import EMAIL_TEMPLATES, generate_verification_code
 
 
 class User(AbstractBaseUser, PermissionsMixin):
@@ -49,6 +46,10 @@ class User(AbstractBaseUser, PermissionsMixin):
     track = models.CharField("Track", max_length=10, choices=TRACK_CHOICES, null=True, blank=True, help_text="Academic track (LGS, Sayısal, Sözel)")
     profile_completed = models.BooleanField(default=False, help_text="Whether user has completed their profile information")
     profile_picture = CloudinaryField('profile_picture', null=True, blank=True, folder='profile_pictures', help_text="User's profile picture")
+    profile_image = models.ForeignKey(
+        "ProfileImage", on_delete=models.SET_NULL, null=True, blank=True, related_name="+",
+        help_text="Processed profile picture; takes precedence over profile_picture"
+    )
 
     USERNAME_FIELD = "email"
 
@@ -56,50 +57,157 @@ class User(AbstractBaseUser, PermissionsMixin):
 
 
 
+def verification_code_expiry():
+    return timezone.now() + timezone.timedelta(minutes=settings.VERIFICATION_CODE_TTL_MINUTES)
+
+
+def password_reset_expiry():
+    return timezone.now() + timezone.timedelta(minutes=settings.PASSWORD_RESET_TTL_MINUTES)
+
+
 class VerificationCode(models.Model):
     user = models.OneToOneField(
         User, on_delete=models.CASCADE, related_name="verification_code", verbose_name="Verification Code Owner"
     )
     code = models.CharField("Verification Code", max_length=6, default=generate_verification_code)
     created_at = models.DateTimeField("Code Creation Date", auto_now_add=True)
+    expires_at = models.DateTimeField("Code Expiry Date", default=verification_code_expiry)
+
+    objects = ExpiringManager()
+
+    class Meta:
+        # purge_expired_tokens: index-only scan for expired ids (lookups use the unique user index)
+        indexes = [models.Index(fields=["expires_at", "id"], name="verification_code_expiry_idx")]
 
     @property
     def is_expired(self):
-        return timezone.now() > self.created_at + timezone.timedelta(minutes=30)
+        return timezone.now() >= self.expires_at
 
     def send(self):
-        subject = "Your Verification Code"
-
-        # Get both plain text and HTML versions of the message
-        plain_text_message, html_message = get_verification_email_template(self.user.name, self.code)
-
-        recipient_list = [self.user.email]
-        send_mail(subject, plain_text_message, None, recipient_list, html_message=html_message)
+        # Delivered by the send_outbox worker
+        OutboxEmail.objects.enqueue("verification", self.user.email, user_name=self.user.name, code=self.code)
 
 
 class PasswordResetToken(models.Model):
     user = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="password_reset_tokens", verbose_name="Password Reset Token Owner"
     )
-    token = models.UUIDField("Reset Token", default=uuid.uuid4, editable=False)
+    token = models.UUIDField("Reset Token", default=uuid.uuid4, editable=False, unique=True)
     created_at = models.DateTimeField("Token Creation Date", auto_now_add=True)
+    expires_at = models.DateTimeField("Token Expiry Date", default=password_reset_expiry)
+
+    objects = ExpiringManager()
 
     @property
     def is_expired(self):
-        return timezone.now() > self.created_at + timezone.timedelta(minutes=30)
-
-    # def send(self):
-    #     subject = "Reset Your Password"
-    #     reset_url = f"{FRONTEND_URL}/reset-password?token={self.token}"
-#
-    #     # Get both plain text and HTML versions of the message
-    #     plain_text_message, html_message = get_password_reset_email_template(self.user.name, reset_url)
-#
-    #     recipient_list = [self.user.email]
-    #     send_mail(subject, plain_text_message, None, recipient_list, html_message=html_message)
+        return timezone.now() >= self.expires_at
+
+    def send(self):
+        # Delivered by the send_outbox worker
+        reset_url = f"{settings.FRONTEND_URL}/reset-password?token={self.token}"
+        OutboxEmail.objects.enqueue("password_reset", self.user.email, user_name=self.user.name, reset_url=reset_url)
 
     class Meta:
         verbose_name = "Password Reset Token Owner"
         verbose_name_plural = "Password Reset Token Owners"
         ordering = ["-created_at"]
         constraints = [models.UniqueConstraint(fields=["user"], name="unique_user_reset_token")]
+        # purge_expired_tokens: index-only scan for expired ids
+        indexes = [models.Index(fields=["expires_at", "id"], name="reset_token_expiry_idx")]
+
+
+class OutboxEmail(models.Model):
+    """
+    A transactional email waiting to be sent by the send_outbox worker.
+    Stores the template name and its context; the body is rendered at send time.
+    """
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (SENT, "Sent"),
+        (FAILED, "Failed"),
+    ]
+    TEMPLATE_CHOICES = [(name, name) for name in EMAIL_TEMPLATES]
+
+    to = models.EmailField("Recipient")
+    template = models.CharField("Template", max_length=50, choices=TEMPLATE_CHOICES)
+    context = models.JSONField("Template Context", default=dict)
+    status = models.CharField("Status", max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField("Attempts", default=0)
+    next_attempt_at = models.DateTimeField("Next Attempt", default=timezone.now)
+    last_error = models.TextField("Last Error", blank=True)
+    created_at = models.DateTimeField("Creation Date", auto_now_add=True)
+    sent_at = models.DateTimeField("Sent Date", null=True, blank=True)
+
+    objects = OutboxEmailManager()
+
+    class Meta:
+        verbose_name = "Outbox Email"
+        verbose_name_plural = "Outbox Emails"
+        # the worker's "due pending emails" query
+        indexes = [models.Index(fields=["status", "next_attempt_at"], name="outbox_due_idx")]
+
+    def __str__(self):
+        return f"{self.template} to {self.to} ({self.status})"
+
+
+class ProfileImage(models.Model):
+    """
+    A processed (resized, metadata-free) profile picture in the "profile_pictures"
+    storage. Stored once per distinct content and shared by every user who uploads it.
+    """
+    content_hash = models.CharField("SHA-256", max_length=64, unique=True)
+    name = models.CharField("Storage Name", max_length=255)
+    size = models.PositiveIntegerField("Size (bytes)")
+    width = models.PositiveIntegerField("Width", null=True, blank=True)
+    height = models.PositiveIntegerField("Height", null=True, blank=True)
+    created_at = models.DateTimeField("Creation Date", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Profile Image"
+        verbose_name_plural = "Profile Images"
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def url(self):
+        return storages["profile_pictures"].url(self.name)
+
+
+class ProfilePictureUpload(models.Model):
+    """A raw profile picture upload in local temporary storage, waiting to be processed."""
+    PENDING = "pending"
+    PROCESSING = "processing"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (PROCESSING, "Processing"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="profile_picture_uploads", verbose_name="Uploaded By"
+    )
+    path = models.CharField("Temporary File", max_length=255)
+    size = models.PositiveIntegerField("Size (bytes)")
+    status = models.CharField("Status", max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    error = models.TextField("Error", blank=True)
+    attempts = models.PositiveSmallIntegerField("Attempts", default=0)
+    next_attempt_at = models.DateTimeField("Next Attempt", default=timezone.now)
+    created_at = models.DateTimeField("Upload Date", auto_now_add=True)
+    started_at = models.DateTimeField("Processing Started", null=True, blank=True)
+
+    objects = ProfilePictureUploadManager()
+
+    class Meta:
+        verbose_name = "Profile Picture Upload"
+        verbose_name_plural = "Profile Picture Uploads"
+        indexes = [models.Index(fields=["status", "created_at"], name="picture_upload_status_idx")]
+
+    def __str__(self):
+        return f"{self.user_id} {self.path} ({self.status})"
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Delivery of queued transactional emails (see OutboxEmail).
+
+Request handlers only insert an OutboxEmail row. The send_outbox command
+claims due rows in batches, renders them with the precompiled templates
+from users/utils.py and sends each batch over a single connection of
+EMAIL_BACKEND (one SMTP session instead of one per email). Failed emails
+are retried with exponential backoff until OUTBOX_MAX_ATTEMPTS.
+"""
+
+import logging
+import time
+from datetime import timedelta
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.utils import timezone
+
+from backend.users.metrics import EMAIL_SEND_SECONDS
+from backend.users.models import OutboxEmail
+from backend.users.utils import render_email
+
+logger = logging.getLogger(__name__)
+
+# A claimed batch becomes due again after this long if its worker dies mid-send
+CLAIM_LEASE = timedelta(minutes=5)
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff before the next try after the given number of failed attempts."""
+    seconds = settings.OUTBOX_RETRY_DELAY * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, settings.OUTBOX_RETRY_MAX_DELAY))
+
+
+def build_message(email: OutboxEmail, connection=None) -> EmailMultiAlternatives:
+    subject, plain_text, html = render_email(email.template, email.context)
+    message = EmailMultiAlternatives(subject, plain_text, None, [email.to], connection=connection)
+    message.attach_alternative(html, "text/html")
+    return message
+
+
+def _record_failure(email: OutboxEmail, error: Exception) -> bool:
+    """Schedule a retry or give up; returns True if the email will be retried."""
+    email.attempts += 1
+    email.last_error = f"{type(error).__name__}: {error}"
+    if email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        email.status = OutboxEmail.FAILED
+        logger.error("Giving up on email %s to %s after %d attempts: %s",
+                     email.pk, email.to, email.attempts, email.last_error)
+    else:
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+    email.save(update_fields=["attempts", "last_error", "status", "next_attempt_at"])
+    return email.status == OutboxEmail.PENDING
+
+
+def send_batch(batch_size: Optional[int] = None, connection=None) -> Dict[str, int]:
+    """
+    Send one batch of due emails over one connection.
+    Returns counts of claimed, sent, retried and failed emails.
+    """
+    emails = OutboxEmail.objects.claim(batch_size or settings.OUTBOX_BATCH_SIZE, CLAIM_LEASE)
+    stats = {"claimed": len(emails), "sent": 0, "retried": 0, "failed": 0}
+    if not emails:
+        return stats
+
+    connection = connection or get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        logger.warning("Could not open email connection: %s", e)
+        for email in emails:
+            stats["retried" if _record_failure(email, e) else "failed"] += 1
+        return stats
+
+    try:
+        for email in emails:
+            started = time.perf_counter()
+            try:
+                # one message per call so a refused recipient does not fail the batch
+                connection.send_messages([build_message(email, connection)])
+            except Exception as e:
+                EMAIL_SEND_SECONDS.observe(time.perf_counter() - started, result="error")
+                stats["retried" if _record_failure(email, e) else "failed"] += 1
+                continue
+            EMAIL_SEND_SECONDS.observe(time.perf_counter() - started, result="sent")
+            email.status = OutboxEmail.SENT
+            email.attempts += 1
+            email.sent_at = timezone.now()
+            email.save(update_fields=["status", "attempts", "sent_at"])
+            stats["sent"] += 1
+    finally:
+        connection.close()
+    return stats
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Password verification with a fixed CPU budget.
+
+PBKDF2 is deliberately slow. Login checks run in the bounded "auth" pool
+(ASYNC_POOL_SIZES["auth"], backend/common/executor.py), so at most that
+many hashes are computed at once per process however many requests are
+waiting. At most PASSWORD_HASH_QUEUE checks may be queued or running;
+beyond that, logins are rejected at once instead of piling up.
+"""
+
+import threading
+from concurrent.futures import TimeoutError
+
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from backend.common.executor import submit
+
+
+class PasswordCheckBusy(Exception):
+    """Raised when too many password checks are already queued."""
+
+
+# bounds queued + running checks; created on first use from settings
+_slots = SimpleLazyObject(lambda: threading.BoundedSemaphore(settings.PASSWORD_HASH_QUEUE))
+
+
+def verify_password(user, raw_password: str) -> bool:
+    """user.check_password() in the auth pool; raises PasswordCheckBusy when the queue is full."""
+    if not _slots.acquire(blocking=False):
+        raise PasswordCheckBusy()
+    try:
+        future = submit(user.check_password, raw_password, pool="auth")
+    except BaseException:
+        _slots.release()
+        raise
+    # a check that is already running cannot be cancelled, so its slot is
+    # held until the hash is done, not until this caller gives up on it
+    future.add_done_callback(lambda _: _slots.release())
+    try:
+        return future.result(timeout=settings.PASSWORD_HASH_TIMEOUT)
+    except TimeoutError:
+        future.cancel()
+        raise PasswordCheckBusy()
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+Profile picture pipeline.
+
+PATCH /api/users/me/ only writes the raw upload to local temporary storage
+(PROFILE_PICTURE_UPLOAD_DIR) and records a ProfilePictureUpload. After the
+request commits, process_upload() runs in the bounded "default" pool:
+
+    1. decode, apply the EXIF orientation, resize to fit
+       PROFILE_PICTURE_SIZE and re-encode as JPEG without any metadata
+    2. hash the result; identical pictures are stored once (ProfileImage)
+    3. push new content to the "profile_pictures" storage (Cloudinary in
+       production, the local filesystem in tests) and point the user at it
+
+Pictures that cannot be decoded fail for good. Storage and database errors
+(e.g. a short Cloudinary outage) keep the raw file and put the upload back
+to pending with exponential backoff, up to PROFILE_PICTURE_MAX_ATTEMPTS.
+The process_profile_pictures command retries those and picks up uploads
+whose worker died. Every status write is conditional on the worker's claim,
+so a slow run whose upload was requeued meanwhile changes nothing.
+Without Pillow the upload is stored unmodified (still deduplicated).
+"""
+
+import hashlib
+import io
+import logging
+import os
+import uuid
+from datetime import timedelta
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, storages
+from django.core.signals import setting_changed
+from django.db import IntegrityError, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.functional import LazyObject, empty
+
+from backend.common.executor import submit
+from backend.users.models import ProfileImage, ProfilePictureUpload, User
+
+try:  # optional dependency; without it pictures are stored as uploaded
+    from PIL import Image, ImageOps, UnidentifiedImageError
+except ImportError:  # pragma: no cover - depends on the environment
+    Image = ImageOps = None
+    PERMANENT_ERRORS = ()
+else:
+    # retrying cannot help with these
+    PERMANENT_ERRORS = (UnidentifiedImageError, Image.DecompressionBombError)
+
+logger = logging.getLogger(__name__)
+
+# Uploads still "processing" after this long are assumed lost and retried
+PROCESSING_TIMEOUT = timedelta(minutes=10)
+
+
+class UploadStorage(LazyObject):
+    """Local storage for raw uploads, following PROFILE_PICTURE_UPLOAD_DIR."""
+
+    def _setup(self):
+        self._wrapped = FileSystemStorage(location=settings.PROFILE_PICTURE_UPLOAD_DIR)
+
+
+upload_storage = UploadStorage()
+
+
+@receiver(setting_changed)
+def reset_upload_storage(setting, **kwargs):
+    if setting == "PROFILE_PICTURE_UPLOAD_DIR":
+        upload_storage._wrapped = empty
+
+
+def accept_upload(user: User, uploaded_file) -> ProfilePictureUpload:
+    """
+    Store a raw upload locally and schedule its processing once the current
+    transaction commits. Only local disk I/O happens in the request.
+    """
+    _, ext = os.path.splitext(uploaded_file.name or "")
+    path = upload_storage.save(f"{uuid.uuid4().hex}{ext.lower()[:10]}", uploaded_file)
+    upload = ProfilePictureUpload.objects.create(user=user, path=path, size=uploaded_file.size)
+    transaction.on_commit(lambda: submit(process_upload, upload.pk))
+    return upload
+
+
+def process_image(data: bytes, ext: str = "jpg") -> Tuple[bytes, str, Optional[Tuple[int, int]]]:
+    """
+    Return (jpeg_bytes, extension, (width, height)) for an uploaded picture:
+    EXIF orientation applied, resized to fit PROFILE_PICTURE_SIZE, and no
+    EXIF/ICC/comment metadata in the output.
+    """
+    if Image is None:
+        return data, ext, None
+    size = settings.PROFILE_PICTURE_SIZE
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+        out = io.BytesIO()
+        # a fresh save without exif=/icc_profile= writes no metadata
+        image.save(out, "JPEG", quality=settings.PROFILE_PICTURE_QUALITY, optimize=True, progressive=True)
+        return out.getvalue(), "jpg", image.size
+
+
+def store_image(data: bytes, ext: str, dimensions: Optional[Tuple[int, int]]) -> ProfileImage:
+    """Return the ProfileImage for this content, uploading it only if it is new."""
+    content_hash = hashlib.sha256(data).hexdigest()
+    existing = ProfileImage.objects.filter(content_hash=content_hash).first()
+    if existing is not None:
+        return existing
+
+    name = storages["profile_pictures"].save(f"profile_pictures/{content_hash}.{ext}", ContentFile(data))
+    width, height = dimensions or (None, None)
+    try:
+        with transaction.atomic():
+            return ProfileImage.objects.create(content_hash=content_hash, name=name, size=len(data),
+                                               width=width, height=height)
+    except IntegrityError:
+        # the same picture was stored concurrently
+        return ProfileImage.objects.get(content_hash=content_hash)
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff before the next try after the given number of failed attempts."""
+    seconds = settings.PROFILE_PICTURE_RETRY_DELAY * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, settings.PROFILE_PICTURE_RETRY_MAX_DELAY))
+
+
+def _record_failure(upload: ProfilePictureUpload, started_at, error: Exception) -> bool:
+    """
+    Fail the upload for good or schedule a retry; returns True if the raw file
+    is no longer needed. Does nothing if the claim was lost meanwhile.
+    """
+    attempts = upload.attempts + 1
+    fields = {"attempts": attempts, "error": f"{type(error).__name__}: {error}"}
+    final = isinstance(error, PERMANENT_ERRORS) or attempts >= settings.PROFILE_PICTURE_MAX_ATTEMPTS
+    if final:
+        fields["status"] = ProfilePictureUpload.FAILED
+    else:
+        fields.update(status=ProfilePictureUpload.PENDING, next_attempt_at=timezone.now() + retry_delay(attempts))
+    if not ProfilePictureUpload.objects.claimed(upload.pk, started_at).update(**fields):
+        return False
+    if final:
+        logger.error("Giving up on profile picture upload %s after %d attempts: %s",
+                     upload.pk, attempts, fields["error"])
+    return final
+
+
+def process_upload(upload_pk) -> Optional[ProfileImage]:
+    """Process one pending upload; a no-op if another worker already claimed it."""
+    started_at = ProfilePictureUpload.objects.claim(upload_pk)
+    if started_at is None:
+        return None
+    upload = ProfilePictureUpload.objects.select_related("user").get(pk=upload_pk)
+    finished = False
+    try:
+        with upload_storage.open(upload.path) as fp:
+            data, ext, dimensions = process_image(fp.read(), os.path.splitext(upload.path)[1][1:] or "jpg")
+        image = store_image(data, ext, dimensions)
+
+        with transaction.atomic():
+            if not ProfilePictureUpload.objects.claimed(upload.pk, started_at).update(
+                    status=ProfilePictureUpload.DONE):
+                logger.warning("Profile picture upload %s was requeued while being processed", upload.pk)
+                return None
+            newer = ProfilePictureUpload.objects.filter(user_id=upload.user_id, created_at__gt=upload.created_at)
+            if not newer.exclude(status=ProfilePictureUpload.FAILED).exists():
+                # saving the user invalidates the cached /me/ representation
+                upload.user.profile_image = image
+                upload.user.save(update_fields=["profile_image"])
+        finished = True
+        logger.info("Processed profile picture of %s: %d -> %d bytes", upload.user_id, upload.size, image.size)
+        return image
+    except Exception as e:
+        logger.exception("Could not process profile picture upload %s", upload.pk)
+        finished = _record_failure(upload, started_at, e)
+        return None
+    finally:
+        # kept for the retry, or still in use by the run that now owns the claim
+        if finished:
+            upload_storage.delete(upload.path)
+
+
+def process_pending(limit: int = 100) -> int:
+    """Process pending uploads (and requeue lost ones) in this thread; returns how many were handled."""
+    ProfilePictureUpload.objects.requeue_stale(PROCESSING_TIMEOUT)
+    pending = ProfilePictureUpload.objects.filter(status=ProfilePictureUpload.PENDING,
+                                                  next_attempt_at__lte=timezone.now())
+    handled = 0
+    for pk in pending.order_by("created_at").values_list("pk", flat=True)[:limit]:
+        process_upload(pk)
+        handled += 1
+    return handled
@@ -13,7 +13,9 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ("id", "email", "is_staff", "is_active", "profile_completed", "date_joined")
     
     def get_profile_picture(self, obj):
-        """Return the full Cloudinary URL for the profile picture"""
+        """Return the full URL of the processed or, for older uploads, the Cloudinary profile picture"""
+        if obj.profile_image_id:
+            return obj.profile_image.url
         if obj.profile_picture:
             # Use Cloudinary's build_url to get the full URL
             return obj.profile_picture.url
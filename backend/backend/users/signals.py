@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+Signal handlers of the users app (connected in UsersConfig.ready()).
+"""
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from backend.users.authentication import token_cache
+from backend.users.cache import user_representation_cache
+from backend.users.models import User
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    # logout deletes the token
+    token_cache.invalidate_key(instance.key)
+
+
+def forget_user(user_pk):
+    token_cache.invalidate_user(user_pk)
+    user_representation_cache.invalidate(user_pk)
+
+
+@receiver(post_save, sender=User)
+def forget_saved_user(sender, instance, created, **kwargs):
+    # password changes/resets, is_active changes and profile updates (incl. the
+    # picture) all go through User.save()
+    if not created:
+        forget_user(instance.pk)
+        # again after commit, in case a concurrent request cached the old row meanwhile
+        transaction.on_commit(partial(forget_user, instance.pk))
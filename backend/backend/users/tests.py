@@ -0,0 +1,606 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the users app.
+"""
+
+import io
+import json
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from smtplib import SMTPRecipientsRefused
+from unittest import skipUnless
+
+from django.conf import settings
+
+from django.core import mail
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+
+from backend.common.cache import TTLCache
+from backend.users import passwords
+from backend.users.authentication import TokenUserCache, token_cache
+from backend.users.cache import UserRepresentationCache, user_representation_cache
+from backend.users.models import (OutboxEmail, PasswordResetToken, ProfileImage, ProfilePictureUpload, User,
+                                  VerificationCode)
+from backend.users.metrics import EMAIL_SEND_SECONDS
+from backend.users.outbox import retry_delay, send_batch
+from backend.users.pictures import Image, process_pending, process_upload
+from backend.users.serializers import UserSerializer
+from backend.users.throttling import login_buckets, login_metrics, parse_rate, take
+
+
+class RefusingEmailBackend(LocmemEmailBackend):
+    """Stands in for an SMTP server that refuses @bounce.test recipients."""
+
+    def send_messages(self, messages):
+        for message in messages:
+            if any(to.endswith("@bounce.test") for to in message.to):
+                raise SMTPRecipientsRefused({message.to[0]: (550, b"No such user")})
+        return super().send_messages(messages)
+
+
+class UnreachableEmailBackend(LocmemEmailBackend):
+    def open(self):
+        raise ConnectionRefusedError("SMTP server unreachable")
+
+
+@override_settings(OUTBOX_MAX_ATTEMPTS=3, OUTBOX_RETRY_DELAY=30, OUTBOX_RETRY_MAX_DELAY=3600)
+class EmailOutboxTestCase(TestCase):
+    """Test cases for the email outbox and the send_outbox worker."""
+
+    def test_register_and_forgot_password_only_enqueue(self):
+        """Test that the request handlers queue emails instead of sending them."""
+        response = self.client.post(reverse("users:user-register"), {
+            "email": "ogrenci@example.com", "name": "Ayşe", "password": "Kazanim-2024!",
+        })
+        self.assertEqual(response.status_code, 201)
+        user = User.objects.get(email="ogrenci@example.com")
+        user.is_active = True
+        user.save()
+        response = self.client.post(reverse("users:forgot-password"), {"email": "ogrenci@example.com"})
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(len(mail.outbox), 0)
+        queued = list(OutboxEmail.objects.order_by("created_at").values_list("template", "to", "status"))
+        self.assertEqual(queued, [
+            ("verification", "ogrenci@example.com", OutboxEmail.PENDING),
+            ("password_reset", "ogrenci@example.com", OutboxEmail.PENDING),
+        ])
+
+        stats = send_batch()
+        self.assertEqual(stats, {"claimed": 2, "sent": 2, "retried": 0, "failed": 0})
+        verification, reset = mail.outbox
+        self.assertIn(user.verification_code.code, verification.body)
+        self.assertIn(str(user.password_reset_tokens.get().token), reset.alternatives[0][0])
+        self.assertFalse(OutboxEmail.objects.exclude(status=OutboxEmail.SENT).exists())
+
+    def test_batch_uses_one_connection(self):
+        """Test that a batch is sent over a single opened connection."""
+        for i in range(5):
+            OutboxEmail.objects.enqueue("verification", f"s{i}@example.com", user_name=f"S{i}", code="123456")
+
+        opened = []
+
+        class CountingBackend(LocmemEmailBackend):
+            def open(self):
+                opened.append(self)
+                return True
+
+        self.assertEqual(send_batch(batch_size=3, connection=CountingBackend())["sent"], 3)
+        self.assertEqual(len(opened), 1)
+        self.assertEqual(OutboxEmail.objects.filter(status=OutboxEmail.PENDING).count(), 2)
+
+    def test_failures_are_retried_with_backoff(self):
+        """Test per-email failures, exponential backoff and giving up."""
+        OutboxEmail.objects.enqueue("verification", "ok@example.com", user_name="A", code="111111")
+        bounced = OutboxEmail.objects.enqueue("verification", "x@bounce.test", user_name="B", code="222222")
+
+        EMAIL_SEND_SECONDS.clear()
+        stats = send_batch(connection=RefusingEmailBackend())
+        self.assertEqual(stats, {"claimed": 2, "sent": 1, "retried": 1, "failed": 0})
+        sends = EMAIL_SEND_SECONDS.dump()["samples"]
+        self.assertEqual((sum(sends[("sent",)][:-1]), sum(sends[("error",)][:-1])), (1, 1))
+        bounced.refresh_from_db()
+        self.assertEqual((bounced.status, bounced.attempts), (OutboxEmail.PENDING, 1))
+        self.assertGreater(bounced.next_attempt_at, timezone.now() + timedelta(seconds=20))
+        self.assertIn("SMTPRecipientsRefused", bounced.last_error)
+        # not due yet
+        self.assertEqual(send_batch(connection=RefusingEmailBackend())["claimed"], 0)
+
+        self.assertEqual(retry_delay(1), timedelta(seconds=30))
+        self.assertEqual(retry_delay(3), timedelta(seconds=120))
+        self.assertEqual(retry_delay(20), timedelta(seconds=3600))
+
+        for _ in range(2):
+            OutboxEmail.objects.filter(pk=bounced.pk).update(next_attempt_at=timezone.now())
+            stats = send_batch(connection=UnreachableEmailBackend())
+        bounced.refresh_from_db()
+        self.assertEqual(stats["failed"], 1)
+        self.assertEqual((bounced.status, bounced.attempts), (OutboxEmail.FAILED, 3))
+
+    def test_send_outbox_command_with_file_backend(self):
+        """Test the worker command draining the outbox into a file backend."""
+        OutboxEmail.objects.enqueue("password_reset", "dosya@example.com", user_name="<Ali>",
+                                    reset_url="http://localhost:5173/reset-password?token=abc")
+        with tempfile.TemporaryDirectory() as tmp, override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.filebased.EmailBackend", EMAIL_FILE_PATH=tmp,
+        ):
+            call_command("send_outbox", "--once", stdout=io.StringIO())
+            written = [p for p in Path(tmp).iterdir() if p.suffix == ".log"]
+            self.assertEqual(len(written), 1)
+            content = written[0].read_text()
+
+        self.assertIn("Reset Your Password", content)
+        self.assertIn("reset-password?token=abc", content)
+        self.assertIn("&lt;Ali&gt;", content)
+        self.assertEqual(OutboxEmail.objects.get().status, OutboxEmail.SENT)
+
+
+class CachedTokenAuthenticationTestCase(TestCase):
+    """Test cases for the cached token authentication."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(email="token@example.com", password="Kazanim-2024!", name="Ali",
+                                             is_active=True)
+        self.token = Token.objects.create(user=self.user)
+        self.auth = {"HTTP_AUTHORIZATION": f"Token {self.token.key}"}
+
+    def me(self):
+        return self.client.get(reverse("users:user-me"), **self.auth)
+
+    def test_repeat_requests_skip_token_query(self):
+        """Test that a cached token needs no Token/User query."""
+        self.assertEqual(self.me().status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.me().status_code, 200)
+        self.assertFalse([q for q in queries if "authtoken_token" in q["sql"]])
+
+        stats = token_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["hit_rate"]), (1, 1, 0.5))
+
+    @override_settings(SERVER_TIMING=True)
+    def test_server_timing(self):
+        """Test that /me/ reports authentication and cache phases when timings are on."""
+        user_representation_cache.clear()
+        self.client = self.client_class()
+        with self.assertLogs("backend.timing", "INFO") as logs:
+            response = self.me()
+            self.me()
+        self.assertTrue(response["Server-Timing"].startswith("auth;dur="))
+        first, second = (json.loads(record.getMessage()) for record in logs.records)
+        self.assertEqual((first["auth_cache"], first["user_cache"]), ("miss", "miss"))
+        self.assertEqual((second["auth_cache"], second["user_cache"]), ("hit", "hit"))
+        self.assertLessEqual({"auth", "db", "serialize"}, set(first["phases"]))
+        self.assertEqual(set(second["phases"]), {"auth"})
+
+    def test_logout_invalidates_token(self):
+        """Test that a logged out token is rejected right away."""
+        self.me()
+        response = self.client.post(reverse("users:user-logout"), **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.me().status_code, 401)
+
+    def test_user_changes_invalidate_cached_user(self):
+        """Test that password changes and deactivation are seen on the next request."""
+        self.me()
+        response = self.client.post(reverse("users:user-change-password"), {
+            "current_password": "Kazanim-2024!", "new_password": "Yeni-Sifre-2025!",
+            "confirm_password": "Yeni-Sifre-2025!",
+        }, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(token_cache.stats()["entries"], 0)
+
+        self.me()
+        user = User.objects.get(pk=self.user.pk)
+        user.is_active = False
+        user.save()
+        self.assertEqual(self.me().status_code, 401)
+
+    def test_cached_user_is_not_shared_between_requests(self):
+        """Test that modifying request.user does not change the cached user."""
+        self.me()
+        user, token = token_cache.get(self.token.key)
+        user.name = "Değişti"
+        self.assertEqual(token_cache.get(self.token.key)[0].name, "Ali")
+        self.assertEqual(token, self.token)
+
+    def test_shared_cache_between_workers(self):
+        """Test that workers share cached tokens and invalidations through the shared cache."""
+        worker_a = TokenUserCache(ttl=30, shared_alias="default")
+        worker_b = TokenUserCache(ttl=30, shared_alias="default")
+        worker_a.set(self.token.key, self.user, self.token)
+
+        self.assertEqual(worker_b.get(self.token.key)[0].pk, self.user.pk)
+        self.assertEqual(worker_b.stats()["shared_hits"], 1)
+
+        worker_a.invalidate_user(self.user.pk)
+        self.assertIsNone(TokenUserCache(shared_alias="default").get(self.token.key))
+
+    def test_ttl_and_lru_bounds(self):
+        """Test expiry and eviction of the underlying TTL cache."""
+        now = [0.0]
+        cache = TTLCache(max_entries=2, ttl=10, clock=lambda: now[0])
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        now[0] = 11
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.stats()["expirations"], 1)
+
+
+class UserRepresentationCacheTestCase(TestCase):
+    """Test cases for the cached /api/users/me/ representation."""
+
+    def setUp(self):
+        token_cache.clear()
+        user_representation_cache.clear()
+        self.user = User.objects.create_user(email="me@example.com", password="Kazanim-2024!", name="Zeynep",
+                                             is_active=True, grade=7, track="lgs")
+        self.auth = {"HTTP_AUTHORIZATION": f"Token {Token.objects.create(user=self.user).key}"}
+        self.url = reverse("users:user-me")
+
+    def test_repeat_get_is_served_from_cache(self):
+        """Test that repeat calls need no query and revalidate to 304."""
+        first = self.client.get(self.url, **self.auth)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()["name"], "Zeynep")
+        self.assertIn("Last-Modified", first)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url, **self.auth)
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"], **self.auth)
+            not_modified_since = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"],
+                                                 **self.auth)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified_since.status_code, 304)
+
+    def test_matches_serializer_output(self):
+        """Test that the cached body is the serializer's representation."""
+        response = self.client.get(self.url, **self.auth)
+        self.assertEqual(response.json(), json.loads(JSONRenderer().render(UserSerializer(self.user).data)))
+
+    def test_updates_invalidate_cache(self):
+        """Test that PUT and saves elsewhere are visible on the next GET."""
+        etag = self.client.get(self.url, **self.auth)["ETag"]
+        response = self.client.put(self.url, {"name": "Zeynep Y."}, content_type="application/json", **self.auth)
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["name"], "Zeynep Y.")
+
+        user = User.objects.get(pk=self.user.pk)
+        user.profile_completed = True
+        user.save()
+        self.assertTrue(self.client.get(self.url, **self.auth).json()["profile_completed"])
+
+    def test_shared_lookups_counted(self):
+        """Test that shared-cache hits and misses show up in the stats."""
+        cache = UserRepresentationCache(shared_alias="default")
+        self.assertIsNone(cache.get(self.user.pk))
+        cache.set(self.user.pk, {"name": "Zeynep"})
+        self.assertEqual(cache.get(self.user.pk)[0].body, b'{"name":"Zeynep"}')
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["shared"]), (1, 1, True))
+
+
+def sample_photo(width=1600, height=1200, quality=92):
+    """A noisy JPEG camera photo with EXIF (orientation and a GPS tag)."""
+    noise = [Image.effect_noise((width, height), 80) for _ in range(3)]
+    photo = Image.merge("RGB", noise)
+    exif = Image.Exif()
+    exif[0x0112] = 6  # orientation: rotate 90° for display
+    exif[0x010F] = "TestCam"
+    out = io.BytesIO()
+    photo.save(out, "JPEG", quality=quality, exif=exif)
+    return out.getvalue()
+
+
+class FlakyStorage(FileSystemStorage):
+    """The profile_pictures storage in tests; runs before_save (e.g. to fail) once per assignment."""
+    before_save = None
+
+    def _save(self, name, content):
+        hook, FlakyStorage.before_save = FlakyStorage.before_save, None
+        if hook is not None:
+            hook()
+        return super()._save(name, content)
+
+
+@skipUnless(Image is not None, "Pillow is required to process profile pictures")
+class ProfilePicturePipelineTestCase(TestCase):
+    """Test cases for the background profile picture pipeline."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.uploads = Path(self.tmp.name) / "uploads"
+        self.stored = Path(self.tmp.name) / "stored"
+        settings_override = override_settings(
+            PROFILE_PICTURE_UPLOAD_DIR=str(self.uploads),
+            STORAGES={
+                **settings.STORAGES,
+                "profile_pictures": {
+                    "BACKEND": "backend.users.tests.FlakyStorage",
+                    "OPTIONS": {"location": str(self.stored), "base_url": "/media/"},
+                },
+            },
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(setattr, FlakyStorage, "before_save", None)
+        token_cache.clear()
+        user_representation_cache.clear()
+        self.user = User.objects.create_user(email="foto@example.com", password="Kazanim-2024!", name="Elif",
+                                             is_active=True)
+        self.auth = {"HTTP_AUTHORIZATION": f"Token {Token.objects.create(user=self.user).key}"}
+        self.url = reverse("users:user-me")
+
+    def upload(self, data, auth=None, content_type="image/jpeg"):
+        picture = SimpleUploadedFile("profile.jpg", data, content_type=content_type)
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.patch(self.url, encode_multipart(BOUNDARY, {"profile_picture": picture}),
+                                         content_type=MULTIPART_CONTENT, **(auth or self.auth))
+        return response, callbacks
+
+    def test_upload_is_accepted_and_processed_in_background(self):
+        """Test that PATCH only stores the raw file and processing shrinks and strips it."""
+        photo = sample_photo()
+        response, callbacks = self.upload(photo)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["profile_picture_status"], "processing")
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(len(list(self.uploads.iterdir())), 1)
+        self.assertFalse(self.stored.exists())
+        self.assertIsNone(self.client.get(self.url, **self.auth).json()["profile_picture"])
+
+        self.assertEqual(process_pending(), 1)
+        self.assertEqual(list(self.uploads.iterdir()), [])
+        upload = ProfilePictureUpload.objects.get()
+        self.assertEqual(upload.status, ProfilePictureUpload.DONE)
+
+        image = User.objects.get(pk=self.user.pk).profile_image
+        stored = (self.stored / image.name).read_bytes()
+        self.assertLess(len(stored), len(photo) / 5)
+        with Image.open(io.BytesIO(stored)) as result:
+            # rotated by the EXIF orientation, then fitted into 512x512
+            self.assertEqual(result.size, (384, 512))
+            self.assertNotIn("exif", result.info)
+            self.assertEqual(len(result.getexif()), 0)
+        # the cached /me/ representation was invalidated by the save
+        self.assertEqual(self.client.get(self.url, **self.auth).json()["profile_picture"], f"/media/{image.name}")
+
+    def test_identical_pictures_are_stored_once(self):
+        """Test content-hash deduplication across users."""
+        other = User.objects.create_user(email="ikiz@example.com", password="Kazanim-2024!", name="Ece",
+                                         is_active=True)
+        other_auth = {"HTTP_AUTHORIZATION": f"Token {Token.objects.create(user=other).key}"}
+        photo = sample_photo(400, 300)
+        self.upload(photo)
+        self.upload(photo, auth=other_auth)
+        process_pending()
+
+        self.assertEqual(ProfileImage.objects.count(), 1)
+        self.assertEqual(len(list((self.stored / "profile_pictures").iterdir())), 1)
+        self.assertEqual(User.objects.get(pk=self.user.pk).profile_image_id,
+                         User.objects.get(pk=other.pk).profile_image_id)
+
+    def test_latest_upload_wins(self):
+        """Test that an older upload processed late does not replace a newer picture."""
+        self.upload(sample_photo(300, 300))
+        self.upload(sample_photo(200, 200))
+        older, newer = ProfilePictureUpload.objects.order_by("created_at")
+        process_upload(newer.pk)
+        process_upload(older.pk)
+        self.assertEqual(User.objects.get(pk=self.user.pk).profile_image.width, 200)
+
+    def test_invalid_uploads(self):
+        """Test rejected uploads and undecodable images."""
+        response, _ = self.upload(b"%PDF-1.4", content_type="application/pdf")
+        self.assertEqual(response.status_code, 400)
+        with override_settings(PROFILE_PICTURE_MAX_BYTES=1000):
+            response, _ = self.upload(sample_photo(200, 200))
+        self.assertEqual(response.status_code, 400)
+
+        response, _ = self.upload(b"not really a jpeg")
+        self.assertEqual(response.status_code, 202)
+        call_command("process_profile_pictures", "--once", stdout=io.StringIO())
+        upload = ProfilePictureUpload.objects.get()
+        self.assertEqual(upload.status, ProfilePictureUpload.FAILED)
+        self.assertIn("UnidentifiedImageError", upload.error)
+        self.assertEqual(list(self.uploads.iterdir()), [])
+        self.assertIsNone(User.objects.get(pk=self.user.pk).profile_image)
+
+    @override_settings(PROFILE_PICTURE_RETRY_DELAY=0)
+    def test_storage_outage_is_retried(self):
+        """Test that a failed storage save keeps the raw file and the next run stores the picture."""
+        def outage():
+            raise ConnectionError("storage unavailable")
+
+        self.upload(sample_photo(300, 300))
+        FlakyStorage.before_save = outage
+        self.assertEqual(process_pending(), 1)
+        upload = ProfilePictureUpload.objects.get()
+        self.assertEqual((upload.status, upload.attempts), (ProfilePictureUpload.PENDING, 1))
+        self.assertIn("ConnectionError", upload.error)
+        self.assertEqual(len(list(self.uploads.iterdir())), 1)
+        self.assertIsNone(User.objects.get(pk=self.user.pk).profile_image)
+
+        self.assertEqual(process_pending(), 1)
+        self.assertEqual(ProfilePictureUpload.objects.get().status, ProfilePictureUpload.DONE)
+        self.assertEqual(list(self.uploads.iterdir()), [])
+        self.assertEqual(User.objects.get(pk=self.user.pk).profile_image.width, 300)
+
+    def test_run_that_lost_its_claim_changes_nothing(self):
+        """Test that a slow run whose upload was requeued and claimed again leaves row and file alone."""
+        self.upload(sample_photo(300, 300))
+        upload = ProfilePictureUpload.objects.get()
+
+        def requeued_and_claimed_again():
+            ProfilePictureUpload.objects.filter(pk=upload.pk).update(started_at=timezone.now() + timedelta(seconds=1))
+
+        FlakyStorage.before_save = requeued_and_claimed_again
+        process_upload(upload.pk)
+        self.assertEqual(ProfilePictureUpload.objects.get().status, ProfilePictureUpload.PROCESSING)
+        self.assertEqual(len(list(self.uploads.iterdir())), 1)
+        self.assertIsNone(User.objects.get(pk=self.user.pk).profile_image)
+
+
+@override_settings(LOGIN_THROTTLE_RATES={"ip": "5/min", "email": "3/min"})
+class LoginThrottleTestCase(TestCase):
+    """Test cases for login token buckets and the bounded password check."""
+
+    def setUp(self):
+        login_buckets.clear()
+        login_metrics.reset()
+        self.user = User.objects.create_user(email="giris@example.com", password="Kazanim-2024!", name="Can",
+                                             is_active=True)
+        self.url = reverse("users:user-login")
+
+    def login(self, email="giris@example.com", password="yanlis-sifre", ip="10.0.0.1"):
+        return self.client.post(self.url, {"email": email, "password": password}, REMOTE_ADDR=ip)
+
+    def test_email_bucket(self):
+        """Test that one address gets a fixed number of attempts, whatever the IP."""
+        for i in range(3):
+            self.assertEqual(self.login(ip=f"10.0.0.{i}").status_code, 400)
+        response = self.login(password="Kazanim-2024!", ip="10.0.0.9")
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response["Retry-After"]), 19)
+        self.assertEqual(self.login(email="baska@example.com").status_code, 404)
+
+        metrics = login_metrics.snapshot()
+        self.assertEqual((metrics["served"], metrics["failed"], metrics["rejected_email"]), (4, 4, 1))
+        self.assertEqual(metrics["rejected_ratio"], 0.2)
+
+    def test_ip_bucket(self):
+        """Test that one client IP gets a fixed number of attempts across addresses."""
+        for i in range(5):
+            self.assertEqual(self.login(email=f"deneme{i}@example.com").status_code, 404)
+        self.assertEqual(self.login(password="Kazanim-2024!").status_code, 429)
+        self.assertEqual(self.login(password="Kazanim-2024!", ip="10.0.0.2").status_code, 200)
+        self.assertEqual(login_metrics.snapshot()["rejected_ip"], 1)
+
+    def test_bucket_refill(self):
+        """Test the token bucket arithmetic."""
+        state = None
+        for _ in range(2):
+            allowed, wait, state = take(state, capacity=2, refill=1.0, now=100.0)
+            self.assertTrue(allowed)
+        allowed, wait, state = take(state, capacity=2, refill=1.0, now=100.0)
+        self.assertEqual((allowed, wait), (False, 1.0))
+        self.assertTrue(take(state, capacity=2, refill=1.0, now=101.5)[0])
+        self.assertEqual(parse_rate("30/min"), (30, 0.5))
+
+    def test_full_hash_queue_rejects_logins(self):
+        """Test that logins beyond the password check budget are turned away at once."""
+        held = 0
+        while passwords._slots.acquire(blocking=False):
+            held += 1
+        try:
+            response = self.login(password="Kazanim-2024!")
+        finally:
+            for _ in range(held):
+                passwords._slots.release()
+        self.assertEqual(response.status_code, 429)
+        metrics = login_metrics.snapshot()
+        self.assertEqual((metrics["rejected_busy"], metrics["served"]), (1, 0))
+        self.assertEqual(self.login(password="Kazanim-2024!").status_code, 200)
+
+    @override_settings(PASSWORD_HASH_TIMEOUT=0.05)
+    def test_timed_out_check_keeps_its_slot(self):
+        """Test that a check still running after the timeout holds its slot until it finishes."""
+        release = threading.Event()
+
+        class SlowUser:
+            def check_password(self, raw_password):
+                release.wait(5)
+                return True
+
+        def free_slots():
+            held = 0
+            while passwords._slots.acquire(blocking=False):
+                held += 1
+            for _ in range(held):
+                passwords._slots.release()
+            return held
+
+        free = free_slots()
+        with self.assertRaises(passwords.PasswordCheckBusy):
+            passwords.verify_password(SlowUser(), "x")
+        self.assertEqual(free_slots(), free - 1)
+        release.set()
+        deadline = time.monotonic() + 5
+        while free_slots() != free and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(free_slots(), free)
+
+
+class ExpiringTokenTestCase(TestCase):
+    """Test cases for stored expiry of verification codes and reset tokens."""
+
+    def make_users(self, count, prefix="kayit"):
+        return [User.objects.create_user(email=f"{prefix}{i}@example.com", password="Kazanim-2024!", name="Ece")
+                for i in range(count)]
+
+    @override_settings(VERIFICATION_CODE_TTL_MINUTES=5)
+    def test_expiry_is_stored(self):
+        """Test that expiry comes from the setting and is_expired reads the column."""
+        code = VerificationCode.objects.create(user=self.make_users(1)[0])
+        self.assertAlmostEqual((code.expires_at - code.created_at).total_seconds(), 300, delta=1)
+        self.assertFalse(code.is_expired)
+        code.expires_at = timezone.now()
+        self.assertTrue(code.is_expired)
+
+    def test_verify_rejects_expired_code(self):
+        """Test that account verification honours the stored expiry."""
+        user = self.make_users(1)[0]
+        code = VerificationCode.objects.create(user=user, expires_at=timezone.now() - timedelta(seconds=1))
+        url = reverse("users:user-verify")
+        response = self.client.post(url, {"email": user.email, "code": code.code})
+        self.assertEqual(response.json()["message"], "Verification code has expired.")
+
+        VerificationCode.objects.filter(pk=code.pk).update(expires_at=timezone.now() + timedelta(minutes=1))
+        self.assertEqual(self.client.post(url, {"email": user.email, "code": code.code}).status_code, 200)
+
+    def test_purge_in_batches(self):
+        """Test that only expired rows are purged, one bounded batch per query round."""
+        users = self.make_users(25)
+        past = timezone.now() - timedelta(minutes=1)
+        for user in users[:23]:
+            VerificationCode.objects.create(user=user, expires_at=past)
+        for user in users[23:]:
+            VerificationCode.objects.create(user=user)
+        PasswordResetToken.objects.create(user=users[0], expires_at=past)
+        PasswordResetToken.objects.create(user=users[1])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(VerificationCode.objects.purge_expired(batch_size=10), 23)
+        self.assertEqual(sum(q["sql"].startswith("DELETE") for q in queries.captured_queries), 3)
+        self.assertEqual(VerificationCode.objects.count(), 2)
+        self.assertFalse(VerificationCode.objects.expired().exists())
+
+        out = io.StringIO()
+        call_command("purge_expired_tokens", "--dry-run", stdout=out)
+        self.assertIn("1 expired password reset tokens", out.getvalue())
+        call_command("purge_expired_tokens", stdout=io.StringIO())
+        self.assertEqual(list(PasswordResetToken.objects.values_list("user", flat=True)), [users[1].pk])
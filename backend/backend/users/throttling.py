@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Token-bucket throttling for the login endpoint.
+
+Every client IP and every email address gets a bucket that holds up to N
+tokens and refills at N per period (LOGIN_THROTTLE_RATES, e.g. "30/min").
+Each login attempt takes one token; an empty bucket means 429 with a
+Retry-After of the time until the next token. Buckets live in process
+memory, or in the shared cache (REDIS_URL) so the limit holds across all
+workers. The shared store reads and writes a bucket without a lock, so
+concurrent attempts can overshoot the limit by a few requests.
+
+login_metrics counts served and rejected attempts (see /api/users/login-stats/).
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle, SimpleRateThrottle
+
+from backend.common.cache import shared_cache
+
+SHARED_KEY_PREFIX = "loginbucket:"
+
+
+def parse_rate(rate: str) -> Tuple[int, float]:
+    """'30/min' -> (capacity 30, refill 0.5 tokens per second)."""
+    capacity, seconds = SimpleRateThrottle.parse_rate(None, rate)
+    return capacity, capacity / seconds
+
+
+def take(state: Optional[Tuple[float, float]], capacity: int, refill: float,
+         now: float) -> Tuple[bool, float, Tuple[float, float]]:
+    """
+    Refill a bucket (tokens, updated_at) up to now and try to take one token.
+    Returns (allowed, seconds until the next token, new state).
+    """
+    tokens, updated = state if state is not None else (float(capacity), now)
+    tokens = min(float(capacity), tokens + (now - updated) * refill)
+    if tokens >= 1:
+        return True, 0.0, (tokens - 1, now)
+    return False, (1 - tokens) / refill, (tokens, now)
+
+
+class TokenBuckets:
+    """
+    Token buckets by key, in process memory (the least recently used are
+    dropped beyond max_entries) or in a shared Django cache.
+    """
+
+    def __init__(self, max_entries: int = 100000, shared_alias: Optional[str] = None):
+        self.configure(max_entries, shared_alias)
+
+    def configure(self, max_entries: int, shared_alias: Optional[str] = None) -> None:
+        self.max_entries = max_entries
+        self.shared = shared_cache(shared_alias)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, capacity: int, refill: float) -> Tuple[bool, float]:
+        """Take one token from the bucket for key; returns (allowed, seconds to wait)."""
+        if self.shared is not None:
+            cache_key = SHARED_KEY_PREFIX + key
+            allowed, wait, state = take(self.shared.get(cache_key), capacity, refill, time.time())
+            # an untouched bucket is full again after capacity / refill seconds
+            self.shared.set(cache_key, state, int(capacity / refill) + 1)
+            return allowed, wait
+
+        with self._lock:
+            allowed, wait, state = take(self._buckets.get(key), capacity, refill, time.time())
+            self._buckets[key] = state
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_entries:
+                # the dropped bucket was idle longest; it restarts full
+                self._buckets.popitem(last=False)
+            return allowed, wait
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class LoginMetrics:
+    """Thread-safe counters of login attempts."""
+
+    FIELDS = ("served", "succeeded", "failed", "rejected_ip", "rejected_email", "rejected_busy")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def incr(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            counts = dict(self._counts)
+        rejected = counts["rejected_ip"] + counts["rejected_email"] + counts["rejected_busy"]
+        total = counts["served"] + rejected
+        return {**counts, "rejected": rejected, "rejected_ratio": round(rejected / total, 4) if total else None}
+
+
+login_metrics = LoginMetrics()
+
+# Configured from settings in UsersConfig.ready()
+login_buckets = TokenBuckets()
+
+
+class LoginThrottle(BaseThrottle):
+    """Base class: one token bucket per ident() value, rate from LOGIN_THROTTLE_RATES[scope]."""
+
+    scope = None
+
+    def ident(self, request) -> Optional[str]:
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        ident = self.ident(request)
+        if ident is None:
+            return True
+        capacity, refill = parse_rate(settings.LOGIN_THROTTLE_RATES[self.scope])
+        allowed, self._wait = login_buckets.consume(f"{self.scope}:{ident}", capacity, refill)
+        if not allowed:
+            login_metrics.incr(f"rejected_{self.scope}")
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class LoginIPThrottle(LoginThrottle):
+    scope = "ip"
+
+    def ident(self, request):
+        return self.get_ident(request)
+
+
+class LoginEmailThrottle(LoginThrottle):
+    scope = "email"
+
+    def ident(self, request):
+        email = request.data.get("email") if hasattr(request.data, "get") else None
+        if not email or not isinstance(email, str):
+            return None
+        # keys may end up in a shared cache; do not store addresses in clear
+        return hashlib.sha256(email.strip().lower().encode("utf-8")).hexdigest()[:32]
@@ -1,5 +1,8 @@
+from django.conf import settings
 from django.urls import path
 
+from backend.common.executor import pooled_view
+
 from backend.users.views import (
     UserAPIView,
     UserLoginAPIView,
@@ -12,21 +15,33 @@ from backend.users.views import (
     UserResetPasswordAPIView,
     UserResetPasswordValidateAPIView,
     UserCompleteProfileAPIView,
+    UserAuthCacheStatsAPIView,
+    UserLoginStatsAPIView,
 )
 
 app_name = "users"
 
+# Under ASGI (settings.ASYNC_VIEWS) every user view runs in the bounded
+# "default" pool, so slow SMTP/Cloudinary calls cannot block the event loop
+# or serialize behind Django's single thread-sensitive executor.
+def as_view(view_class):
+    view = view_class.as_view()
+    return pooled_view(view) if settings.ASYNC_VIEWS else view
+
+
 urlpatterns = [
     # API endpoints
-    path("me/", UserAPIView.as_view(), name="user-me"),
-    path("login/", UserLoginAPIView.as_view(), name="user-login"),
-    path("register/", UserRegisterAPIView.as_view(), name="user-register"),
-    path("logout/", UserLogoutAPIView.as_view(), name="user-logout"),
-    path("change-password/", UserChangePasswordAPIView.as_view(), name="user-change-password"),
-    path("verify/", UserVerifyAPIView.as_view(), name="user-verify"),
-    path("resend-verification/", UserResendVerificationAPIView.as_view(), name="user-resend-verification"),
-    path("forgot-password/", UserForgotPasswordAPIView.as_view(), name="forgot-password"),
-    path("reset-password/", UserResetPasswordAPIView.as_view(), name="reset-password"),
-    path("reset-password/validate/", UserResetPasswordValidateAPIView.as_view(), name="reset-password-validate"),
-    path("complete-profile/", UserCompleteProfileAPIView.as_view(), name="complete-profile"),
+    path("me/", as_view(UserAPIView), name="user-me"),
+    path("login/", as_view(UserLoginAPIView), name="user-login"),
+    path("register/", as_view(UserRegisterAPIView), name="user-register"),
+    path("logout/", as_view(UserLogoutAPIView), name="user-logout"),
+    path("change-password/", as_view(UserChangePasswordAPIView), name="user-change-password"),
+    path("verify/", as_view(UserVerifyAPIView), name="user-verify"),
+    path("resend-verification/", as_view(UserResendVerificationAPIView), name="user-resend-verification"),
+    path("forgot-password/", as_view(UserForgotPasswordAPIView), name="forgot-password"),
+    path("reset-password/", as_view(UserResetPasswordAPIView), name="reset-password"),
+    path("reset-password/validate/", as_view(UserResetPasswordValidateAPIView), name="reset-password-validate"),
+    path("complete-profile/", as_view(UserCompleteProfileAPIView), name="complete-profile"),
+    path("auth-cache/", as_view(UserAuthCacheStatsAPIView), name="auth-cache"),
+    path("login-stats/", as_view(UserLoginStatsAPIView), name="login-stats"),
 ]
@@ -1,4 +1,6 @@
 import datetime
+import html
+from string import Template
 
 
 def generate_verification_code():
@@ -8,14 +10,14 @@ def generate_verification_code():
     return f"{randint(100000, 999999)}"
 
 
-def get_password_reset_email_template(user_name, reset_url):
-    """Generate both plain text and HTML email templates for password reset."""
-    # Plain text version
-    plain_text_message = f"""Hello {user_name},
+# Email bodies are parsed once at import; the outbox worker renders them per message
+PASSWORD_RESET_SUBJECT = "Reset Your Password"
+
+PASSWORD_RESET_TEXT = Template("""Hello $user_name,
 
 We received a request to reset your password for your EduGraph account. Click the link below to reset your password:
 
-{reset_url}
+$reset_url
 
 If you didn't request a password reset, you can safely ignore this email.
 
@@ -23,10 +25,9 @@ This link will expire in 30 minutes for security reasons.
 
 Best regards,
 EduGraph Team
-"""
+""")
 
-    # HTML version
-    html_message = f"""
+PASSWORD_RESET_HTML = Template("""
     <!DOCTYPE html>
     <html>
     <head>
@@ -34,31 +35,31 @@ EduGraph Team
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
         <title>Reset Your Password</title>
         <style>
-            body {{
+            body {
                 margin: 0;
                 padding: 0;
                 background-color: #e8f0fe;
                 font-family: Arial, sans-serif;
-            }}
-            .email-wrapper {{
+            }
+            .email-wrapper {
                 max-width: 580px;
                 margin: 20px auto;
                 background: #ffffff;
                 border-radius: 12px;
                 overflow: hidden;
-            }}
-            .email-header {{
+            }
+            .email-header {
                 background: linear-gradient(135deg, #2c3e50, #3498db);
                 color: white;
                 padding: 30px 20px;
                 text-align: center;
-            }}
-            .email-body {{
+            }
+            .email-body {
                 padding: 30px 25px;
                 color: #2c3e50;
                 line-height: 1.5;
-            }}
-            .action-button {{
+            }
+            .action-button {
                 display: inline-block;
                 background: linear-gradient(135deg, #2c3e50, #3498db);
                 color: white !important;
@@ -70,26 +71,26 @@ EduGraph Team
                 text-align: center;
                 box-shadow: 0 4px 6px rgba(44, 62, 80, 0.15);
                 transition: transform 0.2s;
-            }}
-            .action-button:hover {{
+            }
+            .action-button:hover {
                 transform: translateY(-2px);
-            }}
-            .backup-link {{
+            }
+            .backup-link {
                 background: #f8f9fa;
                 padding: 15px;
                 border-radius: 8px;
                 margin: 20px 0;
                 word-break: break-all;
                 color: #2c3e50;
-            }}
-            .email-footer {{
+            }
+            .email-footer {
                 background: #f8f9fa;
                 padding: 20px;
                 text-align: center;
                 color: #6c757d;
                 font-size: 12px;
                 margin-top: 20px;
-            }}
+            }
         </style>
     </head>
     <body>
@@ -98,18 +99,18 @@ EduGraph Team
                 <h1 style="margin: 0; font-size: 24px;">Password Reset Request</h1>
             </div>
             <div class="email-body">
-                <p>Hello {user_name},</p>
+                <p>Hello $user_name,</p>
                 <p>We received a request to reset your password. To proceed with the password reset, click the button below:</p>
 
                 <div style="text-align: center;">
-                    <a href="{reset_url}" class="action-button">Reset Password</a>
+                    <a href="$reset_url" class="action-button">Reset Password</a>
                 </div>
 
                 <p>If you didn't make this request, you can safely ignore this email.</p>
 
                 <p>If you're having trouble with the button, copy and paste this link into your browser:</p>
                 <div class="backup-link">
-                    <a href="{reset_url}" style="color: #2c3e50;">{reset_url}</a>
+                    <a href="$reset_url" style="color: #2c3e50;">$reset_url</a>
                 </div>
 
                 <p>Note: This link will expire in 30 minutes for security reasons.</p>
@@ -117,22 +118,18 @@ EduGraph Team
                 <p>Best regards,<br>EduGraph Team</p>
             </div>
             <div class="email-footer">
-                <p>&copy; {datetime.datetime.now().year} EduGraph. All rights reserved.</p>
+                <p>&copy; $year EduGraph. All rights reserved.</p>
             </div>
         </div>
     </body>
     </html>
-    """
-
-    return plain_text_message, html_message
+    """)
 
+VERIFICATION_SUBJECT = "Your Verification Code"
 
-def get_verification_email_template(user_name, code):
-    """Generate both plain text and HTML email templates for verification."""
-    # Plain text version
-    plain_text = f"""Hello {user_name},
+VERIFICATION_TEXT = Template("""Hello $user_name,
 
-Welcome to EduGraph! Your verification code is: {code}
+Welcome to EduGraph! Your verification code is: $code
 
 Please enter this code to activate your account.
 
@@ -140,10 +137,10 @@ This code will expire in 30 minutes for security reasons.
 
 Best regards,
 EduGraph Team
-"""
+""")
 
-    # HTML version matching password reset style
-    html = f"""
+# HTML version matching password reset style
+VERIFICATION_HTML = Template("""
     <!DOCTYPE html>
     <html>
     <head>
@@ -151,53 +148,53 @@ EduGraph Team
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
         <title>Account Verification</title>
         <style>
-            body {{
+            body {
                 margin: 0;
                 padding: 0;
                 background-color: #e8f0fe;
                 font-family: Arial, sans-serif;
-            }}
-            .email-wrapper {{
+            }
+            .email-wrapper {
                 max-width: 580px;
                 margin: 20px auto;
                 background: #ffffff;
                 border-radius: 12px;
                 overflow: hidden;
-            }}
-            .email-header {{
+            }
+            .email-header {
                 background: linear-gradient(135deg, #2c3e50, #3498db);
                 color: white;
                 padding: 30px 20px;
                 text-align: center;
-            }}
-            .email-body {{
+            }
+            .email-body {
                 padding: 30px 25px;
                 color: #2c3e50;
                 line-height: 1.5;
-            }}
-            .verification-box {{
+            }
+            .verification-box {
                 background: linear-gradient(135deg, #f8f9fa, #e9ecef);
                 border: 2px dashed #3498db;
                 padding: 20px;
                 border-radius: 10px;
                 text-align: center;
                 margin: 25px 0;
-            }}
-            .verification-code {{
+            }
+            .verification-code {
                 font-size: 32px;
                 font-weight: bold;
                 letter-spacing: 4px;
                 color: #2c3e50;
                 margin: 10px 0;
-            }}
-            .email-footer {{
+            }
+            .email-footer {
                 background: #f8f9fa;
                 padding: 20px;
                 text-align: center;
                 color: #6c757d;
                 font-size: 12px;
                 margin-top: 20px;
-            }}
+            }
         </style>
     </head>
     <body>
@@ -206,12 +203,12 @@ EduGraph Team
                 <h1 style="margin: 0; font-size: 24px;">Verify Your Account</h1>
             </div>
             <div class="email-body">
-                <p>Hello {user_name},</p>
+                <p>Hello $user_name,</p>
                 <p>Welcome to EduGraph! To complete your account setup, please enter the verification code below:</p>
 
                 <div class="verification-box">
                     <div class="verification-code">
-                        {code}
+                        $code
                     </div>
                     <p style="margin: 5px 0 0; color: #6c757d;">Enter this code to activate your account</p>
                 </div>
@@ -221,11 +218,39 @@ EduGraph Team
                 <p>Best regards,<br>EduGraph Team</p>
             </div>
             <div class="email-footer">
-                <p>&copy; {datetime.datetime.now().year} EduGraph. All rights reserved.</p>
+                <p>&copy; $year EduGraph. All rights reserved.</p>
             </div>
         </div>
     </body>
     </html>
+    """)
+
+EMAIL_TEMPLATES = {
+    "verification": (VERIFICATION_SUBJECT, VERIFICATION_TEXT, VERIFICATION_HTML),
+    "password_reset": (PASSWORD_RESET_SUBJECT, PASSWORD_RESET_TEXT, PASSWORD_RESET_HTML),
+}
+
+
+def render_email(template, context):
+    """
+    Render one of EMAIL_TEMPLATES with the given context.
+    Returns (subject, plain_text, html); values are HTML-escaped in the HTML part.
     """
+    subject, text_template, html_template = EMAIL_TEMPLATES[template]
+    context = {**context, "year": datetime.datetime.now().year}
+    escaped = {key: html.escape(str(value)) for key, value in context.items()}
+    return subject, text_template.substitute(context), html_template.substitute(escaped)
+
+
+def get_password_reset_email_template(user_name, reset_url):
+    """Generate both plain text and HTML email templates for password reset."""
+    _, plain_text_message, html_message = render_email(
+        "password_reset", {"user_name": user_name, "reset_url": reset_url}
+    )
+    return plain_text_message, html_message
+
 
-    return plain_text, html
+def get_verification_email_template(user_name, code):
+    """Generate both plain text and HTML email templates for verification."""
+    _, plain_text, html_message = render_email("verification", {"user_name": user_name, "code": code})
+    return plain_text, html_message
@@ -6,13 +6,19 @@ from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 from django.db import transaction
 from rest_framework import status
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 
+from backend.common.http import payload_response
+from backend.users.authentication import token_cache
+from backend.users.cache import user_representation_cache
 from backend.users.models import PasswordResetToken, User, VerificationCode
+from backend.users.passwords import PasswordCheckBusy, verify_password
+from backend.users.pictures import accept_upload
+from backend.users.throttling import LoginEmailThrottle, LoginIPThrottle, login_metrics
 from backend.users.serializers import (
     UserChangePasswordSerializer,
     UserCompleteProfileSerializer,
@@ -22,6 +28,7 @@ from backend.users.serializers import (
     UserResetPasswordSerializer,
     UserSerializer,
 )
+from src.utils.timing import annotate, phase
 
 # Removed legacy template-based views (migrated to React SPA)
 
@@ -29,9 +36,17 @@ from backend.users.serializers import (
 @method_decorator(csrf_exempt, name='dispatch')
 class UserAPIView(APIView):
     def get(self, request, *args, **kwargs):
-        user = self.request.user
-        serializer = UserSerializer(user)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        cached = user_representation_cache.get(request.user.pk)
+        annotate(user_cache="miss" if cached is None else "hit")
+        if cached is None:
+            user = self.request.user
+            # request.user may come from another worker's token cache; cache the current row
+            with phase("db"):
+                user.refresh_from_db()
+            with phase("serialize"):
+                cached = user_representation_cache.set(user.pk, UserSerializer(user).data)
+        payload, last_modified = cached
+        return payload_response(request, payload, last_modified=last_modified)
 
     def put(self, request, *args, **kwargs):
         user = self.request.user
@@ -51,14 +66,26 @@ class UserAPIView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     def patch(self, request, *args, **kwargs):
-        """Handle profile picture upload separately with PATCH method"""
+        """
+        Handle profile picture upload separately with PATCH method.
+        The file is only stored locally here; resizing and the upload to storage
+        happen in the background (backend/users/pictures.py), hence 202.
+        """
         user = self.request.user
         
         if 'profile_picture' in request.FILES:
-            user.profile_picture = request.FILES['profile_picture']
-            user.save()
+            picture = request.FILES['profile_picture']
+            if picture.size > settings.PROFILE_PICTURE_MAX_BYTES:
+                return Response(
+                    {"message": f"Profile picture must be at most {settings.PROFILE_PICTURE_MAX_BYTES // (1024 * 1024)} MB."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if not (picture.content_type or "").startswith("image/"):
+                return Response({"message": "Profile picture must be an image."}, status=status.HTTP_400_BAD_REQUEST)
+
+            accept_upload(user, picture)
             serializer = UserSerializer(user)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return Response({**serializer.data, "profile_picture_status": "processing"}, status=status.HTTP_202_ACCEPTED)
         
         return Response({"message": "No profile picture provided"}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -150,6 +177,8 @@ class UserRegisterAPIView(APIView):
 class UserLoginAPIView(APIView):
     queryset = User.objects.all()
     permission_classes = (AllowAny,)
+    # token buckets per client IP and per email (backend/users/throttling.py)
+    throttle_classes = (LoginIPThrottle, LoginEmailThrottle)
 
     def post(self, request, *args, **kwargs):
         serializer = UserLoginSerializer(data=request.data)
@@ -162,17 +191,33 @@ class UserLoginAPIView(APIView):
             if not user.is_active:
                 return Response(data={"message": "Account is inactive."}, status=status.HTTP_403_FORBIDDEN)
 
-            if user.check_password(request.data["password"]):
+            with phase("password"):
+                verified = verify_password(user, request.data["password"])
+            if verified:
                 from rest_framework.authtoken.models import Token
 
+                login_metrics.incr("served")
+                login_metrics.incr("succeeded")
                 token, created = Token.objects.get_or_create(user=user)
                 return Response(data={"token": token.key}, status=status.HTTP_200_OK)
+            login_metrics.incr("served")
+            login_metrics.incr("failed")
             return Response(
                 data={"message": "Email or password is wrong."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        except PasswordCheckBusy:
+            login_metrics.incr("rejected_busy")
+            response = Response(
+                data={"message": "Too many login attempts right now. Please try again shortly."},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+            )
+            response["Retry-After"] = "1"
+            return response
         except User.DoesNotExist:
+            login_metrics.incr("served")
+            login_metrics.incr("failed")
             return Response(
                 data={"message": "Email or password is wrong."},
                 status=status.HTTP_404_NOT_FOUND,
@@ -238,7 +283,8 @@ class UserVerifyAPIView(APIView):
             )
 
         try:
-            verification_code = VerificationCode.objects.get(code=code, user__email=email)
+            # driven by the unique email and user_id indexes; select_related saves a second query
+            verification_code = VerificationCode.objects.select_related("user").get(user__email=email, code=code)
             if verification_code.is_expired:
                 return Response(
                     {"message": "Verification code has expired."},
@@ -448,3 +494,28 @@ class UserCompleteProfileAPIView(APIView):
             },
             status=status.HTTP_200_OK,
         )
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class UserAuthCacheStatsAPIView(APIView):
+    """
+    Hit-rate counters of the token authentication and /me/ caches in the worker serving the request (staff only).
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(
+            {"token": token_cache.stats(), "me": user_representation_cache.stats()},
+            status=status.HTTP_200_OK
+        )
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class UserLoginStatsAPIView(APIView):
+    """
+    Served versus rejected login attempts in the worker serving the request (staff only).
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(login_metrics.snapshot(), status=status.HTTP_200_OK)
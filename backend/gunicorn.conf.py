@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Gunicorn configuration for production serving.
+
+    gunicorn -c gunicorn.conf.py backend.wsgi
+
+or, for the async graph views (backend/asgi.py),
+
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker \
+        gunicorn -c gunicorn.conf.py backend.asgi:application
+
+The application is loaded once in the master (preload_app), every
+curriculum graph and its full-graph payloads are built there and then
+frozen with gc.freeze(), so forked workers share one copy of the graph
+data instead of building their own. GET /api/graph/memory/ reports each
+worker's RSS/PSS to verify the sharing.
+
+Workers share metrics through files in METRICS_DIR (a temporary directory
+unless configured), so /metrics reports all of them whichever one serves it.
+"""
+
+import logging
+import os
+import tempfile
+
+import decouple
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", "4"))
+threads = int(os.getenv("GUNICORN_THREADS", "2"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+preload_app = True
+
+# before the app is loaded, so the master and every worker flush to the same place
+os.environ.setdefault("METRICS_DIR", decouple.config(
+    "METRICS_DIR", default=os.path.join(tempfile.gettempdir(), "edugraph-metrics")))
+
+logger = logging.getLogger("gunicorn.error")
+
+
+def when_ready(server):
+    # runs in the master after the app is loaded and before workers fork
+    from backend.artifacts.views import warm_graph_payloads
+    from src.serving import preload_and_freeze
+
+    report = preload_and_freeze(warm=warm_graph_payloads)
+    logger.info("Shared graph memory ready: %s", report)
+
+
+def post_fork(server, worker):
+    from src.serving import memory_report
+
+    logger.info("Worker %s memory: %s", worker.pid, memory_report())
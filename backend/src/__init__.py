@@ -4,6 +4,10 @@ EduGraph - Curriculum Learning Graph Visualization (root package)
 Exposes the high-level API used by scripts.
 """
 
-from .graph_utils import GraphGenerator, generate_graph, get_graph_data
+from .graph_utils import GraphGenerator, generate_graph, get_graph, get_graph_data, graph_cache
+from .registry import CurriculumNotFound, GraphRegistry, graph_registry
 
-__all__ = ["GraphGenerator", "generate_graph", "get_graph_data"]
+__all__ = [
+    "GraphGenerator", "generate_graph", "get_graph", "get_graph_data", "graph_cache",
+    "CurriculumNotFound", "GraphRegistry", "graph_registry",
+]
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Precompiled curriculum artifacts.
+
+compile_curricula turns each curriculum JSON file into a binary artifact
+holding the finished CompactGraph columns, metadata, link stats, hierarchy
+index and (with NumPy) layout positions. Workers load the artifact instead
+of parsing and processing the JSON, and fall back to a normal build when
+the artifact is missing, from another format version or was compiled from
+a different source file (checked by SHA-256).
+
+Artifacts are pickles written by this module and are trusted like the rest
+of the deployment; do not point CURRICULUM_ARTIFACT_DIR at untrusted files.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .graph_utils import CachedGraph, GraphGenerator
+from .utils.data_loader import STREAMING_THRESHOLD_BYTES
+from .utils.graph_store import CompactGraph
+
+logger = logging.getLogger(__name__)
+
+# Bump when the artifact layout or any pickled class changes shape
+ARTIFACT_FORMAT = 1
+ARTIFACT_SUFFIX = ".egc"
+
+
+def source_digest(path: str) -> str:
+    """SHA-256 of a source file, read in 1 MiB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fp:
+        for block in iter(lambda: fp.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class CompiledArtifacts:
+    """
+    Artifact directory mirroring the curriculum directory.
+
+    <source_root>/matematik/x.json is compiled to <root>/matematik/x.egc.
+    Each file holds a small header pickle (format, source hash and size)
+    followed by the graph body, so stale artifacts are rejected without
+    unpickling the body.
+    """
+
+    def __init__(self, root, source_root):
+        self.root = Path(root)
+        self.source_root = Path(source_root).resolve()
+        self.loads = 0
+        self.rejected = 0
+
+    def artifact_path(self, source: str) -> Optional[Path]:
+        try:
+            relative = Path(source).resolve().relative_to(self.source_root)
+        except ValueError:
+            return None
+        return (self.root / relative).with_suffix(ARTIFACT_SUFFIX)
+
+    def read_header(self, source: str) -> Optional[Dict[str, Any]]:
+        target = self.artifact_path(source)
+        if target is None or not target.is_file():
+            return None
+        with open(target, "rb") as fp:
+            return pickle.load(fp)
+
+    def is_current(self, source: str) -> bool:
+        """True if the artifact for source exists, has this format and matches the source hash."""
+        try:
+            header = self.read_header(source)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return False
+        return self._header_matches(header, source, os.path.getsize(source))
+
+    @staticmethod
+    def _header_matches(header: Optional[Dict[str, Any]], source: str, size: int) -> bool:
+        return (
+            isinstance(header, dict)
+            and header.get("format") == ARTIFACT_FORMAT
+            and header.get("source_size") == size
+            and header.get("source_sha256") == source_digest(source)
+        )
+
+    def compile(self, source: str, layout: bool = True) -> Path:
+        """Build the graph for source and write its artifact atomically."""
+        target = self.artifact_path(source)
+        if target is None:
+            raise ValueError(f"{source} is outside {self.source_root}")
+        size = os.path.getsize(source)
+        header = {"format": ARTIFACT_FORMAT, "source_sha256": source_digest(source), "source_size": size}
+
+        records = GraphGenerator().load_data(source, stream=size >= STREAMING_THRESHOLD_BYTES)
+        graph = CachedGraph(source, (0, size), store=CompactGraph.from_records(records))
+        positions = graph.positions() if layout else None
+        body = {
+            "store": graph.store,
+            "metadata": graph.metadata,
+            "link_types": graph.link_types,
+            "hierarchy": graph.hierarchy(),
+            "positions": positions,
+        }
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                pickle.dump(header, fp, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(body, fp, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, target)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        logger.info("Compiled %s -> %s (%d nodes)", source, target, graph.metadata["total_nodes"])
+        return target
+
+    def load(self, source: str, signature: Tuple[int, int], compact: bool = False) -> Optional[CachedGraph]:
+        """Return the graph from a current artifact, or None to build from the JSON source."""
+        target = self.artifact_path(source)
+        if target is None or not target.is_file():
+            return None
+        try:
+            with open(target, "rb") as fp:
+                if not self._header_matches(pickle.load(fp), source, signature[1]):
+                    self.rejected += 1
+                    logger.info("Ignoring stale artifact %s", target)
+                    return None
+                body = pickle.load(fp)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+            self.rejected += 1
+            logger.warning("Could not load artifact %s: %s", target, e)
+            return None
+
+        store: CompactGraph = body["store"]
+        if compact:
+            graph = CachedGraph(source, signature, store=store,
+                                metadata=body["metadata"], link_types=body["link_types"])
+        else:
+            graph = CachedGraph(source, signature, store.to_nodes(), store.to_links(), scores=store.scores,
+                                metadata=body["metadata"], link_types=body["link_types"])
+        graph.set_hierarchy(body["hierarchy"])
+        if body["positions"] is not None:
+            graph.set_positions(*body["positions"])
+        self.loads += 1
+        return graph
@@ -4,10 +4,32 @@ Main graph utility module.
 Provides a simple interface for generating curriculum graphs.
 """
 
-from typing import List, Dict, Any, Tuple
-from .utils.data_loader import load_curriculum_data, validate_record
-from .utils.graph_processor import create_graph_data
+import logging
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Callable, Iterable, List, Dict, Any, Mapping, Optional, Tuple
+from .utils.colors import clamp01, scores_to_colors, scores_to_radii
+from .utils.data_loader import (
+    STREAMING_THRESHOLD_BYTES,
+    iter_curriculum_records,
+    load_curriculum_data,
+    validate_record,
+)
+from .utils.graph_processor import GraphProcessor, create_graph_data
+from .utils.graph_index import HierarchyIndex
+from .utils.graph_store import CompactGraph
+from .utils.lod import LevelOfDetail
+from .utils.payload import EncodedPayload
 from .utils.template_manager import TemplateManager
+from .utils.timing import annotate, phase
+
+logger = logging.getLogger(__name__)
+
+# seconds before a failed background layout is started again
+LAYOUT_RETRY_DELAY = 60.0
 
 
 class GraphGenerator:
@@ -16,11 +38,14 @@ class GraphGenerator:
     def __init__(self, template_dir: str = "templates"):
         self.template_manager = TemplateManager(template_dir)
 
-    def load_data(self, file_path: str) -> List[Dict[str, Any]]:
+    def load_data(self, file_path: str, stream: bool = False) -> Iterable[Dict[str, Any]]:
+        """Return validated records; with stream=True a lazy generator is returned."""
+        if stream:
+            return iter_curriculum_records(file_path)
         records = load_curriculum_data(file_path)
         return [r for r in records if validate_record(r)]
 
-    def create_graph_data(self, records: List[Dict[str, Any]]) -> Tuple[List[Dict], List[Dict]]:
+    def create_graph_data(self, records: Iterable[Dict[str, Any]]) -> Tuple[List[Dict], List[Dict]]:
         return create_graph_data(records)
 
     def render(self, nodes: List[Dict[str, Any]], links: List[Dict[str, Any]]) -> str:
@@ -46,6 +71,414 @@ class GraphGenerator:
         return html, stats
 
 
+class CachedGraph:
+    """A built graph together with the source file signature it was built from.
+
+    The graph is held either as node/link dicts or, in compact mode, as a
+    CompactGraph whose dicts are materialized only when nodes/links are read.
+    Instances are shared between requests and must be treated as read-only.
+    """
+
+    def __init__(self, path: str, signature: Tuple[int, int],
+                 nodes: Optional[List[Dict[str, Any]]] = None,
+                 links: Optional[List[Dict[str, Any]]] = None,
+                 store: Optional[CompactGraph] = None,
+                 scores: Optional[List[float]] = None,
+                 metadata: Optional[Dict[str, Any]] = None,
+                 link_types: Optional[Dict[str, int]] = None):
+        self.path = path
+        self.signature = signature
+        self.store = store
+        self._nodes = nodes
+        self._links = links
+        if store is not None:
+            self.scores = store.scores
+        else:
+            self.scores = array("f", scores if scores is not None else [0.0] * len(nodes))
+        # precomputed values come from compiled artifacts (see src/compiled.py)
+        with phase("metadata"):
+            self.metadata = metadata if metadata is not None else self._build_metadata()
+            self.link_types = link_types if link_types is not None else self._count_link_types()
+        self._payloads: Dict[str, EncodedPayload] = {}
+        self._payload_lock = threading.Lock()
+        self._positions: Optional[Tuple[array, array]] = None
+        self._layout_lock = threading.Lock()
+        self._layout_thread: Optional[threading.Thread] = None
+        self._layout_failed_at: Optional[float] = None
+        self._build_lock = threading.Lock()
+        self._hierarchy: Optional[HierarchyIndex] = None
+        self._lod: Optional[LevelOfDetail] = None
+        self._structure_nbytes = self.store.nbytes if self.store is not None else self._estimate_structure_nbytes()
+
+    @property
+    def nodes(self) -> List[Dict[str, Any]]:
+        return self._nodes if self.store is None else self.store.to_nodes()
+
+    @property
+    def links(self) -> List[Dict[str, Any]]:
+        return self._links if self.store is None else self.store.to_links()
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by this graph, including encoded payloads."""
+        payload_bytes = sum(p.nbytes for p in list(self._payloads.values()))
+        positions_bytes = 8 * self.metadata["total_nodes"] if self._positions is not None else 0
+        hierarchy_bytes = self._hierarchy.nbytes if self._hierarchy is not None else 0
+        lod_bytes = self._lod.nbytes if self._lod is not None else 0
+        return self._structure_nbytes + payload_bytes + positions_bytes + hierarchy_bytes + lod_bytes
+
+    def _estimate_structure_nbytes(self) -> int:
+        # Rough per-object overheads for CPython dicts/strs; good enough to bound an LRU.
+        total = 0
+        for node in self._nodes:
+            total += 360 + sum(len(v) + 49 for v in node.values() if isinstance(v, str))
+        total += len(self._links) * 232
+        return total
+
+    def _build_metadata(self) -> Dict[str, Any]:
+        if self.store is not None:
+            return {
+                "total_nodes": len(self.store),
+                "total_links": self.store.link_count,
+                "node_types": self.store.type_counts(),
+            }
+        node_types: Dict[str, int] = {}
+        for node in self._nodes:
+            node_type = node.get('type', 'unknown')
+            node_types[node_type] = node_types.get(node_type, 0) + 1
+        return {
+            "total_nodes": len(self._nodes),
+            "total_links": len(self._links),
+            "node_types": node_types,
+        }
+
+    def _count_link_types(self) -> Dict[str, int]:
+        if self.store is not None:
+            return self.store.link_type_counts()
+        type_by_id = {n['id']: n['type'] for n in self._nodes}
+        link_types: Dict[str, int] = {}
+        for link in self._links:
+            source_type = type_by_id.get(link['source'])
+            target_type = type_by_id.get(link['target'])
+            if source_type and target_type:
+                link_key = f"{source_type} → {target_type}"
+                link_types[link_key] = link_types.get(link_key, 0) + 1
+        return link_types
+
+    def payload(self, key: str, build: Callable[["CachedGraph"], Any]) -> EncodedPayload:
+        """Return the pre-serialized payload stored under key, encoding it on first use.
+
+        build returns JSON-serializable data, or a ready EncodedPayload for
+        non-JSON representations. Payloads live as long as this graph
+        version, so a rebuilt graph starts with fresh payloads and new ETags.
+        """
+        payload = self._payloads.get(key)
+        if payload is None:
+            with self._payload_lock:
+                payload = self._payloads.get(key)
+                if payload is None:
+                    with phase("serialize"):
+                        data = build(self)
+                    with phase("encode"):
+                        payload = data if isinstance(data, EncodedPayload) else EncodedPayload.from_data(data)
+                    self._payloads[key] = payload
+        return payload
+
+    def peek_payload(self, key: str) -> Optional[EncodedPayload]:
+        """Return the payload stored under key if it was already built, without building it."""
+        return self._payloads.get(key)
+
+    def is_built(self, part: str) -> bool:
+        """True once a lazily built part ("hierarchy", "lod" or "positions") exists."""
+        return {"hierarchy": self._hierarchy, "lod": self._lod, "positions": self._positions}[part] is not None
+
+    def positions(self, wait: bool = True) -> Optional[Tuple[array, array]]:
+        """
+        Return precomputed (x, y) float32 columns aligned with node order.
+
+        The force layout runs once per graph version and takes seconds to
+        minutes on large curricula, so request handlers pass wait=False:
+        the layout is then started in a background thread and None is
+        returned until it is done (a failed layout is started again after
+        LAYOUT_RETRY_DELAY seconds). None as well when NumPy is not installed.
+        """
+        if self._positions is None:
+            from .layout import layout_available
+            if not layout_available():
+                return None
+            if not wait:
+                self._start_layout()
+                return self._positions
+            self._compute_positions()
+        return self._positions
+
+    def _compute_positions(self) -> None:
+        from .layout import compute_layout
+
+        # its own lock: hierarchy and LOD builds must not queue behind a long layout
+        with self._layout_lock:
+            if self._positions is None:
+                with phase("layout"):
+                    x, y = compute_layout(self.as_compact())
+                self._positions = (array("f", x.astype("float32").tobytes()),
+                                   array("f", y.astype("float32").tobytes()))
+
+    def _start_layout(self) -> None:
+        with self._build_lock:
+            if self._layout_thread is not None:
+                return
+            if self._layout_failed_at is not None and time.monotonic() - self._layout_failed_at < LAYOUT_RETRY_DELAY:
+                return
+            self._layout_thread = threading.Thread(target=self._compute_positions_logged,
+                                                   name="edugraph-layout", daemon=True)
+        self._layout_thread.start()
+
+    def _compute_positions_logged(self) -> None:
+        started = time.perf_counter()
+        try:
+            self._compute_positions()
+        except Exception:
+            logger.exception("Layout of %s failed", self.path)
+            # let a later request start it again, after a cooldown
+            with self._build_lock:
+                self._layout_thread = None
+                self._layout_failed_at = time.monotonic()
+            return
+        logger.info("Computed layout for %s (%d nodes, %.1fs)", self.path, self.metadata["total_nodes"],
+                    time.perf_counter() - started)
+
+    def set_positions(self, x: array, y: array) -> None:
+        """Install positions computed elsewhere (e.g. loaded from a compiled artifact)."""
+        self._positions = (x, y)
+
+    def nodes_with_positions(self) -> List[Dict[str, Any]]:
+        """Node dicts with optional x/y fields added from the cached layout."""
+        nodes = self.nodes
+        positions = self.positions()
+        if positions is None:
+            return nodes
+        return [dict(node, x=round(x, 1), y=round(y, 1)) for node, x, y in zip(nodes, *positions)]
+
+    def hierarchy(self) -> HierarchyIndex:
+        """Return the parent/child index for this graph version, building it on first use."""
+        if self._hierarchy is None:
+            with self._build_lock:
+                if self._hierarchy is None:
+                    with phase("hierarchy"):
+                        self._hierarchy = self._build_hierarchy()
+        return self._hierarchy
+
+    def _build_hierarchy(self) -> HierarchyIndex:
+        if self.store is not None:
+            return HierarchyIndex(self.store.ids, self.store.link_source, self.store.link_target)
+        ids = [node["id"] for node in self._nodes]
+        position = {node_id: i for i, node_id in enumerate(ids)}
+        return HierarchyIndex(ids,
+                              [position[link["source"]] for link in self._links],
+                              [position[link["target"]] for link in self._links])
+
+    def set_hierarchy(self, index: HierarchyIndex) -> None:
+        """Install a hierarchy index built elsewhere (e.g. loaded from a compiled artifact)."""
+        self._hierarchy = index
+
+    def lod(self) -> LevelOfDetail:
+        """Return the bottom-up cluster aggregates for this graph version."""
+        if self._lod is None:
+            index = self.hierarchy()
+            with self._build_lock:
+                if self._lod is None:
+                    with phase("lod"):
+                        if self.store is not None:
+                            types = [self.store.node_type(i) for i in range(len(self.store))]
+                        else:
+                            types = [node["type"] for node in self._nodes]
+                        self._lod = LevelOfDetail(index, types, self.scores, self.node_at)
+        return self._lod
+
+    @property
+    def version(self) -> str:
+        """Short identifier of this graph version (changes when the source file does)."""
+        return f"{self.signature[0]:x}-{self.signature[1]:x}"
+
+    def node_type_at(self, i: int) -> str:
+        return self._nodes[i]["type"] if self.store is None else self.store.node_type(i)
+
+    def score_overlay(self, scores: Mapping[Any, float]) -> Dict[str, Any]:
+        """
+        Per-user scores mapped onto this graph's node order.
+
+        scores maps node id -> score (0..1); ids that are not kazanım nodes
+        of this version are dropped. Returns sorted node positions with the
+        clamped scores and the colors/radii GraphProcessor would derive.
+        """
+        index = self.hierarchy()
+        entries = []
+        for node_id, score in scores.items():
+            i = index.index_of(node_id)
+            if i is not None and self.node_type_at(i) == "kazanım":
+                entries.append((i, clamp01(score)))
+        entries.sort()
+        values = [score for _, score in entries]
+        return {
+            "version": self.version,
+            "node_count": self.metadata["total_nodes"],
+            "index": [i for i, _ in entries],
+            "scores": [round(v, 4) for v in values],
+            "colors": scores_to_colors(values),
+            "r": [int(r) for r in scores_to_radii(values)],
+        }
+
+    def node_at(self, i: int) -> Dict[str, Any]:
+        """Return the node dict at position i without materializing the whole list."""
+        return self._nodes[i] if self.store is None else self.store.node(i)
+
+    def as_compact(self) -> CompactGraph:
+        """Return the columnar form of this graph (built on the fly in dict mode)."""
+        if self.store is not None:
+            return self.store
+        return CompactGraph.from_graph(self._nodes, self._links, self.scores)
+
+
+class GraphCache:
+    """Process-wide cache of built graphs keyed on the source file path.
+
+    An entry is reused as long as the file's (mtime, size) signature is
+    unchanged; otherwise the graph is rebuilt on the next access. When
+    max_bytes is set, least recently used graphs are evicted to stay under it.
+    With compact=True graphs are stored as CompactGraph columns. When
+    artifacts (a CompiledArtifacts) is set, current precompiled artifacts
+    are loaded instead of parsing the JSON source. Every build is reported
+    to the callables in build_listeners as (entry, source, seconds).
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, compact: bool = False, artifacts=None):
+        self.max_bytes = max_bytes
+        self.compact = compact
+        self.artifacts = artifacts
+        self._entries: "OrderedDict[str, CachedGraph]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.rebuilds = 0
+        self.evictions = 0
+        self.build_listeners: List[Callable[[CachedGraph, str, float], None]] = []
+
+    @staticmethod
+    def _signature(path: str) -> Tuple[int, int]:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+
+    def peek(self, data_file: str) -> Optional[CachedGraph]:
+        """Return the cached graph if it is current, without building (None otherwise)."""
+        path = os.path.abspath(data_file)
+        entry = self._entries.get(path)
+        if entry is None or entry.signature != self._signature(path):
+            return None
+        with self._lock:
+            self.hits += 1
+            if path in self._entries:
+                self._entries.move_to_end(path)
+        return entry
+
+    def get(self, data_file: str) -> CachedGraph:
+        path = os.path.abspath(data_file)
+        signature = self._signature(path)
+
+        entry = self._entries.get(path)
+        if entry is not None and entry.signature == signature:
+            with self._lock:
+                self.hits += 1
+                if path in self._entries:
+                    self._entries.move_to_end(path)
+            annotate(graph_cache="hit")
+            return entry
+
+        with self._lock:
+            build_lock = self._build_locks.setdefault(path, threading.Lock())
+
+        # Only one thread builds a given file; the others wait and reuse its result.
+        with build_lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.signature == signature:
+                with self._lock:
+                    self.hits += 1
+                annotate(graph_cache="wait")
+                return entry
+
+            stale = entry is not None
+            started = time.perf_counter()
+            with phase("artifact"):
+                entry = self.artifacts.load(path, signature, self.compact) if self.artifacts is not None else None
+            source = "artifact" if entry is not None else "json"
+            if entry is None:
+                entry = self._build(path, signature)
+            seconds = time.perf_counter() - started
+
+            with self._lock:
+                self._entries[path] = entry
+                self._entries.move_to_end(path)
+                if stale:
+                    self.rebuilds += 1
+                else:
+                    self.misses += 1
+                self._evict(keep=path)
+            annotate(graph_cache="rebuild" if stale else "miss", graph_source=source)
+            logger.info("Built graph for %s (%d nodes, %d links, %s, from %s, %.3fs)", path,
+                        entry.metadata["total_nodes"], entry.metadata["total_links"],
+                        "rebuild" if stale else "miss", source, seconds)
+            for listener in self.build_listeners:
+                listener(entry, source, seconds)
+            return entry
+
+    def _build(self, path: str, signature: Tuple[int, int]) -> CachedGraph:
+        records = GraphGenerator().load_data(path, stream=signature[1] >= STREAMING_THRESHOLD_BYTES)
+        if self.compact:
+            return CachedGraph(path, signature, store=CompactGraph.from_records(records))
+        processor = GraphProcessor()
+        nodes, links = processor.process_records(records)
+        return CachedGraph(path, signature, nodes, links, scores=processor.scores)
+
+    def _evict(self, keep: str) -> None:
+        """Drop least recently used graphs until under max_bytes (caller holds the lock)."""
+        if self.max_bytes is None:
+            return
+        total = sum(e.nbytes for e in self._entries.values())
+        for path in list(self._entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            total -= self._entries.pop(path).nbytes
+            self.evictions += 1
+            logger.info("Evicted graph for %s from cache", path)
+
+    def entries(self) -> List[CachedGraph]:
+        """The cached graphs, without counting a hit or refreshing their LRU position."""
+        with self._lock:
+            return list(self._entries.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.rebuilds = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "rebuilds": self.rebuilds,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": sum(e.nbytes for e in self._entries.values()),
+                "artifact_loads": self.artifacts.loads if self.artifacts is not None else 0,
+            }
+
+
+graph_cache = GraphCache()
+
+
 # Convenience functions for backward compatibility
 
 def generate_graph(data_file: str, output_file: str = "kazanim_graph.html") -> Dict[str, int]:
@@ -53,6 +486,11 @@ def generate_graph(data_file: str, output_file: str = "kazanim_graph.html") -> D
     return stats
 
 
+def get_graph(data_file: str) -> CachedGraph:
+    """Return the cached graph for a curriculum file, building it if needed."""
+    return graph_cache.get(data_file)
+
+
 def get_graph_data(data_file: str) -> Tuple[List[Dict], List[Dict]]:
-    records = GraphGenerator().load_data(data_file)
-    return create_graph_data(records)
+    graph = graph_cache.get(data_file)
+    return graph.nodes, graph.links
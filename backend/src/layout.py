@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+Server-side force-directed layout.
+
+Mirrors the d3 force simulation in frontend/src/views/graph/Graph.jsx
+(link distance/strength, charge -1600, forceX/Y 0.03, collide r+4 with two
+iterations, default alpha decay and velocity decay) so clients can render
+precomputed positions directly or run only a short warm start. Positions
+are centred on (0, 0).
+
+Charge uses a vectorized Barnes-Hut approximation: the plane is split into
+quadtree levels of a regular grid, and (node, cell) pairs are refined level
+by level with NumPy instead of walking a pointer-based tree per node.
+"""
+
+import math
+from typing import Optional, Tuple
+
+try:  # optional dependency; without it positions are simply not offered
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+from .utils.graph_store import CompactGraph
+
+
+def layout_available() -> bool:
+    return np is not None
+
+
+class ForceLayout:
+    """Force-directed layout with the same parameters as the frontend."""
+
+    def __init__(self, charge: float = -1600.0, link_strength: float = 0.12,
+                 position_strength: float = 0.03, collide_padding: float = 4.0,
+                 collide_iterations: int = 2, theta: float = 0.9,
+                 alpha_min: float = 0.001, velocity_decay: float = 0.4,
+                 iterations: Optional[int] = None, seed: int = 0):
+        if np is None:
+            raise RuntimeError("NumPy is required for server-side layout")
+        self.charge = charge
+        self.link_strength = link_strength
+        self.position_strength = position_strength
+        self.collide_padding = collide_padding
+        self.collide_iterations = collide_iterations
+        self.theta2 = theta * theta
+        self.alpha_min = alpha_min
+        self.alpha_decay = 1 - alpha_min ** (1 / 300)
+        self.velocity_decay = velocity_decay
+        # d3 stops once alpha < alpha_min, i.e. after ~300 ticks by default
+        self.iterations = iterations or math.ceil(math.log(alpha_min) / math.log(1 - self.alpha_decay))
+        self.rng = np.random.default_rng(seed)
+
+    # ------------------------------------------------------------------ setup
+
+    @staticmethod
+    def initial_positions(n: int) -> Tuple["np.ndarray", "np.ndarray"]:
+        """d3's phyllotaxis arrangement for nodes without positions."""
+        i = np.arange(n, dtype=np.float64)
+        radius = 10 * np.sqrt(0.5 + i)
+        angle = i * (math.pi * (3 - math.sqrt(5)))
+        return radius * np.cos(angle), radius * np.sin(angle)
+
+    def link_distances(self, graph: CompactGraph, source, target, radii) -> "np.ndarray":
+        """Same rule as linkDistance() in Graph.jsx."""
+        types = np.asarray(graph.type_ids, dtype=np.int64)
+        konu = np.array([name == "konu" for name in graph.type_names], dtype=bool)[types]
+        kazanim = np.array([name == "kazanım" for name in graph.type_names], dtype=bool)[types]
+        r = np.where(radii > 0, radii, 14)
+        distance = 30 + (r[source] + r[target]) * 0.9
+        distance += np.where(konu[source] | konu[target], 60, 0)
+        distance += np.where(kazanim[target], 5, 0)
+        return distance
+
+    def _nonzero(self, values: "np.ndarray") -> "np.ndarray":
+        """Replace exact zeros with a tiny random offset, like d3's jiggle()."""
+        zero = values == 0
+        if zero.any():
+            values = values.copy()
+            values[zero] = (self.rng.random(int(zero.sum())) - 0.5) * 1e-6
+        return values
+
+    # ----------------------------------------------------------------- forces
+
+    def _apply_links(self, x, y, vx, vy, source, target, distance, bias, alpha):
+        dx = x[target] + vx[target] - x[source] - vx[source]
+        dy = y[target] + vy[target] - y[source] - vy[source]
+        dx = self._nonzero(dx)
+        dy = self._nonzero(dy)
+        length = np.sqrt(dx * dx + dy * dy)
+        length = (length - distance) / length * alpha * self.link_strength
+        dx *= length
+        dy *= length
+        np.subtract.at(vx, target, dx * bias)
+        np.subtract.at(vy, target, dy * bias)
+        np.add.at(vx, source, dx * (1 - bias))
+        np.add.at(vy, source, dy * (1 - bias))
+
+    def _apply_charge(self, x, y, vx, vy, alpha):
+        n = x.size
+        if n < 2:
+            return
+        x0, y0 = x.min(), y.min()
+        size = max(x.max() - x0, y.max() - y0) * (1 + 1e-9) or 1.0
+        # about one node per leaf cell on average
+        depth = max(1, min(12, math.ceil(math.log(n, 4))))
+        strength = self.charge * alpha
+
+        # centre of mass and count per cell, for every quadtree level
+        levels = []
+        for level in range(depth + 1):
+            side = 1 << level
+            w = size / side
+            ix = np.minimum(((x - x0) / w).astype(np.int64), side - 1)
+            iy = np.minimum(((y - y0) / w).astype(np.int64), side - 1)
+            cell = iy * side + ix
+            count = np.bincount(cell, minlength=side * side).astype(np.float64)
+            safe = np.where(count > 0, count, 1)
+            cx = np.bincount(cell, weights=x, minlength=side * side) / safe
+            cy = np.bincount(cell, weights=y, minlength=side * side) / safe
+            levels.append((side, w, cell, count, cx, cy))
+
+        fx = np.zeros(n)
+        fy = np.zeros(n)
+
+        def accumulate(nodes, dx, dy, dist2, mass):
+            dist2 = np.where(dist2 < 1, np.sqrt(dist2), dist2)
+            scale = strength * mass / dist2
+            np.add.at(fx, nodes, dx * scale)
+            np.add.at(fy, nodes, dy * scale)
+
+        # start from the four level-1 cells for every node
+        nodes = np.repeat(np.arange(n), 4)
+        cells = np.tile(np.arange(4), n)
+        for level in range(1, depth + 1):
+            side, w, node_cell, count, cx, cy = levels[level]
+            keep = count[cells] > 0
+            nodes, cells = nodes[keep], cells[keep]
+            dx = self._nonzero(cx[cells] - x[nodes])
+            dy = self._nonzero(cy[cells] - y[nodes])
+            dist2 = dx * dx + dy * dy
+            far = (w * w / self.theta2 < dist2) & (node_cell[nodes] != cells)
+            accumulate(nodes[far], dx[far], dy[far], dist2[far], count[cells[far]])
+            nodes, cells = nodes[~far], cells[~far]
+            if level == depth:
+                break
+            cxs, cys = cells % side, cells // side
+            child_side = side * 2
+            first_child = 2 * cys * child_side + 2 * cxs
+            nodes = np.repeat(nodes, 4)
+            cells = (first_child[:, None] + np.array([0, 1, child_side, child_side + 1])).reshape(-1)
+
+        # leaf cells that are still too close are resolved exactly, point by point
+        leaf_cell, leaf_count = levels[depth][2], levels[depth][3]
+        order = np.argsort(leaf_cell, kind="stable")
+        cell_start = np.zeros(leaf_count.size + 1, dtype=np.int64)
+        np.cumsum(leaf_count.astype(np.int64), out=cell_start[1:])
+        counts = leaf_count[cells].astype(np.int64)
+        ii = np.repeat(nodes, counts)
+        offsets = np.arange(ii.size) - np.repeat(np.cumsum(counts) - counts, counts)
+        jj = order[np.repeat(cell_start[cells], counts) + offsets]
+        mask = ii != jj
+        ii, jj = ii[mask], jj[mask]
+        if ii.size:
+            dx = self._nonzero(x[jj] - x[ii])
+            dy = self._nonzero(y[jj] - y[ii])
+            accumulate(ii, dx, dy, dx * dx + dy * dy, 1.0)
+
+        vx += fx
+        vy += fy
+
+    def _apply_collide(self, x, y, vx, vy, radii):
+        n = x.size
+        if n < 2:
+            return
+        r = radii + self.collide_padding
+        px, py = x + vx, y + vy
+        cell_size = 2 * r.max()
+        gx = np.floor(px / cell_size).astype(np.int64)
+        gy = np.floor(py / cell_size).astype(np.int64)
+        gx -= gx.min()
+        gy -= gy.min()
+        width = gx.max() + 3
+        cell = (gy + 1) * width + (gx + 1)
+        order = np.argsort(cell, kind="stable")
+        sorted_cells = cell[order]
+        total_cells = (gy.max() + 3) * width
+        dense = total_cells <= 64 * n + 1024
+        if dense:
+            cell_start = np.zeros(total_cells + 1, dtype=np.int64)
+            np.cumsum(np.bincount(cell, minlength=total_cells), out=cell_start[1:])
+
+        # the three cells of a neighbouring row are contiguous in sorted order
+        ii_parts, jj_parts = [], []
+        for oy in (-1, 0, 1):
+            row = cell + oy * width
+            if dense:
+                lo = cell_start[row - 1]
+                counts = cell_start[row + 2] - lo
+            else:
+                lo = np.searchsorted(sorted_cells, row - 1, side="left")
+                counts = np.searchsorted(sorted_cells, row + 1, side="right") - lo
+            ii = np.repeat(np.arange(n), counts)
+            offsets = np.arange(ii.size) - np.repeat(np.cumsum(counts) - counts, counts)
+            jj = order[np.repeat(lo, counts) + offsets]
+            keep = jj > ii
+            ii_parts.append(ii[keep])
+            jj_parts.append(jj[keep])
+        ii = np.concatenate(ii_parts)
+        jj = np.concatenate(jj_parts)
+
+        dx = px[ii] - px[jj]
+        dy = py[ii] - py[jj]
+        rr = r[ii] + r[jj]
+        dist2 = dx * dx + dy * dy
+        hit = dist2 < rr * rr
+        ii, jj, dx, dy, rr, dist2 = ii[hit], jj[hit], dx[hit], dy[hit], rr[hit], dist2[hit]
+        if not ii.size:
+            return
+        dx = self._nonzero(dx)
+        dy = self._nonzero(dy)
+        dist = np.sqrt(dx * dx + dy * dy)
+        push = (rr - dist) / dist
+        dx *= push
+        dy *= push
+        rj2 = r[jj] ** 2
+        share = rj2 / (r[ii] ** 2 + rj2)
+        np.add.at(vx, ii, dx * share)
+        np.add.at(vy, ii, dy * share)
+        np.subtract.at(vx, jj, dx * (1 - share))
+        np.subtract.at(vy, jj, dy * (1 - share))
+
+    # -------------------------------------------------------------------- run
+
+    def run(self, graph: CompactGraph) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Return (x, y) float arrays aligned with the graph's node order."""
+        n = len(graph)
+        x, y = self.initial_positions(n)
+        vx = np.zeros(n)
+        vy = np.zeros(n)
+        if n == 0:
+            return x, y
+
+        radii = np.asarray(graph.r, dtype=np.float64)
+        source = np.asarray(graph.link_source, dtype=np.int64)
+        target = np.asarray(graph.link_target, dtype=np.int64)
+        distance = self.link_distances(graph, source, target, radii)
+        degree = np.bincount(np.concatenate([source, target]), minlength=n).astype(np.float64)
+        bias = degree[source] / (degree[source] + degree[target]) if source.size else source
+
+        alpha = 1.0
+        for _ in range(self.iterations):
+            alpha += -alpha * self.alpha_decay
+            if source.size:
+                self._apply_links(x, y, vx, vy, source, target, distance, bias, alpha)
+            self._apply_charge(x, y, vx, vy, alpha)
+            # forceCenter(0, 0)
+            x -= x.mean()
+            y -= y.mean()
+            # forceX(0) / forceY(0)
+            vx -= x * self.position_strength * alpha
+            vy -= y * self.position_strength * alpha
+            for _ in range(self.collide_iterations):
+                self._apply_collide(x, y, vx, vy, radii)
+            vx *= 1 - self.velocity_decay
+            vy *= 1 - self.velocity_decay
+            x += vx
+            y += vy
+        return x, y
+
+
+def compute_layout(graph: CompactGraph, **options) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Compute node positions for a graph with the frontend's force parameters."""
+    return ForceLayout(**options).run(graph)
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Curriculum registry.
+Discovers curriculum JSON files and resolves them to cached graphs by slug.
+"""
+
+import logging
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .graph_utils import CachedGraph, GraphCache, graph_cache
+
+logger = logging.getLogger(__name__)
+
+_SLUG_RE = re.compile(r"[^a-z0-9_/-]+")
+
+
+class CurriculumNotFound(LookupError):
+    """Raised when a curriculum key does not match any discovered file."""
+
+
+def slugify_path(relative: Path) -> str:
+    """Turn a path relative to the curriculum root into a URL-safe slug."""
+    slug = relative.with_suffix("").as_posix().lower()
+    return _SLUG_RE.sub("-", slug).strip("-")
+
+
+class CurriculumEntry:
+    """A discovered curriculum file."""
+
+    def __init__(self, slug: str, subject: str, path: Path):
+        self.slug = slug
+        self.subject = subject
+        self.path = path
+
+    @property
+    def name(self) -> str:
+        return self.path.stem
+
+    def as_dict(self) -> Dict[str, str]:
+        return {"slug": self.slug, "subject": self.subject, "name": self.name}
+
+
+class GraphRegistry:
+    """
+    Index of every curriculum JSON file under a root directory.
+
+    Files are indexed by slug (their path relative to the root, without the
+    extension, e.g. "matematik/matematik_kazanimlari_124_154"), by bare file
+    name when unambiguous, and by subject (the first directory). Graphs are
+    built lazily on first access and held in the shared, memory-bounded
+    GraphCache.
+    """
+
+    def __init__(self, cache: GraphCache = graph_cache):
+        self.cache = cache
+        self.root: Optional[Path] = None
+        self.default_slug: Optional[str] = None
+        self._entries: Dict[str, CurriculumEntry] = {}
+        self._aliases: Dict[str, str] = {}
+        self._by_subject: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+
+    def discover(self, root, default: Optional[str] = None) -> List[CurriculumEntry]:
+        """(Re)scan root for curriculum files and rebuild the index."""
+        root = Path(root)
+        entries: Dict[str, CurriculumEntry] = {}
+        by_subject: Dict[str, List[str]] = {}
+        names: Dict[str, List[str]] = {}
+
+        for path in sorted(root.rglob("*.json")) if root.is_dir() else []:
+            relative = path.relative_to(root)
+            slug = slugify_path(relative)
+            subject = slugify_path(Path(relative.parts[0])) if len(relative.parts) > 1 else ""
+            entries[slug] = CurriculumEntry(slug, subject, path)
+            by_subject.setdefault(subject, []).append(slug)
+            names.setdefault(slugify_path(Path(path.name)), []).append(slug)
+
+        aliases = {name: slugs[0] for name, slugs in names.items() if len(slugs) == 1 and name not in entries}
+
+        with self._lock:
+            self.root = root
+            self._entries = entries
+            self._aliases = aliases
+            self._by_subject = by_subject
+            self.default_slug = self._resolve_slug(default) if default else next(iter(entries), None)
+
+        logger.info("Discovered %d curricula under %s", len(entries), root)
+        return list(entries.values())
+
+    def _resolve_slug(self, key: str) -> Optional[str]:
+        key = key.strip().strip("/").lower()
+        if key in self._entries:
+            return key
+        if key in self._aliases:
+            return self._aliases[key]
+        subject_slugs = self._by_subject.get(key)
+        if subject_slugs:
+            return subject_slugs[0]
+        return None
+
+    def entries(self) -> List[CurriculumEntry]:
+        return list(self._entries.values())
+
+    def entry(self, key: Optional[str] = None) -> CurriculumEntry:
+        """
+        Resolve a slug, bare file name or subject to a curriculum entry.
+        Falls back to the default curriculum when key is empty.
+        Raises CurriculumNotFound for unknown curricula.
+        """
+        slug = self._resolve_slug(key) if key else self.default_slug
+        if slug is None:
+            raise CurriculumNotFound(key or "default")
+        return self._entries[slug]
+
+    def get(self, key: Optional[str] = None) -> CachedGraph:
+        """Return the built graph for a curriculum, building it on first access."""
+        return self.cache.get(str(self.entry(key).path))
+
+    def peek(self, key: Optional[str] = None) -> Optional[CachedGraph]:
+        """Return the curriculum's graph only if it is already cached and current."""
+        return self.cache.peek(str(self.entry(key).path))
+
+    def preload(self) -> int:
+        """Load every discovered curriculum into the cache; returns how many loaded."""
+        loaded = 0
+        for entry in self.entries():
+            try:
+                self.cache.get(str(entry.path))
+                loaded += 1
+            except Exception:
+                logger.exception("Could not preload curriculum %s", entry.slug)
+        return loaded
+
+
+graph_registry = GraphRegistry()
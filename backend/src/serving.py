@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers for serving graphs from pre-forked worker processes.
+
+With a preloading master (see gunicorn.conf.py), graphs are built once
+before forking and shared copy-on-write by every worker. gc.freeze() moves
+them out of the collector's generations, so collections in the workers do
+not write to (and thereby copy) the shared pages. Compact graphs
+(GRAPH_COMPACT_STORE) keep most data in a few large arrays, which also
+limits the pages touched by reference counting.
+"""
+
+import gc
+import logging
+import os
+import resource
+from typing import Callable, Dict, Optional
+
+from .graph_utils import CachedGraph
+from .registry import GraphRegistry, graph_registry
+
+logger = logging.getLogger(__name__)
+
+# /proc/self/smaps_rollup fields reported by memory_report(), in kB
+_SMAPS_FIELDS = {
+    "Rss": "rss",
+    "Pss": "pss",
+    "Shared_Clean": "shared_clean",
+    "Shared_Dirty": "shared_dirty",
+    "Private_Clean": "private_clean",
+    "Private_Dirty": "private_dirty",
+}
+
+
+def memory_report() -> Dict[str, int]:
+    """
+    Memory of the current process in bytes.
+
+    On Linux this includes PSS (pages shared with N processes count 1/N)
+    and the shared/private split; elsewhere only the peak RSS is known.
+    """
+    report: Dict[str, int] = {"pid": os.getpid()}
+    try:
+        with open("/proc/self/smaps_rollup") as fp:
+            for line in fp:
+                name, _, value = line.partition(":")
+                key = _SMAPS_FIELDS.get(name)
+                if key:
+                    report[key] = int(value.split()[0]) * 1024
+    except OSError:
+        # ru_maxrss is in kB on Linux and in bytes on macOS; the latter has no /proc
+        report["max_rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    report["gc_frozen_objects"] = gc.get_freeze_count()
+    return report
+
+
+def preload_and_freeze(registry: GraphRegistry = graph_registry,
+                       warm: Optional[Callable[[CachedGraph], None]] = None) -> Dict[str, int]:
+    """
+    Load every curriculum, optionally warm each graph (e.g. build payloads),
+    then freeze all live objects. Call in the master before forking.
+    """
+    loaded = registry.preload()
+    if warm is not None:
+        for entry in registry.entries():
+            try:
+                warm(registry.get(entry.slug))
+            except Exception:
+                logger.exception("Could not warm curriculum %s", entry.slug)
+    # collect first so garbage is not frozen along with the graphs
+    gc.collect()
+    gc.freeze()
+    report = memory_report()
+    logger.info("Preloaded %d curricula and froze %d objects (rss=%s)",
+                loaded, report["gc_frozen_objects"], report.get("rss", report.get("max_rss")))
+    return {"curricula": loaded, **report}
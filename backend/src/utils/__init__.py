@@ -4,16 +4,19 @@ Utilities package for the graph visualization system.
 (Top-level mirror of backend.src.utils for direct src usage.)
 """
 
-from .colors import score_to_color, TYPE_COLORS, TYPE_BASE_RADIUS, clamp01
+from .colors import (score_to_color, score_to_radius, scores_to_colors, scores_to_radii,
+                     scores_to_rgb, TYPE_COLORS, TYPE_BASE_RADIUS, clamp01)
 from .text import esc, trim_label
-from .data_loader import load_curriculum_data, validate_record
+from .data_loader import load_curriculum_data, iter_curriculum_records, validate_record
 from .graph_processor import GraphProcessor, create_graph_data
+from .graph_store import CompactGraph
 from .template_manager import TemplateManager
 
 __all__ = [
-    'score_to_color', 'TYPE_COLORS', 'TYPE_BASE_RADIUS', 'clamp01',
+    'score_to_color', 'score_to_radius', 'scores_to_colors', 'scores_to_radii', 'scores_to_rgb',
+    'TYPE_COLORS', 'TYPE_BASE_RADIUS', 'clamp01',
     'esc', 'trim_label',
-    'load_curriculum_data', 'validate_record',
-    'GraphProcessor', 'create_graph_data',
+    'load_curriculum_data', 'iter_curriculum_records', 'validate_record',
+    'GraphProcessor', 'create_graph_data', 'CompactGraph',
     'TemplateManager'
 ]
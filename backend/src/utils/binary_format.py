@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Binary graph wire format.
+
+Layout (all integers little-endian, every section starts 4-byte aligned so
+it can be viewed directly as a JS typed array):
+
+    header   magic "EGRF", u16 version, u16 flags,
+             u32 node_count, u32 link_count, u32 string_count, u32 type_count
+    strings  u32 offsets[string_count + 1], UTF-8 bytes (deduplicated table)
+    types    u32 string index per node type name
+    ids      u32 string index per node
+    labels   u32 string index per node
+    titles   u32 string index per node
+    colors   u32 0xRRGGBB per node
+    source   u32 node index per link
+    target   u32 node index per link
+    r        i16 radius per node
+    type_ids u8 type index per node
+    x, y     f32 layout position per node (only when flags & FLAG_POSITIONS)
+"""
+
+import struct
+import sys
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+from .graph_store import CompactGraph
+
+MAGIC = b"EGRF"
+VERSION = 1
+MEDIA_TYPE = "application/vnd.edugraph.graph"
+FLAG_POSITIONS = 1
+
+_HEADER = struct.Struct("<4sHHIIII")
+
+
+def _le(values: array) -> bytes:
+    if values.itemsize > 1 and sys.byteorder == "big":  # pragma: no cover
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _pad(buf: bytearray) -> None:
+    buf.extend(b"\0" * (-len(buf) % 4))
+
+
+class _StringTable:
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.strings: List[bytes] = []
+
+    def add(self, value: Any) -> int:
+        value = "" if value is None else str(value)
+        i = self.index.get(value)
+        if i is None:
+            i = len(self.strings)
+            self.index[value] = i
+            self.strings.append(value.encode("utf-8"))
+        return i
+
+
+def encode_graph(graph: CompactGraph, positions: Optional[Tuple[array, array]] = None) -> bytes:
+    """Encode a CompactGraph (and optionally its x/y layout) into the binary wire format."""
+    table = _StringTable()
+    type_refs = array("I", (table.add(name) for name in graph.type_names))
+    id_refs = array("I", (table.add(v) for v in graph.ids))
+    label_refs = array("I", (table.add(v) for v in graph.labels))
+    title_refs = array("I", (table.add(v) for v in graph.titles))
+
+    offsets = array("I", [0])
+    for s in table.strings:
+        offsets.append(offsets[-1] + len(s))
+
+    flags = FLAG_POSITIONS if positions is not None else 0
+    buf = bytearray(_HEADER.pack(MAGIC, VERSION, flags, len(graph), graph.link_count,
+                                 len(table.strings), len(graph.type_names)))
+    buf += _le(offsets)
+    buf += b"".join(table.strings)
+    _pad(buf)
+    for column in (type_refs, id_refs, label_refs, title_refs, graph.colors):
+        buf += _le(array("I", column))
+    buf += _le(array("I", graph.link_source))
+    buf += _le(array("I", graph.link_target))
+    buf += _le(array("h", graph.r))
+    _pad(buf)
+    buf += graph.type_ids.tobytes()
+    _pad(buf)
+    if positions is not None:
+        buf += _le(array("f", positions[0]))
+        buf += _le(array("f", positions[1]))
+    return bytes(buf)
+
+
+def decode_graph(data: bytes) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Reference decoder: return (nodes, links) dicts from the binary format."""
+    view = memoryview(data)
+    magic, version, flags, n, m, string_count, type_count = _HEADER.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise ValueError("Not an EduGraph binary graph")
+    if version != VERSION:
+        raise ValueError(f"Unsupported binary graph version: {version}")
+    pos = _HEADER.size
+
+    def read(typecode: str, count: int) -> array:
+        nonlocal pos
+        values = array(typecode)
+        values.frombytes(view[pos:pos + values.itemsize * count])
+        if values.itemsize > 1 and sys.byteorder == "big":  # pragma: no cover
+            values.byteswap()
+        pos += values.itemsize * count
+        pos += -pos % 4
+        return values
+
+    offsets = read("I", string_count + 1)
+    blob = bytes(view[pos:pos + offsets[-1]])
+    pos += offsets[-1]
+    pos += -pos % 4
+    strings = [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(string_count)]
+
+    type_names = [strings[i] for i in read("I", type_count)]
+    ids = read("I", n)
+    labels = read("I", n)
+    titles = read("I", n)
+    colors = read("I", n)
+    source = read("I", m)
+    target = read("I", m)
+    radii = read("h", n)
+    type_ids = read("B", n)
+    if flags & FLAG_POSITIONS:
+        xs = read("f", n)
+        ys = read("f", n)
+
+    nodes = [
+        {
+            "id": strings[ids[i]],
+            "type": type_names[type_ids[i]],
+            "r": radii[i],
+            "color": f"#{colors[i]:06x}",
+            "label": strings[labels[i]],
+            "title": strings[titles[i]],
+        }
+        for i in range(n)
+    ]
+    if flags & FLAG_POSITIONS:
+        for node, x, y in zip(nodes, xs, ys):
+            node["x"] = x
+            node["y"] = y
+    links = [{"source": strings[ids[s]], "target": strings[ids[t]]} for s, t in zip(source, target)]
+    return nodes, links
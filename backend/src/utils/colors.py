@@ -4,17 +4,24 @@ Color utilities for the graph visualization.
 Handles color interpolation and score-to-color mapping.
 """
 
-from typing import Tuple
+from typing import Iterable, List, Sequence, Tuple
+
+try:  # optional dependency; the batch helpers fall back to the scalar path
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
 
 
 def clamp01(x: float) -> float:
     """Clamp a value between 0 and 1.
-    Accepts any number-like input; returns 0..1 float.
+    Accepts any number-like input; returns 0..1 float (0 for NaN, like the batch helpers).
     """
     try:
         v = float(x)
     except Exception:
         return 0.0
+    if v != v:  # NaN
+        return 0.0
     return 0.0 if v < 0.0 else 1.0 if v > 1.0 else v
 
 
@@ -40,13 +47,83 @@ def hex_interp(c1: str, c2: str, t: float) -> str:
     return _rgb_to_hex(r, g, b)
 
 
+# red -> yellow -> green ramp used by score_to_color
+SCORE_RAMP = ("#e53935", "#ffb300", "#00c853")
+
+
 def score_to_color(score: float) -> str:
     """Convert a score (0..1) to a color along red->yellow->green ramp."""
     s = clamp01(score)
     # 0..0.5: red -> yellow, 0.5..1: yellow -> green
     if s <= 0.5:
-        return hex_interp("#e53935", "#ffb300", s / 0.5)
-    return hex_interp("#ffb300", "#00c853", (s - 0.5) / 0.5)
+        return hex_interp(SCORE_RAMP[0], SCORE_RAMP[1], s / 0.5)
+    return hex_interp(SCORE_RAMP[1], SCORE_RAMP[2], (s - 0.5) / 0.5)
+
+
+def score_to_radius(score: float) -> int:
+    """Radius of a kazanım node with the given score (0..1)."""
+    return max(8, int(TYPE_BASE_RADIUS["kazanım"] + clamp01(score) * 10))
+
+
+def rgb_to_hex(value: int) -> str:
+    """Format a packed 0xRRGGBB int as '#rrggbb'."""
+    hex_color = _HEX_CACHE.get(value)
+    if hex_color is None:
+        # the ramp only produces a few hundred distinct colors
+        hex_color = _HEX_CACHE[value] = f"#{value:06x}"
+    return hex_color
+
+
+_HEX_CACHE = {}
+
+
+def _score_array(scores: Iterable[float]) -> "np.ndarray":
+    if not hasattr(scores, "__len__"):
+        scores = list(scores)
+    try:
+        values = np.asarray(scores, dtype=np.float64)
+    except (TypeError, ValueError):
+        values = np.fromiter((clamp01(s) for s in scores), dtype=np.float64)
+    if values.ndim != 1:
+        values = values.reshape(-1)
+    # NaN has no place on the ramp; treat it like a missing score
+    return np.clip(np.nan_to_num(values, nan=0.0), 0.0, 1.0)
+
+
+def scores_to_rgb(scores: Iterable[float]) -> Sequence[int]:
+    """
+    Batch score_to_color, returning packed 0xRRGGBB ints.
+
+    Uses the same float64 arithmetic and truncation as the scalar path, so
+    rgb_to_hex(scores_to_rgb(s)[i]) == score_to_color(s[i]) exactly. Returns
+    a uint32 ndarray with NumPy, a list otherwise.
+    """
+    if np is None:
+        return [int(score_to_color(s)[1:], 16) for s in scores]
+    s = _score_array(scores)
+    low = s <= 0.5
+    t = np.where(low, s / 0.5, (s - 0.5) / 0.5)
+    packed = np.zeros(s.size, dtype=np.uint32)
+    ramp = [_hex_to_rgb(c) for c in SCORE_RAMP]
+    for channel, shift in enumerate((16, 8, 0)):
+        c0, c1, c2 = (rgb[channel] for rgb in ramp)
+        start = np.where(low, c0, c1)
+        delta = np.where(low, c1 - c0, c2 - c1)
+        packed |= (start + delta * t).astype(np.uint32) << np.uint32(shift)
+    return packed
+
+
+def scores_to_colors(scores: Iterable[float]) -> List[str]:
+    """Batch score_to_color; identical output to the scalar function."""
+    return [rgb_to_hex(int(v)) for v in scores_to_rgb(scores)]
+
+
+def scores_to_radii(scores: Iterable[float]) -> Sequence[int]:
+    """Batch score_to_radius (int32 ndarray with NumPy, a list otherwise)."""
+    if np is None:
+        return [score_to_radius(s) for s in scores]
+    s = _score_array(scores)
+    return np.maximum(8, (TYPE_BASE_RADIUS["kazanım"] + s * 10).astype(np.int32))
 
 
 # Type colors for different node types
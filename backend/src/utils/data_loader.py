@@ -5,20 +5,93 @@ Data loading utilities for curriculum data.
 
 import json
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterator, List, Optional
+
+from .timing import phase
+
+try:  # optional dependency for incremental parsing of large exports
+    import ijson
+except ImportError:  # pragma: no cover - depends on the environment
+    ijson = None
+
+# Files at least this large are streamed record by record instead of being
+# parsed into a full object tree first.
+STREAMING_THRESHOLD_BYTES = 32 * 1024 * 1024
+
+# Key used by the original mathematics export; other subjects use their own
+# "<Ders> Kazanımları" key, so any top-level list of records is accepted.
+DEFAULT_RECORDS_KEY = "Matematik Kazanımları"
+
+
+def extract_records(raw_data: Any) -> List[Dict[str, Any]]:
+    """Return the record list from a parsed curriculum document."""
+    if isinstance(raw_data, list):
+        return raw_data
+    if not isinstance(raw_data, dict):
+        return []
+    if DEFAULT_RECORDS_KEY in raw_data:
+        return raw_data[DEFAULT_RECORDS_KEY]
+    for value in raw_data.values():
+        if isinstance(value, list):
+            return value
+    return []
 
 
 def load_curriculum_data(file_path: str) -> List[Dict[str, Any]]:
     """
     Load curriculum data from JSON file.
-    Accepts both dict with key "Matematik Kazanımları" or plain list.
+    Accepts a dict keyed by "<Ders> Kazanımları" (e.g. "Matematik Kazanımları")
+    or a plain list.
+    """
+    with phase("read"):
+        text = Path(file_path).read_text(encoding="utf-8")
+    with phase("parse"):
+        raw_data = json.loads(text)
+    return extract_records(raw_data)
+
+
+def _find_records_prefix(fp) -> Optional[str]:
     """
-    raw_data = json.loads(Path(file_path).read_text(encoding="utf-8"))
+    Scan parser events (without building objects) for the ijson prefix of
+    the record array: the top-level list, the DEFAULT_RECORDS_KEY list, or
+    else the first top-level list value.
+    """
+    current_key = None
+    first_list_key = None
+    for prefix, event, value in ijson.parse(fp):
+        if prefix == "" and event == "start_array":
+            return "item"
+        if prefix == "" and event == "map_key":
+            current_key = value
+        elif event == "start_array" and current_key is not None and prefix == current_key:
+            if current_key == DEFAULT_RECORDS_KEY:
+                return f"{current_key}.item"
+            if first_list_key is None:
+                first_list_key = current_key
+    return f"{first_list_key}.item" if first_list_key is not None else None
+
 
-    if isinstance(raw_data, dict) and "Matematik Kazanımları" in raw_data:
-        return raw_data["Matematik Kazanımları"]
+def iter_curriculum_records(file_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield validated curriculum records one at a time.
+
+    Uses ijson's incremental parser so only the current record is held in
+    memory. Without ijson installed this falls back to load_curriculum_data.
+    """
+    if ijson is None:
+        for record in load_curriculum_data(file_path):
+            if validate_record(record):
+                yield record
+        return
 
-    return raw_data if isinstance(raw_data, list) else []
+    with open(file_path, "rb") as fp:
+        prefix = _find_records_prefix(fp)
+        if prefix is None:
+            return
+        fp.seek(0)
+        for record in ijson.items(fp, prefix, use_float=True):
+            if isinstance(record, dict) and validate_record(record):
+                yield record
 
 
 def validate_record(record: Dict[str, Any]) -> bool:
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Hierarchy index over the parent -> child links of a curriculum graph.
+Answers subtree and ancestor queries in time proportional to the result.
+"""
+
+from array import array
+from typing import Any, Dict, List, Optional, Sequence
+
+
+class HierarchyIndex:
+    """
+    Children-by-parent (CSR), parent-by-child and Euler-tour subtree ranges.
+
+    Node positions follow the graph's node order. For node v, the nodes of
+    its subtree are order[tin[v]:tin[v] + size[v]] in pre-order.
+    """
+
+    __slots__ = ("ids", "position", "parent", "child_offsets", "children",
+                 "order", "tin", "size", "depth", "roots")
+
+    def __init__(self, ids: Sequence[Any], source: Sequence[int], target: Sequence[int]):
+        n = len(ids)
+        self.ids = ids
+        self.position: Dict[Any, int] = {node_id: i for i, node_id in enumerate(ids)}
+
+        # first parent wins if the data lists a node under several parents
+        self.parent = array("i", [-1]) * n
+        edges = [(s, t) for s, t in zip(source, target) if s != t]
+        kept = []
+        for s, t in edges:
+            if self.parent[t] == -1:
+                self.parent[t] = s
+                kept.append((s, t))
+
+        counts = [0] * (n + 1)
+        for s, _ in kept:
+            counts[s + 1] += 1
+        for i in range(n):
+            counts[i + 1] += counts[i]
+        self.child_offsets = array("i", counts)
+        self.children = array("i", [0]) * len(kept)
+        fill = list(counts[:n])
+        for s, t in kept:
+            self.children[fill[s]] = t
+            fill[s] += 1
+
+        self.order = array("i")
+        self.tin = array("i", [-1]) * n
+        self.size = array("i", [0]) * n
+        self.depth = array("i", [0]) * n
+        self.roots = [i for i in range(n) if self.parent[i] == -1]
+        self._euler_tour(n)
+
+    def _euler_tour(self, n: int) -> None:
+        # iterative pre-order DFS; nodes on a parent cycle have no root and
+        # are started afterwards so every node gets a range
+        starts = self.roots + list(range(n))
+        for root in starts:
+            if self.tin[root] != -1:
+                continue
+            self.depth[root] = 0
+            stack = [(root, False)]
+            while stack:
+                v, done = stack.pop()
+                if done:
+                    self.size[v] = len(self.order) - self.tin[v]
+                    continue
+                self.tin[v] = len(self.order)
+                self.order.append(v)
+                stack.append((v, True))
+                kids = self.children[self.child_offsets[v]:self.child_offsets[v + 1]]
+                for child in reversed(kids):
+                    if self.tin[child] == -1:
+                        self.depth[child] = self.depth[v] + 1
+                        stack.append((child, False))
+
+    def index_of(self, node_id: Any) -> Optional[int]:
+        return self.position.get(node_id)
+
+    def children_of(self, v: int) -> array:
+        return self.children[self.child_offsets[v]:self.child_offsets[v + 1]]
+
+    def subtree(self, v: int, max_depth: Optional[int] = None) -> List[int]:
+        """Node positions in v's subtree (pre-order), optionally limited to max_depth levels below v."""
+        if max_depth is None:
+            start = self.tin[v]
+            return list(self.order[start:start + self.size[v]])
+        # depth-limited walk only touches the returned nodes
+        result = []
+        stack = [(v, 0)]
+        while stack:
+            u, d = stack.pop()
+            result.append(u)
+            if d < max_depth:
+                kids = self.children_of(u)
+                lo, hi = self.tin[u], self.tin[u] + self.size[u]
+                stack.extend((child, d + 1) for child in reversed(kids) if lo < self.tin[child] < hi)
+        return result
+
+    def is_ancestor(self, a: int, v: int) -> bool:
+        """True if a is v or one of v's ancestors (O(1) via the tour ranges)."""
+        return self.tin[a] <= self.tin[v] < self.tin[a] + self.size[a]
+
+    def ancestors(self, v: int) -> List[int]:
+        """Ancestor positions of v, root first (v itself excluded)."""
+        path = []
+        seen = {v}
+        u = self.parent[v]
+        while u != -1 and u not in seen:
+            path.append(u)
+            seen.add(u)
+            u = self.parent[u]
+        path.reverse()
+        return path
+
+    def tree_links(self, positions: Sequence[int]) -> List[Dict[str, Any]]:
+        """Parent -> child links between the given nodes."""
+        members = set(positions)
+        ids = self.ids
+        return [
+            {"source": ids[self.parent[v]], "target": ids[v]}
+            for v in positions
+            if self.parent[v] != -1 and self.parent[v] in members
+        ]
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.parent, self.child_offsets, self.children, self.order, self.tin, self.size, self.depth)
+        return sum(a.itemsize * len(a) for a in arrays) + 100 * len(self.position)
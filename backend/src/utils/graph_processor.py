@@ -3,9 +3,11 @@
 Graph processing utilities for creating nodes and links from curriculum data.
 """
 
-from typing import List, Dict, Any, Tuple
-from .colors import score_to_color, TYPE_COLORS, TYPE_BASE_RADIUS, clamp01
+from typing import Iterable, List, Dict, Any, Tuple
+from .colors import (score_to_color, score_to_radius, scores_to_colors, scores_to_radii,
+                     TYPE_COLORS, TYPE_BASE_RADIUS, clamp01)
 from .text import esc, trim_label
+from .timing import phase
 
 
 class GraphProcessor:
@@ -15,23 +17,63 @@ class GraphProcessor:
         self.nodes: List[Dict[str, Any]] = []
         self.links: List[Dict[str, Any]] = []
         self._id_to_node: Dict[Any, Dict[str, Any]] = {}
+        # clamped basari_puani per node, aligned with self.nodes
+        self.scores: List[float] = []
 
-    def process_records(self, records: List[Dict[str, Any]]) -> Tuple[List[Dict], List[Dict]]:
+    def process_records(self, records: Iterable[Dict[str, Any]]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Build nodes and links in a single pass over records.
+
+        records may be a generator (see iter_curriculum_records); only the
+        (child, parent) id pairs are kept until every node is known, so peak
+        memory follows the size of the output graph.
+        """
         self.nodes = []
         self.links = []
         self._id_to_node = {}
-        self._create_nodes(records)
-        self._create_links(records)
+        self.scores = []
+        edges: List[Tuple[Any, Any]] = []
+        kazanim: List[int] = []
+        # with a streaming records iterator this phase includes parsing
+        with phase("nodes"):
+            self._collect(records, edges, kazanim)
+            self._style_kazanim_nodes(kazanim)
+        with phase("links"):
+            self._create_links(edges)
         return self.nodes, self.links
 
-    def _create_nodes(self, records: List[Dict[str, Any]]) -> None:
+    def _collect(self, records: Iterable[Dict[str, Any]], edges: List[Tuple[Any, Any]],
+                 kazanim: List[int]) -> None:
         for rec in records:
-            node = self._create_node(rec)
+            node = self._create_node(rec, score_style=False)
             if node is not None:
+                if node["type"] == "kazanım":
+                    kazanim.append(len(self.nodes))
                 self._id_to_node[node["id"]] = node
                 self.nodes.append(node)
-
-    def _create_node(self, record: Dict[str, Any]) -> Dict[str, Any] | None:
+                self.scores.append(self.record_score(rec))
+            child_id = rec.get("id")
+            parent_id = rec.get("parent_id")
+            if child_id and parent_id:
+                edges.append((child_id, parent_id))
+
+    @staticmethod
+    def record_score(record: Dict[str, Any]) -> float:
+        return clamp01(record.get("basari_puani") or 0.0)
+
+    def _style_kazanim_nodes(self, positions: List[int]) -> None:
+        # one vectorized pass instead of score_to_color/int() per node
+        scores = [self.scores[i] for i in positions]
+        for i, color, r in zip(positions, scores_to_colors(scores), scores_to_radii(scores)):
+            node = self.nodes[i]
+            node["r"] = int(r)
+            node["color"] = color
+
+    def _create_node(self, record: Dict[str, Any], score_style: bool = True) -> Dict[str, Any] | None:
+        """
+        Build the node dict for a record. With score_style=False, kazanım
+        nodes get placeholder r/color to be filled in by a batch pass.
+        """
         node_id = record.get("id")
         if not node_id:
             return None
@@ -41,9 +83,12 @@ class GraphProcessor:
 
         # radius boosts for hierarchy and performance
         if node_type == "kazanım":
-            perf = clamp01(record.get("basari_puani") or 0.0)
-            r = max(8, int(base_r + perf * 10))
-            color = score_to_color(perf)
+            if score_style:
+                perf = clamp01(record.get("basari_puani") or 0.0)
+                r = score_to_radius(perf)
+                color = score_to_color(perf)
+            else:
+                r, color = base_r, None
         else:
             r = base_r + (int(node_size) if isinstance(node_size, int) else 0)
             color = TYPE_COLORS.get(node_type) or "#90a4ae"
@@ -90,14 +135,12 @@ class GraphProcessor:
             items.append(f"<div>Başarı: {int(clamp01(basari)*100)}%</div>")
         return "".join(items) or esc(baslik or kod)
 
-    def _create_links(self, records: List[Dict[str, Any]]) -> None:
-        for rec in records:
-            child_id = rec.get("id")
-            parent_id = rec.get("parent_id")
-            if child_id and parent_id and child_id in self._id_to_node and parent_id in self._id_to_node:
+    def _create_links(self, edges: List[Tuple[Any, Any]]) -> None:
+        for child_id, parent_id in edges:
+            if child_id in self._id_to_node and parent_id in self._id_to_node:
                 self.links.append({"source": parent_id, "target": child_id})
 
 
 
-def create_graph_data(records: List[Dict[str, Any]]) -> Tuple[List[Dict], List[Dict]]:
+def create_graph_data(records: Iterable[Dict[str, Any]]) -> Tuple[List[Dict], List[Dict]]:
     return GraphProcessor().process_records(records)
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+Compact, array-backed graph storage.
+Keeps nodes as parallel columns and links as int32 index pairs; node/link
+dicts are only materialized at the serialization boundary.
+"""
+
+import sys
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .colors import rgb_to_hex, scores_to_radii, scores_to_rgb
+from .graph_processor import GraphProcessor
+
+
+class CompactGraph:
+    """
+    Columnar representation of a curriculum graph.
+
+    Node i is described by ids[i], type_names[type_ids[i]], r[i], colors[i]
+    (0xRRGGBB), labels[i], titles[i] and scores[i] (clamped basari_puani,
+    kept for aggregation and overlays); link j connects node
+    link_source[j] to node link_target[j]. to_nodes()/to_links() reproduce
+    exactly what GraphProcessor emits.
+    """
+
+    __slots__ = (
+        "ids", "index", "type_names", "_type_index", "type_ids", "r", "colors",
+        "labels", "titles", "scores", "link_source", "link_target",
+    )
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.index: Dict[Any, int] = {}
+        self.type_names: List[str] = []
+        self._type_index: Dict[str, int] = {}
+        self.type_ids = array("B")
+        self.r = array("h")
+        self.colors = array("I")
+        self.labels: List[str] = []
+        self.titles: List[str] = []
+        self.scores = array("f")
+        self.link_source = array("i")
+        self.link_target = array("i")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def link_count(self) -> int:
+        return len(self.link_source)
+
+    def _type_id(self, node_type: str) -> int:
+        type_id = self._type_index.get(node_type)
+        if type_id is None:
+            type_id = len(self.type_names)
+            self.type_names.append(node_type)
+            self._type_index[node_type] = type_id
+        return type_id
+
+    def add_node(self, node: Dict[str, Any], score: float = 0.0) -> int:
+        """Append a node dict (as built by GraphProcessor) and return its index."""
+        i = len(self.ids)
+        node_id = sys.intern(node["id"]) if isinstance(node["id"], str) else node["id"]
+        self.ids.append(node_id)
+        # duplicate ids resolve to the last occurrence, like GraphProcessor._id_to_node
+        self.index[node_id] = i
+        self.type_ids.append(self._type_id(node["type"]))
+        self.r.append(node["r"])
+        self.colors.append(int(node["color"][1:7], 16) if node["color"] else 0)
+        self.labels.append(node["label"])
+        self.titles.append(node["title"])
+        self.scores.append(score)
+        return i
+
+    def add_link(self, source: int, target: int) -> None:
+        self.link_source.append(source)
+        self.link_target.append(target)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]],
+                     processor: Optional[GraphProcessor] = None) -> "CompactGraph":
+        """
+        Build directly from curriculum records (list or generator).
+        Each node dict is transient, so no per-node dicts outlive the build.
+        """
+        processor = processor or GraphProcessor()
+        graph = cls()
+        edges: List[Tuple[Any, Any]] = []
+        kazanim: List[int] = []
+        kazanim_scores: List[float] = []
+        for rec in records:
+            node = processor._create_node(rec, score_style=False)
+            if node is not None:
+                score = processor.record_score(rec)
+                i = graph.add_node(node, score)
+                if node["type"] == "kazanım":
+                    kazanim.append(i)
+                    kazanim_scores.append(score)
+            child_id = rec.get("id")
+            parent_id = rec.get("parent_id")
+            if child_id and parent_id:
+                edges.append((child_id, parent_id))
+        graph.apply_scores(kazanim, kazanim_scores)
+        index = graph.index
+        for child_id, parent_id in edges:
+            if child_id in index and parent_id in index:
+                graph.add_link(index[parent_id], index[child_id])
+        return graph
+
+    @classmethod
+    def from_graph(cls, nodes: Iterable[Dict[str, Any]], links: Iterable[Dict[str, Any]],
+                   scores: Optional[Iterable[float]] = None) -> "CompactGraph":
+        """Convert GraphProcessor output (node and link dicts) to columns."""
+        graph = cls()
+        scores = iter(scores) if scores is not None else None
+        for node in nodes:
+            graph.add_node(node, next(scores) if scores is not None else 0.0)
+        for link in links:
+            graph.add_link(graph.index[link["source"]], graph.index[link["target"]])
+        return graph
+
+    def apply_scores(self, positions: List[int], scores: List[float]) -> None:
+        """Set kazanım color and radius for the given nodes in one batch pass."""
+        for i, rgb, r in zip(positions, scores_to_rgb(scores), scores_to_radii(scores)):
+            self.colors[i] = int(rgb)
+            self.r[i] = int(r)
+
+    def node_type(self, i: int) -> str:
+        return self.type_names[self.type_ids[i]]
+
+    def color(self, i: int) -> str:
+        return rgb_to_hex(self.colors[i])
+
+    def node(self, i: int) -> Dict[str, Any]:
+        return {
+            "id": self.ids[i],
+            "type": self.type_names[self.type_ids[i]],
+            "r": self.r[i],
+            "color": rgb_to_hex(self.colors[i]),
+            "label": self.labels[i],
+            "title": self.titles[i],
+        }
+
+    def iter_nodes(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self.ids)):
+            yield self.node(i)
+
+    def iter_links(self) -> Iterator[Dict[str, Any]]:
+        ids = self.ids
+        for s, t in zip(self.link_source, self.link_target):
+            yield {"source": ids[s], "target": ids[t]}
+
+    def to_nodes(self) -> List[Dict[str, Any]]:
+        return list(self.iter_nodes())
+
+    def to_links(self) -> List[Dict[str, Any]]:
+        return list(self.iter_links())
+
+    def type_counts(self) -> Dict[str, int]:
+        counts = [0] * len(self.type_names)
+        for type_id in self.type_ids:
+            counts[type_id] += 1
+        return {name: counts[i] for i, name in enumerate(self.type_names)}
+
+    def link_type_counts(self) -> Dict[str, int]:
+        names = self.type_names
+        type_ids = self.type_ids
+        link_types: Dict[str, int] = {}
+        for s, t in zip(self.link_source, self.link_target):
+            key = f"{names[type_ids[s]]} → {names[type_ids[t]]}"
+            link_types[key] = link_types.get(key, 0) + 1
+        return link_types
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the columns."""
+        total = sum(a.itemsize * len(a) for a in (
+            self.type_ids, self.r, self.colors, self.scores, self.link_source, self.link_target))
+        # list slots plus str objects for ids/labels/titles, and the id index
+        for column in (self.ids, self.labels, self.titles):
+            total += 8 * len(column) + sum(len(s) + 49 for s in column if isinstance(s, str))
+        total += 100 * len(self.index)
+        return total
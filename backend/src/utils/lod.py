@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Level-of-detail aggregation for large curriculum graphs.
+Clusters (konu/grup/alt_grup) carry precomputed descendant counts and mean
+kazanım success so each zoom level is a lookup, not a recomputation.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .colors import score_to_color, TYPE_BASE_RADIUS
+from .graph_index import HierarchyIndex
+
+# Cluster types from the coarsest to the finest level
+LOD_LEVELS = ("konu", "grup", "alt_grup")
+_LEVEL_RANK = {name: rank for rank, name in enumerate(LOD_LEVELS)}
+
+
+class LevelOfDetail:
+    """
+    Bottom-up aggregates over the hierarchy, computed once per graph version.
+
+    For every cluster node: direct child count, number of kazanım nodes in
+    its subtree and their mean basari_puani. level_nodes(level) returns the
+    aggregated clusters from konu down to that level; expand() returns the
+    direct children of one cluster.
+    """
+
+    def __init__(self, index: HierarchyIndex, node_types: Sequence[str],
+                 scores: Sequence[float], node_at: Callable[[int], Dict[str, Any]]):
+        n = len(node_types)
+        self.index = index
+        self.node_at = node_at
+        self.node_types = node_types
+        kazanim_count = [0] * n
+        score_sum = [0.0] * n
+        child_count = [0] * n
+
+        # reversed pre-order visits every child before its parent
+        for v in reversed(index.order):
+            if node_types[v] == "kazanım":
+                kazanim_count[v] += 1
+                score_sum[v] += scores[v]
+            p = index.parent[v]
+            if p != -1 and p != v and index.is_ancestor(p, v):
+                kazanim_count[p] += kazanim_count[v]
+                score_sum[p] += score_sum[v]
+                child_count[p] += 1
+
+        self.clusters: Dict[int, Dict[str, Any]] = {}
+        for v in range(n):
+            if node_types[v] in _LEVEL_RANK:
+                self.clusters[v] = self._aggregate(v, child_count[v], kazanim_count[v], score_sum[v])
+
+        self.levels: Dict[str, List[int]] = {
+            level: [v for v in index.order if _LEVEL_RANK.get(node_types[v], len(LOD_LEVELS)) <= rank]
+            for rank, level in enumerate(LOD_LEVELS)
+        }
+
+    def _aggregate(self, v: int, child_count: int, kazanim_count: int, score_sum: float) -> Dict[str, Any]:
+        node = self.node_at(v)
+        mean = score_sum / kazanim_count if kazanim_count else 0.0
+        return dict(
+            node,
+            # clusters are coloured by mean mastery once they contain kazanım nodes
+            color=score_to_color(mean) if kazanim_count else node["color"],
+            r=max(node["r"], TYPE_BASE_RADIUS.get(node["type"], 10)),
+            child_count=child_count,
+            kazanim_count=kazanim_count,
+            mean_score=round(mean, 4),
+        )
+
+    def node(self, v: int) -> Dict[str, Any]:
+        """Aggregated dict for clusters, the plain node dict otherwise."""
+        cluster = self.clusters.get(v)
+        return cluster if cluster is not None else self.node_at(v)
+
+    def level_nodes(self, level: str) -> List[int]:
+        """Positions shown at a zoom level; raises KeyError for unknown levels."""
+        return self.levels[level]
+
+    def expand(self, v: int) -> List[int]:
+        """Direct (tree) children of v."""
+        index = self.index
+        return [c for c in index.children_of(v) if c != v and index.is_ancestor(v, c)]
+
+    def view(self, level: str, expand: Optional[Sequence[Any]] = None) -> Dict[str, Any]:
+        """Nodes, links and expanded ids for a level plus on-demand expansions."""
+        positions = list(self.level_nodes(level))
+        expanded = []
+        if expand:
+            seen = set(positions)
+            for node_id in expand:
+                v = self.index.index_of(node_id)
+                if v is None or v not in seen:
+                    continue
+                expanded.append(node_id)
+                for child in self.expand(v):
+                    if child not in seen:
+                        seen.add(child)
+                        positions.append(child)
+        return {
+            "level": level,
+            "nodes": [self.node(v) for v in positions],
+            "links": self.index.tree_links(positions),
+            "expanded": expanded,
+            "count": len(positions),
+        }
+
+    @property
+    def nbytes(self) -> int:
+        return 600 * len(self.clusters) + 8 * sum(len(v) for v in self.levels.values())
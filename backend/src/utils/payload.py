@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Pre-serialized response payloads.
+Encodes a JSON document once and keeps compressed variants next to it.
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Optional
+
+from .timing import phase
+
+try:  # optional dependency; gzip is always available
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+
+def encode_json(data: Any) -> bytes:
+    """Encode data the same way DRF's JSONRenderer does (compact UTF-8)."""
+    text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    # valid JSON but not valid JavaScript; DRF escapes them too
+    return text.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029").encode("utf-8")
+
+
+class EncodedPayload:
+    """A JSON body encoded once, with lazily built gzip/brotli variants.
+
+    The ETag is a strong validator derived from the identity body, so it only
+    changes when the underlying graph data changes. Bodies built per request
+    (e.g. per-user overlays) pass fast=True: maximum compression pays off
+    only when a variant is served many times.
+    """
+
+    ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+    def __init__(self, body: bytes, content_type: str = "application/json", fast: bool = False):
+        self.body = body
+        self.content_type = content_type
+        self.fast = fast
+        self.digest = hashlib.sha256(body).hexdigest()[:32]
+        self._variants: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the body and any compressed variants built so far."""
+        return len(self.body) + sum(len(v) for v in list(self._variants.values()))
+
+    @classmethod
+    def from_data(cls, data: Any, fast: bool = False) -> "EncodedPayload":
+        return cls(encode_json(data), fast=fast)
+
+    def etag(self, encoding: Optional[str] = None) -> str:
+        """Return the quoted ETag for the identity body or an encoded variant."""
+        return f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"'
+
+    def matches(self, if_none_match: str) -> bool:
+        """Check an If-None-Match header against any variant of this payload."""
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag == "*":
+                return True
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            tag = tag.strip('"')
+            if tag == self.digest or tag.split("-", 1)[0] == self.digest:
+                return True
+        return False
+
+    def is_encoded(self, encoding: str) -> bool:
+        """True if the variant for encoding has already been compressed."""
+        return encoding in self._variants
+
+    def encoded(self, encoding: str) -> bytes:
+        """Return the body compressed with the given encoding, compressing at most once."""
+        variant = self._variants.get(encoding)
+        if variant is not None:
+            return variant
+        with self._lock:
+            variant = self._variants.get(encoding)
+            if variant is None:
+                with phase("compress"):
+                    if encoding == "gzip":
+                        variant = gzip.compress(self.body, compresslevel=1 if self.fast else 9, mtime=0)
+                    elif encoding == "br" and brotli is not None:
+                        variant = brotli.compress(self.body, quality=4 if self.fast else 11)
+                    else:
+                        raise ValueError(f"Unsupported encoding: {encoding}")
+                self._variants[encoding] = variant
+        return variant
+
+    def negotiate(self, accept_encoding: str) -> Optional[str]:
+        """Pick the best supported encoding from an Accept-Encoding header."""
+        accepted = {}
+        for item in (accept_encoding or "").split(","):
+            name, _, params = item.strip().partition(";")
+            name = name.strip().lower()
+            if not name:
+                continue
+            q = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    q = float(params[2:])
+                except ValueError:
+                    q = 0.0
+            accepted[name] = q
+        for encoding in self.ENCODINGS:
+            if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+                return encoding
+        return None
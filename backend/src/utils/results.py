@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+Exam result parsing and per-kazanım aggregation.
+
+Result files are CSV (with a header row) or JSON Lines, one answer or one
+pre-aggregated count per row:
+
+    email       student e-mail (required)
+    kazanim_kodu  curriculum code, e.g. "9.1.1.1" - or test + question,
+                  resolved through an answer key
+    test        TYT, AYT, LGS ... (optional with kazanim_kodu)
+    question    question number within the test (with an answer key)
+    correct     1/0, true/false, D/Y - or a number of correct answers
+    total       number of questions the row stands for (default 1)
+
+Rows are read lazily and reduced in fixed-size NumPy batches, so memory
+follows the number of distinct (student, kazanım) pairs, not the file size.
+"""
+
+import csv
+import io
+import json
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+try:  # optional dependency; without it counts are reduced with plain dicts
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+# answer sheet marks: D(oğru) = correct, Y(anlış) = wrong, B(oş) = blank
+_TRUE = {"1", "true", "d", "doğru", "dogru", "evet"}
+_FALSE = {"0", "false", "y", "yanlış", "yanlis", "b", "boş", "bos", "hayır", "hayir", ""}
+
+
+def parse_correct(value: Any) -> float:
+    """Number of correct answers in a result cell; raises ValueError if unreadable."""
+    if isinstance(value, bool):
+        return 1.0 if value else 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    if value is None:
+        return 0.0
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return 1.0
+    if text in _FALSE:
+        return 0.0
+    return float(text.replace(",", "."))
+
+
+def _detect_format(name: str) -> str:
+    suffix = Path(name).suffix.lower()
+    if suffix in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    return "csv"
+
+
+def iter_rows(source, fmt: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield result rows from a path or a text/binary stream.
+    fmt is "csv" or "jsonl"; by default it follows the file name.
+    """
+    for _, row in iter_numbered_rows(source, fmt):
+        yield row
+
+
+def iter_numbered_rows(source, fmt: Optional[str] = None) -> Iterator[Tuple[int, Any]]:
+    """
+    Like iter_rows(), but yield (line number, row) pairs for error reports.
+    JSONL rows are yielded as parsed, so a line may hold a non-object value.
+    """
+    if isinstance(source, (str, Path)):
+        with open(source, encoding="utf-8-sig", newline="") as fp:
+            yield from iter_numbered_rows(fp, fmt or _detect_format(str(source)))
+        return
+    if isinstance(source.read(0), bytes):
+        source = io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+    fmt = fmt or _detect_format(getattr(source, "name", "") or "")
+    if fmt == "jsonl":
+        for number, line in enumerate(source, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"line {number}: {e}") from None
+            yield number, row
+        return
+    reader = csv.DictReader(source)
+    for row in reader:
+        yield reader.line_num, {key.strip().lower(): value for key, value in row.items() if key}
+
+
+def load_answer_key(source, fmt: Optional[str] = None) -> Dict[Tuple[str, str], str]:
+    """Map (test, question) to kazanim_kodu from a CSV/JSONL answer key."""
+    return {
+        (str(row.get("test") or "").strip().upper(), str(row["question"]).strip()): str(row["kazanim_kodu"]).strip()
+        for row in iter_rows(source, fmt)
+    }
+
+
+def kazanim_index(records: Iterable[Dict[str, Any]]) -> Dict[Tuple[str, str], Any]:
+    """
+    Map (test, kazanim_kodu) and ("", kazanim_kodu) to kazanım node ids.
+    The test-less key points at the first node with that code.
+    """
+    index: Dict[Tuple[str, str], Any] = {}
+    for rec in records:
+        code = rec.get("kazanim_kodu")
+        if not code or (rec.get("node_type") or "kazanım") != "kazanım":
+            continue
+        code = str(code).strip()
+        test = str(rec.get("test") or "").strip().upper()
+        index.setdefault((test, code), rec["id"])
+        index.setdefault(("", code), rec["id"])
+    return index
+
+
+class ResultAggregator:
+    """
+    Sums correct answers and question counts per (student, kazanım).
+
+    add() appends to flat typed buffers; every batch_size rows the buffer is
+    reduced in one vectorized pass (np.unique + bincount) to one entry per
+    distinct pair, and partial reductions are merged again at the end.
+    """
+
+    def __init__(self, batch_size: int = 50000):
+        self.batch_size = batch_size
+        self.students: Dict[Hashable, int] = {}
+        self.kazanims: Dict[Hashable, int] = {}
+        self._student_keys: List[Hashable] = []
+        self._kazanim_keys: List[Hashable] = []
+        self._keys = array("q")
+        self._correct = array("d")
+        self._total = array("d")
+        self._reduced: List[Tuple[Any, Any, Any]] = []
+        self.rows = 0
+
+    def _intern(self, table: Dict[Hashable, int], keys: List[Hashable], key: Hashable) -> int:
+        i = table.get(key)
+        if i is None:
+            i = table[key] = len(keys)
+            keys.append(key)
+        return i
+
+    def add(self, student: Hashable, kazanim: Hashable, correct: float, total: float = 1.0) -> None:
+        s = self._intern(self.students, self._student_keys, student)
+        k = self._intern(self.kazanims, self._kazanim_keys, kazanim)
+        self._keys.append((s << 32) | k)
+        self._correct.append(correct)
+        self._total.append(total)
+        self.rows += 1
+        if len(self._keys) >= self.batch_size:
+            self._flush()
+
+    def _reduce(self, keys, correct, total):
+        if np is None:
+            sums: Dict[int, List[float]] = {}
+            for key, c, t in zip(keys, correct, total):
+                entry = sums.setdefault(key, [0.0, 0.0])
+                entry[0] += c
+                entry[1] += t
+            return list(sums), [v[0] for v in sums.values()], [v[1] for v in sums.values()]
+        unique, inverse = np.unique(np.asarray(keys, dtype=np.int64), return_inverse=True)
+        return (unique,
+                np.bincount(inverse, weights=np.asarray(correct, dtype=np.float64), minlength=unique.size),
+                np.bincount(inverse, weights=np.asarray(total, dtype=np.float64), minlength=unique.size))
+
+    def _flush(self) -> None:
+        if self._keys:
+            self._reduced.append(self._reduce(self._keys, self._correct, self._total))
+            self._keys = array("q")
+            self._correct = array("d")
+            self._total = array("d")
+
+    def rates(self) -> Iterator[Tuple[Hashable, Hashable, float, float]]:
+        """Yield (student, kazanım, success rate 0..1, question count) per pair."""
+        self._flush()
+        if not self._reduced:
+            return
+        if np is None:
+            merged = ([], [], [])
+            for part in self._reduced:
+                for column, values in zip(merged, part):
+                    column.extend(values)
+        else:
+            merged = tuple(np.concatenate(column) for column in zip(*self._reduced))
+        keys, correct, total = self._reduce(*merged) if len(self._reduced) > 1 else self._reduced[0]
+        self._reduced = [(keys, correct, total)]
+
+        if np is not None:
+            positive = np.asarray(total) > 0
+            keys, correct, total = keys[positive], correct[positive], total[positive]
+            rate = np.clip(correct / total, 0.0, 1.0)
+            keys, rate, total = keys.tolist(), rate.tolist(), total.tolist()
+        else:
+            kept = [(k, c, t) for k, c, t in zip(keys, correct, total) if t > 0]
+            keys = [k for k, _, _ in kept]
+            rate = [min(1.0, max(0.0, c / t)) for _, c, t in kept]
+            total = [t for _, _, t in kept]
+
+        for key, r, t in zip(keys, rate, total):
+            yield self._student_keys[key >> 32], self._kazanim_keys[key & 0xFFFFFFFF], r, t
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Deterministic synthetic curricula for benchmarks and tests.
+
+Records follow the layout of the real exports (konu -> grup -> alt_grup ->
+kazanım, in depth-first order, with the same fields and node sizes), so
+the loader, GraphProcessor and the views do the same work they do on real
+data. The same (count, seed) always yields the same records.
+"""
+
+import json
+import math
+import random
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+from .data_loader import DEFAULT_RECORDS_KEY
+
+TOPICS = ["SAYILAR VE CEBİR", "GEOMETRİ", "VERİ VE OLASILIK", "ÖLÇME", "FONKSİYONLAR", "ANALİZ"]
+GROUPS = ["Mantık", "Kümeler", "Denklemler ve Eşitsizlikler", "Üçgenler", "Veri", "Olasılık",
+          "Üslü İfadeler", "Polinomlar", "Türev", "İntegral", "Diziler", "Trigonometri"]
+WORDS = ["önermeyi", "kümeyi", "denklemi", "eşitsizliği", "fonksiyonu", "grafiği", "üçgenin",
+         "açıları", "alanını", "olasılığı", "veriyi", "örneklerle", "açıklar", "çözer", "modeller",
+         "yorumlar", "hesaplar", "gösterir", "problemleri", "kuralları", "bağıntıları", "ilişkisini"]
+TESTS = ["TYT", "AYT"]
+FIELDS = ["Tümü (Sayısal, EA, Sözel, Dil)", "Sayısal, EA", "Sayısal"]
+NODE_SIZES = {"konu": 4, "grup": 3, "alt_grup": 2, "kazanım": 1}
+
+# size labels accepted by parse_size / used as benchmark keys
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+
+def parse_size(label: str) -> int:
+    """'10k' -> 10000, '1m' -> 1000000, '250' -> 250."""
+    label = label.strip().lower()
+    if label in SIZES:
+        return SIZES[label]
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(label[-1:], 1)
+    return int(float(label[:-1] if multiplier > 1 else label) * multiplier)
+
+
+def _record(node_id, code, title, node_type, parent_id, topic, grade="", test="", field="—", score=0.0):
+    return {
+        "id": node_id,
+        "kazanim_kodu": code,
+        "baslik": title,
+        "sinif": grade,
+        "konu": topic,
+        "test": test,
+        "alan_uygunlugu": field,
+        "basari_puani": score,
+        "node_type": node_type,
+        "node_size": NODE_SIZES[node_type],
+        "parent_id": parent_id,
+    }
+
+
+def iter_synthetic_records(count: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """
+    Yield exactly count records (for count >= 2). Topics grow with the
+    square root of the size; every grup has 1-4 alt_grup and every
+    alt_grup 1-5 kazanım, like the real exports.
+    """
+    rng = random.Random(seed)
+    topics = max(2, math.isqrt(count) // 10)
+    emitted = 0
+    for t in range(topics):
+        if emitted >= count:
+            return
+        topic = f"{TOPICS[t % len(TOPICS)]} {t // len(TOPICS) + 1}" if t >= len(TOPICS) else TOPICS[t]
+        topic_id = f"konu_{t}"
+        yield _record(topic_id, topic, topic, "konu", "", topic)
+        emitted += 1
+
+        quota = count * (t + 1) // topics
+        g = 0
+        while emitted < quota:
+            g += 1
+            grade = 9 + (g - 1) % 4
+            test = TESTS[grade >= 11]
+            field = rng.choice(FIELDS)
+            group_id = f"grp_{t}_{g}"
+            yield _record(group_id, f"{grade}.{g}.", rng.choice(GROUPS), "grup", topic_id, topic,
+                          grade, test, field)
+            emitted += 1
+
+            for a in range(1, rng.randint(1, 4) + 1):
+                if emitted >= quota:
+                    break
+                sub_id = f"{group_id}_{a}"
+                yield _record(sub_id, f"{grade}.{g}.{a}.", " ".join(rng.sample(WORDS, 3)).capitalize(),
+                              "alt_grup", group_id, topic, grade, test, field)
+                emitted += 1
+
+                for k in range(1, rng.randint(1, 5) + 1):
+                    if emitted >= quota:
+                        break
+                    title = " ".join(rng.choices(WORDS, k=rng.randint(4, 14))).capitalize() + "."
+                    yield _record(f"kznm_{t}_{g}_{a}_{k}", f"{grade}.{g}.{a}.{k}", title, "kazanım",
+                                  sub_id, topic, grade, test, field, round(rng.random(), 3))
+                    emitted += 1
+
+
+def write_synthetic_curriculum(path, count: int, seed: int = 0) -> Path:
+    """Write a synthetic curriculum in the export layout, one record at a time."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fp:
+        fp.write("{%s: [\n" % json.dumps(DEFAULT_RECORDS_KEY, ensure_ascii=False))
+        for i, record in enumerate(iter_synthetic_records(count, seed)):
+            if i:
+                fp.write(",\n")
+            fp.write(json.dumps(record, ensure_ascii=False))
+        fp.write("\n]}\n")
+    return path
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Per-request phase timers.
+
+Code marks phases with
+
+    with phase("parse"):
+        ...
+
+and adds request attributes with annotate(curriculum=..., nodes=...). Both
+only record something while a PhaseTimer is active in the current context
+(see collecting(); ServerTimingMiddleware activates one per request when
+SERVER_TIMING is on). Otherwise phase() returns a shared no-op context
+manager, so instrumented code costs one ContextVar lookup per phase.
+
+Durations of a phase entered several times in a request are summed.
+Pool threads see the timer because run_blocking() copies the context.
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+_current: contextvars.ContextVar[Optional["PhaseTimer"]] = contextvars.ContextVar("phase_timer", default=None)
+
+
+class PhaseTimer:
+    """Phase durations (seconds) and attributes collected for one request."""
+
+    __slots__ = ("phases", "attrs", "started")
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.attrs: Dict[str, Any] = {}
+        self.started = time.perf_counter()
+
+    def add(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def milliseconds(self) -> Dict[str, float]:
+        return {name: round(seconds * 1000, 3) for name, seconds in self.phases.items()}
+
+    def server_timing(self, total: Optional[float] = None) -> str:
+        """Server-Timing header value, e.g. "read;dur=1.2, parse;dur=8.31, total;dur=12.5"."""
+        metrics = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.phases.items()]
+        if total is not None:
+            metrics.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(metrics)
+
+
+class _Phase:
+    __slots__ = ("timer", "name", "start")
+
+    def __init__(self, timer: PhaseTimer, name: str):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.timer.add(self.name, time.perf_counter() - self.start)
+
+
+class _NoPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc_info):
+        return None
+
+
+_NO_PHASE = _NoPhase()
+
+
+def phase(name: str):
+    """Context manager timing a named phase of the current request (no-op when not collecting)."""
+    timer = _current.get()
+    if timer is None:
+        return _NO_PHASE
+    return _Phase(timer, name)
+
+
+def annotate(**attrs: Any) -> None:
+    """Attach attributes (curriculum, sizes, ...) to the current request's timings."""
+    timer = _current.get()
+    if timer is not None:
+        timer.attrs.update(attrs)
+
+
+def current_timer() -> Optional[PhaseTimer]:
+    return _current.get()
+
+
+@contextmanager
+def collecting() -> Iterator[PhaseTimer]:
+    """Collect phases and attributes recorded in this context into a new PhaseTimer."""
+    timer = PhaseTimer()
+    token = _current.set(timer)
+    try:
+        yield timer
+    finally:
+        _current.reset(token)
@@ -6,6 +6,10 @@ function GraphVisualizer(container, nodes, links){
   const width = container.clientWidth
   const height = container.clientHeight
 
+  // server-side layout (?layout=1) is centred on 0,0: shift it into view and only warm-start the simulation
+  const hasLayout = nodes.length > 0 && nodes.every(n => Number.isFinite(n.x) && Number.isFinite(n.y))
+  if (hasLayout) nodes.forEach(n => { n.x += width/2; n.y += height/2 })
+
   const svg = d3.select(container).append('svg').attr('width', width).attr('height', height)
   const zoomLayer = svg.append('g')
   const linkLayer = zoomLayer.append('g').attr('stroke', '#2b3147').attr('stroke-opacity', 0.5)
@@ -28,6 +32,7 @@ function GraphVisualizer(container, nodes, links){
     .force('x', d3.forceX(width/2).strength(0.03))
     .force('y', d3.forceY(height/2).strength(0.03))
     .force('collide', d3.forceCollide().radius(d=>d.r+4).iterations(2))
+  if (hasLayout) simulation.alpha(0.05)
 
   simulation.on('tick', () => {
     link.attr('x1', d=>d.source.x).attr('y1', d=>d.source.y).attr('x2', d=>d.target.x).attr('y2', d=>d.target.y)
@@ -59,7 +64,7 @@ function GraphVisualizer(container, nodes, links){
     svg.transition().duration(700).call(zoom.transform, d3.zoomIdentity.translate(tx,ty).scale(scale))
   }
 
-  setTimeout(()=>fitToView(), 1200)
+  setTimeout(()=>fitToView(), hasLayout ? 100 : 1200)
 }
 
 export default function GraphPage(){
@@ -72,7 +77,7 @@ export default function GraphPage(){
       try {
         setLoading(true)
         setError('')
-        const res = await fetch('http://localhost:8000/api/graph/data/')
+        const res = await fetch('http://localhost:8000/api/graph/data/?layout=1')
         const json = await res.json()
         if (json.status !== 'success') throw new Error(json.message || 'API error')
         GraphVisualizer(ref.current, json.data.nodes, json.data.links)